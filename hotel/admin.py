@@ -1,5 +1,6 @@
 # admin.py
 from django.contrib import admin
+from django.db.models import Sum
 from .models import *
 
 @admin.register(Hotel)
@@ -32,11 +33,44 @@ class CardAdmin(admin.ModelAdmin):
 
 @admin.register(RoomType)
 class RoomTypeAdmin(admin.ModelAdmin):
-    list_display = ['hotel', 'name', 'price_per_night', 'is_available', 'order']
-    list_editable = ['price_per_night', 'is_available', 'order']
+    list_display = ['hotel', 'name', 'price_per_night', 'total_rooms', 'is_available', 'order']
+    list_editable = ['price_per_night', 'total_rooms', 'is_available', 'order']
     list_filter = ['hotel', 'is_available']
     search_fields = ['hotel__name', 'name']
 
+@admin.register(RateRule)
+class RateRuleAdmin(admin.ModelAdmin):
+    list_display = ['room_type', 'name', 'kind', 'value', 'start_date', 'end_date', 'weekdays', 'priority', 'is_active']
+    list_editable = ['priority', 'is_active']
+    list_filter = ['room_type__hotel', 'kind', 'is_active']
+    search_fields = ['room_type__hotel__name', 'room_type__name', 'name']
+    list_select_related = ['room_type__hotel']
+
+@admin.register(RoomInventory)
+class RoomInventoryAdmin(admin.ModelAdmin):
+    list_display = ['room_type', 'date', 'allotment', 'held']
+    list_editable = ['allotment']
+    list_filter = ['room_type__hotel']
+    date_hierarchy = 'date'
+    list_select_related = ['room_type__hotel']
+    readonly_fields = ['held']
+
+@admin.register(RoomHold)
+class RoomHoldAdmin(admin.ModelAdmin):
+    """Holds are made and released through hotel.availability only"""
+    list_display = ['room_type', 'check_in', 'check_out', 'rooms', 'expires_at']
+    list_filter = ['room_type__hotel']
+    list_select_related = ['room_type__hotel']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 @admin.register(SectionContent)
 class SectionContentAdmin(admin.ModelAdmin):
     list_display = ['hotel', 'section_type', 'title', 'is_active']
@@ -73,4 +107,31 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['hotel', 'title', 'category', 'published_date', 'is_published']
     list_filter = ['hotel', 'category', 'is_published']
     list_editable = ['is_published']
-    search_fields = ['hotel__name', 'title', 'category']
\ No newline at end of file
+    search_fields = ['hotel__name', 'title', 'category']
+
+@admin.register(DailyHotelStats)
+class DailyHotelStatsAdmin(admin.ModelAdmin):
+    """Traffic report, reads only the daily rollups (see hotel/analytics.py)"""
+    list_display = ['date', 'hotel', 'views', 'new_visitors', 'returning_visitors']
+    list_filter = ['hotel']
+    date_hierarchy = 'date'
+    list_select_related = ['hotel']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        # Totals per hotel over the filtered days
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['hotel_totals'] = (
+                changelist.queryset.order_by()
+                .values('hotel__name')
+                .annotate(views=Sum('views'), new_visitors=Sum('new_visitors'))
+                .order_by('-views')
+            )
+        return response
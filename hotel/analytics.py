@@ -0,0 +1,167 @@
+# hotel/analytics.py
+"""Hotel page view analytics
+
+Views are queued in process and written by a background thread in batches:
+one bulk_create of the raw events and one upsert of the daily per-hotel
+rollups (DailyHotelStats) per flush, instead of a write per request that
+would serialize on SQLite's write lock. Reports read only the rollups.
+
+Events still queued when a process is killed are lost, they are flushed at
+normal interpreter exit.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.db import connection, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Hotel, PageView, DailyHotelStats
+
+logger = logging.getLogger(__name__)
+
+# A batch is written when it reaches this many events or its first event is this old
+ANALYTICS_BATCH_SIZE = 200
+ANALYTICS_FLUSH_SECONDS = 5
+# Events beyond this many waiting are dropped rather than slowing requests down
+ANALYTICS_QUEUE_SIZE = 10000
+
+# Queued by PageViewBuffer.flush() to make the writer thread write what it holds
+FLUSH = object()
+
+UPSERT_DAILY_STATS = """
+INSERT INTO {table} (hotel_id, date, views, new_visitors) VALUES {values}
+ON CONFLICT (hotel_id, date) DO UPDATE SET
+    views = {table}.views + excluded.views,
+    new_visitors = {table}.new_visitors + excluded.new_visitors
+"""
+
+
+def write_page_views(events):
+    """Store (hotel_id, viewed_at, is_new_visitor) events and add them to the daily rollups"""
+    close_old_connections()
+    # Events of hotels deleted since would fail the whole batch on their foreign key
+    hotel_ids = set(Hotel.objects.filter(pk__in={hotel_id for hotel_id, _, _ in events}).values_list('pk', flat=True))
+    events = [event for event in events if event[0] in hotel_ids]
+    if not events:
+        return
+
+    views = Counter()
+    new_visitors = Counter()
+    for hotel_id, viewed_at, is_new_visitor in events:
+        key = (hotel_id, timezone.localdate(viewed_at))
+        views[key] += 1
+        new_visitors[key] += is_new_visitor
+
+    with transaction.atomic():
+        PageView.objects.bulk_create(
+            [PageView(hotel_id=hotel_id, viewed_at=viewed_at, is_new_visitor=is_new_visitor)
+             for hotel_id, viewed_at, is_new_visitor in events],
+            batch_size=500,
+        )
+        params = []
+        for (hotel_id, date), count in views.items():
+            params += [hotel_id, date, count, new_visitors[hotel_id, date]]
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_DAILY_STATS.format(
+                table=connection.ops.quote_name(DailyHotelStats._meta.db_table),
+                values=', '.join(['(%s, %s, %s, %s)'] * len(views)),
+            ), params)
+
+
+class PageViewBuffer:
+    """In-process queue of page view events, written by a background thread"""
+
+    def __init__(self, batch_size=ANALYTICS_BATCH_SIZE, flush_seconds=ANALYTICS_FLUSH_SECONDS,
+                 max_size=ANALYTICS_QUEUE_SIZE, writer=write_page_views):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.writer = writer
+        self.events = queue.Queue(max_size)
+        self.dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, hotel_id, is_new_visitor=False):
+        """Queue a page view, never blocks the request"""
+        if self._thread is None:
+            self._start()
+        try:
+            self.events.put_nowait((hotel_id, timezone.now(), is_new_visitor))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='page-view-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            events, flushed = self._next_batch()
+            if events:
+                self._write(events)
+            if flushed is not None:
+                flushed.set()
+
+    def _next_batch(self):
+        """(events, flush request) of the next write
+
+        Up to batch_size events, waiting at most flush_seconds after the first
+        one. A flush request ends the batch early.
+        """
+        events = []
+        deadline = None
+        while len(events) < self.batch_size:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if event[0] is FLUSH:
+                return events, event[1]
+            events.append(event)
+            deadline = deadline or time.monotonic() + self.flush_seconds
+        return events, None
+
+    def _write(self, events):
+        try:
+            self.writer(events)
+        except Exception:
+            logger.exception('Could not write %d page views', len(events))
+
+    def flush(self, timeout=10):
+        """Write the queued events now, including a batch the writer thread is collecting"""
+        if self._thread is not None and self._thread.is_alive():
+            flushed = threading.Event()
+            try:
+                self.events.put((FLUSH, flushed), timeout=timeout)
+            except queue.Full:
+                return
+            flushed.wait(timeout)
+            return
+
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] is not FLUSH:
+                events.append(event)
+        for start in range(0, len(events), self.batch_size):
+            self._write(events[start:start + self.batch_size])
+
+
+page_views = PageViewBuffer()
+
+
+def record_page_view(hotel_id, is_new_visitor=False):
+    page_views.record(hotel_id, is_new_visitor)
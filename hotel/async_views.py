@@ -0,0 +1,106 @@
+# hotel/async_views.py
+"""Async variants of the page views, routed instead of the views.py ones when
+served through ASGI (see orchid_hotel/asgi.py)
+
+They answer from the same caches. On a miss, the independent database reads
+of a page run concurrently instead of one after another.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, Http404
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from .models import Hotel
+from .cache import (
+    aget_cached_page, aget_default_slug, aget_page_version, aget_directory_version, cache_page,
+    get_hotel_directory_page, conditional_validators, SectionFragments,
+)
+from .loaders import EAGER_SECTIONS, aload_home_hotel, build_home_context, in_worker_thread
+from .views import (
+    HOTEL_LIST_FIELDS, set_validators, record_visit, hotel_list_context, finish_hotel_list,
+)
+
+arender = sync_to_async(render)
+
+
+async def home(request, hotel_slug=None):
+    """Async views.home"""
+    visitor = request.visitor
+    is_first_visit = visitor.first_visit is None
+
+    slug = hotel_slug or visitor.preferred_hotel
+    version = await aget_page_version(slug) if slug else None
+    if version is None:
+        if hotel_slug:
+            raise Http404('No active hotel matches the given slug.')
+        slug = await aget_default_slug()
+        version = await aget_page_version(slug) if slug else None
+        if version is None:
+            return await arender(request, 'hotel/no_hotels.html')
+
+    record_visit(request, version['hotel_id'], slug, hotel_slug)
+
+    page_url = request.build_absolute_uri()
+    etag, last_modified = conditional_validators(version, page_url)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        content = await aget_cached_page(slug, page_url, version)
+        if content is not None:
+            response = HttpResponse(content)
+        else:
+            fragments = await sync_to_async(SectionFragments)(version['hotel_id'], EAGER_SECTIONS)
+            hotel, directory = await asyncio.gather(
+                aload_home_hotel(version['hotel_id'], fragments.missing),
+                in_worker_thread(get_hotel_directory_page),
+            )
+            if hotel is None:
+                raise Http404('No active hotel matches the given slug.')
+
+            context = build_home_context(hotel, fragments.missing)
+            context.update({
+                'section_fragments': fragments,
+                'all_hotels': directory['results'],
+                'all_hotels_next_cursor': directory['next_cursor'],
+                'recent_hotels': visitor.recent_hotels,
+                'is_first_visit': is_first_visit,
+            })
+            response = await arender(request, 'hotel/index.html', context)
+            await sync_to_async(cache_page)(slug, page_url, response.content, version)
+
+    set_validators(response, etag, last_modified)
+    if not hotel_slug:
+        patch_vary_headers(response, ['Cookie'])
+
+    return response
+
+
+async def hotel_list(request):
+    """Async views.hotel_list"""
+    preferred_hotel_slug = request.visitor.preferred_hotel
+
+    page_url = request.build_absolute_uri()
+    etag, last_modified = conditional_validators(await aget_directory_version(), f'{page_url}|{preferred_hotel_slug}')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        active = Hotel.objects.filter(is_active=True)
+        loads = [
+            in_worker_thread(active.first),
+            in_worker_thread(get_hotel_directory_page, fields=HOTEL_LIST_FIELDS),
+            in_worker_thread(get_hotel_directory_page),
+        ]
+        if preferred_hotel_slug:
+            loads.append(active.filter(slug=preferred_hotel_slug).afirst())
+        first, hotels, directory, *preferred = await asyncio.gather(*loads)
+
+        hotel = (preferred and preferred[0]) or first
+        if hotel is None:
+            return await arender(request, 'hotel/no_hotels.html')
+
+        response = await arender(request, 'hotel/hotel_list.html', hotel_list_context(request, hotel, hotels, directory))
+
+    finish_hotel_list(request, response, etag, last_modified)
+    return response
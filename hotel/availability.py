@@ -0,0 +1,315 @@
+# hotel/availability.py
+"""Room availability across all hotels
+
+RoomInventory rows (rooms offered and held per room type and night) are the
+truth. Searches are answered from an in-process index instead: one array of
+free rooms per room type covering every night of the booking horizon, so
+"n rooms free every night of a stay" is a min() over a short slice per room
+type rather than a scan of inventory rows.
+
+Every inventory change is logged in the cache under an increasing version.
+Each process replays the log to reload just the room types that changed,
+and rebuilds the whole index (seconds for a million nights) only when the log
+is gone or too long. A new day shifts the arrays and loads only the night
+that came into the horizon.
+
+Holds update the inventory rows with a conditional UPDATE (only while enough
+rooms are free), so concurrent requests can never hold the same room twice.
+"""
+import threading
+import uuid
+from array import array
+from datetime import date, timedelta
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import RoomType, RoomInventory, RoomHold
+
+# Nights bookable from today, and stays
+AVAILABILITY_DAYS = 366
+MAX_STAY_NIGHTS = 30
+MAX_ROOMS = 10
+HOLD_MINUTES = 15
+
+AVAILABILITY_VERSION_KEY = 'hotel:availability:version'
+CHANGE_LOG_TIMEOUT = 24*60*60
+# Beyond this many changes a full rebuild is cheaper than replaying them
+MAX_REPLAYED_CHANGES = 500
+# Change log entry meaning "everything changed"
+ALL_ROOM_TYPES = 0
+
+# Free room counts are stored as unsigned shorts
+MAX_FREE_ROOMS = 0xFFFF
+
+
+class RoomsUnavailable(Exception):
+    """Not enough rooms free on every night of the stay"""
+
+
+def parse_stay(check_in, check_out, rooms=1, today=None):
+    """(check_in, check_out, rooms) of a requested stay, raises ValueError when invalid"""
+    try:
+        check_in = check_in if isinstance(check_in, date) else date.fromisoformat(check_in)
+        check_out = check_out if isinstance(check_out, date) else date.fromisoformat(check_out)
+    except (TypeError, ValueError):
+        raise ValueError('check_in and check_out must be dates (YYYY-MM-DD)')
+    try:
+        rooms = int(rooms)
+    except (TypeError, ValueError):
+        raise ValueError('rooms must be a number')
+
+    today = today or timezone.localdate()
+    if check_in < today:
+        raise ValueError('check_in is in the past')
+    if not 1 <= (check_out - check_in).days <= MAX_STAY_NIGHTS:
+        raise ValueError(f'Stays are 1 to {MAX_STAY_NIGHTS} nights')
+    if check_out > today + timedelta(days=AVAILABILITY_DAYS):
+        raise ValueError(f'Rooms can be booked up to {AVAILABILITY_DAYS} days ahead')
+    if not 1 <= rooms <= MAX_ROOMS:
+        raise ValueError(f'rooms must be between 1 and {MAX_ROOMS}')
+    return check_in, check_out, rooms
+
+
+def _change_key(version):
+    return f'hotel:availability:change:{version}'
+
+
+def _current_version():
+    cache.add(AVAILABILITY_VERSION_KEY, 0, None)
+    return cache.get(AVAILABILITY_VERSION_KEY) or 0
+
+
+def log_inventory_change(room_type_id=ALL_ROOM_TYPES):
+    """Make every process reload a room type (by default all of them)"""
+    try:
+        version = cache.incr(AVAILABILITY_VERSION_KEY)
+    except ValueError:
+        cache.add(AVAILABILITY_VERSION_KEY, 0, None)
+        version = cache.incr(AVAILABILITY_VERSION_KEY)
+    cache.set(_change_key(version), room_type_id, CHANGE_LOG_TIMEOUT)
+
+
+def log_hotel_inventory_change(hotel_id):
+    """Make every process reload the room types of a hotel"""
+    for room_type_id in RoomType.objects.filter(hotel_id=hotel_id).values_list('pk', flat=True):
+        log_inventory_change(room_type_id)
+
+
+class AvailabilityIndex:
+    """Free rooms per bookable room type and night, from ``start`` on"""
+
+    def __init__(self, start, version, days=AVAILABILITY_DAYS):
+        self.start = start
+        self.version = version
+        self.days = days
+        self.free = array('H')
+        # room type id -> row, row -> room type details (None once not bookable)
+        self.rows = {}
+        self.room_types = []
+
+    @classmethod
+    def build(cls, start, version):
+        index = cls(start, version)
+        index.load(RoomType.objects.filter(is_available=True, hotel__is_active=True))
+        return index
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=self.days)
+
+    def load(self, room_types, first_night=None):
+        """Load the details and inventory of bookable ``room_types``, from ``first_night`` on"""
+        details = {
+            row['id']: row for row in room_types.values(
+                'id', 'name', 'price_per_night', 'hotel_id', 'hotel__slug', 'hotel__name',
+            )
+        }
+        for room_type_id, row in details.items():
+            if room_type_id not in self.rows:
+                self.rows[room_type_id] = len(self.room_types)
+                self.room_types.append(None)
+                self.free.frombytes(bytes(2 * self.days))
+            self.room_types[self.rows[room_type_id]] = row
+
+        inventory = RoomInventory.objects.filter(
+            room_type__in=room_types,
+            date__gte=first_night or self.start,
+            date__lt=self.end,
+        ).order_by().values_list('room_type_id', 'date', 'allotment', 'held')
+        for room_type_id, night, allotment, held in inventory.iterator(chunk_size=5000):
+            offset = self.rows[room_type_id] * self.days + (night - self.start).days
+            self.free[offset] = min(max(allotment - held, 0), MAX_FREE_ROOMS)
+
+    def reload(self, room_type_ids):
+        """Reload room types after a change, dropping those no longer bookable"""
+        for room_type_id in room_type_ids:
+            row = self.rows.get(room_type_id)
+            if row is not None:
+                self.room_types[row] = None
+                self.free[row * self.days:(row + 1) * self.days] = array('H', bytes(2 * self.days))
+        self.load(RoomType.objects.filter(pk__in=room_type_ids, is_available=True, hotel__is_active=True))
+
+    def advance(self, start):
+        """Move the horizon to begin at ``start``, False when only a rebuild can"""
+        shift = (start - self.start).days
+        if shift == 0:
+            return True
+        if not 0 < shift < self.days:
+            return False
+
+        days = self.days
+        free = array('H')
+        for row in range(len(self.room_types)):
+            free.extend(self.free[row * days + shift:(row + 1) * days])
+            free.frombytes(bytes(2 * shift))
+        first_night = self.end
+        self.free = free
+        self.start = start
+        self.load(RoomType.objects.filter(is_available=True, hotel__is_active=True), first_night)
+        return True
+
+    def replay(self, version):
+        """Catch up with the change log, False when only a rebuild can"""
+        if version == self.version:
+            return True
+        if not self.version < version <= self.version + MAX_REPLAYED_CHANGES:
+            return False
+        changes = cache.get_many([_change_key(v) for v in range(self.version + 1, version + 1)])
+        if len(changes) != version - self.version or ALL_ROOM_TYPES in changes.values():
+            return False
+        self.reload(set(changes.values()))
+        self.version = version
+        return True
+
+    def search(self, check_in, check_out, rooms, hotel_slug=None):
+        """Room types with ``rooms`` free on every night of [check_in, check_out)"""
+        first = (check_in - self.start).days
+        last = (check_out - self.start).days
+        days, free = self.days, self.free
+        results = []
+        for row, room_type in enumerate(self.room_types):
+            if room_type is None or (hotel_slug and room_type['hotel__slug'] != hotel_slug):
+                continue
+            offset = row * days
+            available = min(free[offset + first:offset + last])
+            if available >= rooms:
+                results.append((room_type, available))
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def find_available_rooms(check_in, check_out, rooms=1, hotel_slug=None):
+    """Bookable room types with ``rooms`` free on every night of the stay
+
+    The stay must be valid, see parse_stay(). Results are sorted by hotel and price.
+    """
+    global _index
+    today = timezone.localdate()
+    version = _current_version()
+    with _index_lock:
+        if _index is None or not (_index.advance(today) and _index.replay(version)):
+            _index = AvailabilityIndex.build(today, version)
+        results = _index.search(check_in, check_out, rooms, hotel_slug)
+
+    results.sort(key=lambda result: (result[0]['hotel__name'], result[0]['price_per_night'] is None,
+                                     result[0]['price_per_night'] or 0))
+    return [
+        {
+            'hotel': room_type['hotel__slug'],
+            'hotel_name': room_type['hotel__name'],
+            'room_type': room_type['id'],
+            'name': room_type['name'],
+            'price_per_night': str(room_type['price_per_night']) if room_type['price_per_night'] is not None else None,
+            'rooms_free': available,
+        }
+        for room_type, available in results
+    ]
+
+
+def hold_rooms(room_type_id, check_in, check_out, rooms=1, minutes=HOLD_MINUTES):
+    """Hold rooms for every night of a stay, raises RoomsUnavailable when sold out
+
+    Returns the RoomHold, release it with release_hold(hold.token).
+    """
+    check_in, check_out, rooms = parse_stay(check_in, check_out, rooms)
+    nights = (check_out - check_in).days
+    with transaction.atomic():
+        # One conditional UPDATE takes the rooms of all nights that still have
+        # them, the hold only stands if that was every night.
+        updated = RoomInventory.objects.filter(
+            room_type_id=room_type_id,
+            room_type__is_available=True,
+            room_type__hotel__is_active=True,
+            date__gte=check_in,
+            date__lt=check_out,
+            held__lte=F('allotment') - rooms,
+        ).update(held=F('held') + rooms)
+        if updated != nights:
+            raise RoomsUnavailable(f'{rooms} rooms are not free on every night from {check_in} to {check_out}')
+
+        hold = RoomHold.objects.create(
+            token=uuid.uuid4(),
+            room_type_id=room_type_id,
+            check_in=check_in,
+            check_out=check_out,
+            rooms=rooms,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+        )
+        transaction.on_commit(partial(log_inventory_change, room_type_id))
+    return hold
+
+
+def release_hold(token):
+    """Give the rooms of a hold back, False when it was already released"""
+    hold = RoomHold.objects.filter(token=token).first()
+    if hold is None:
+        return False
+    with transaction.atomic():
+        # Only the request that deletes the hold gives its rooms back
+        deleted, _ = RoomHold.objects.filter(pk=hold.pk).delete()
+        if not deleted:
+            return False
+        RoomInventory.objects.filter(
+            room_type_id=hold.room_type_id,
+            date__gte=hold.check_in,
+            date__lt=hold.check_out,
+        ).update(held=Greatest(F('held') - hold.rooms, 0))
+        transaction.on_commit(partial(log_inventory_change, hold.room_type_id))
+    return True
+
+
+def release_expired_holds():
+    """Release the holds past their expiry, returns how many were released"""
+    expired = RoomHold.objects.filter(expires_at__lte=timezone.now()).values_list('token', flat=True)
+    return sum(release_hold(token) for token in list(expired))
+
+
+def open_inventory(room_types=None, days=AVAILABILITY_DAYS):
+    """Add the missing nights of the booking horizon, offering each room type's total_rooms
+
+    Existing nights are left alone. Returns the number of nights added.
+    """
+    if room_types is None:
+        room_types = RoomType.objects.all()
+    start = timezone.localdate()
+    added = 0
+    for room_type_id, total_rooms in room_types.values_list('id', 'total_rooms').iterator():
+        existing = set(RoomInventory.objects.filter(
+            room_type_id=room_type_id, date__gte=start, date__lt=start + timedelta(days=days),
+        ).values_list('date', flat=True))
+        nights = [
+            RoomInventory(room_type_id=room_type_id, date=start + timedelta(days=day), allotment=total_rooms)
+            for day in range(days) if start + timedelta(days=day) not in existing
+        ]
+        added += len(RoomInventory.objects.bulk_create(nights, batch_size=500, ignore_conflicts=True))
+    if added:
+        transaction.on_commit(log_inventory_change)
+    return added
@@ -0,0 +1,356 @@
+# hotel/benchmark.py
+"""Benchmarks of the hotel pages and APIs, see the benchmark command
+
+Every endpoint is driven twice: in process through Django's test client
+(latency, queries and bytes of each request) and over HTTP by a pool of
+client threads against a local threaded WSGI server (throughput under
+concurrency). Results are plain dicts, written as JSON by the command so runs
+of different releases can be compared with compare_results().
+
+The benchmark_queries command shows the query plans and timings of the home
+page content queries on a large portfolio, with and without CONTENT_INDEXES.
+"""
+import http.client
+import math
+import os
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.db import connection, transaction
+from django.test import Client
+from django.test.testcases import QuietWSGIRequestHandler
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .availability import open_inventory
+from .bundles import import_rows
+from .loaders import hotel_page_queryset
+from .models import Hotel, MainInfo, CarouselSlide, Card, RoomType, SectionContent, FAQ, BlogPost
+
+# Synthetic dataset, per hotel unless noted
+DATASET = {'hotels': 100, 'cards': 8, 'faqs': 10, 'blogs': 5, 'rooms': 3}
+BENCHMARK_SLUG_PREFIX = 'bench-'
+SEED = 2024
+
+WORDS = (
+    'luxury', 'suite', 'garden', 'rooftop', 'spa', 'breakfast', 'airport', 'banquet', 'wedding', 'pool',
+    'heritage', 'lake', 'mountain', 'business', 'family', 'terrace', 'lounge', 'dining', 'buffet', 'river',
+    'temple', 'beach', 'conference', 'wellness', 'monsoon', 'festive', 'weekend', 'view', 'deluxe', 'club',
+)
+
+# Report percentiles of the latencies, in milliseconds
+PERCENTILES = (50, 95, 99)
+
+# Indexes of the home page content queries (migration 0010)
+CONTENT_INDEXES = (
+    (Card, 'card_hotel_category_idx'),
+    (RoomType, 'room_type_hotel_order_idx'),
+    (FAQ, 'faq_hotel_order_idx'),
+    (BlogPost, 'blog_post_hotel_date_idx'),
+)
+
+# Portfolio of the query plan benchmark: 10,000 hotels and a million cards
+SCALE_DATASET = {'hotels': 10000, 'cards': 100, 'faqs': 10, 'blogs': 10, 'rooms': 5}
+
+
+@contextmanager
+def benchmark_database():
+    """Switch the default database to a new, migrated SQLite file, removed afterwards"""
+    directory = tempfile.mkdtemp(prefix='hotel-benchmark-')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def synthetic_rows(hotels, cards, faqs, blogs, rooms, seed=SEED):
+    """(model, row, location) rows of a synthetic portfolio, for bundles.import_rows()
+
+    Images are names with dimensions only, no files are needed to render them.
+    """
+    rng = random.Random(seed)
+    slugs = [f'{BENCHMARK_SLUG_PREFIX}{number}' for number in range(hotels)]
+    image = {'image_width': 800, 'image_height': 600}
+    today = timezone.localdate()
+
+    for number, slug in enumerate(slugs):
+        yield Hotel, {
+            'slug': slug, 'name': f'Benchmark Hotel {number}', 'tagline': _text(rng, 6),
+            'address': f'{number} {_text(rng, 2)} Road', 'phone': f'+91 22 {number:08d}',
+            'email': f'{slug}@example.com', 'thumbnail': 'bench/thumbnail.jpg',
+            'thumbnail_width': 400, 'thumbnail_height': 300,
+        }, slug
+    for slug in slugs:
+        yield MainInfo, {'hotel': slug, 'title': _text(rng, 5), 'highlighted_text': _text(rng, 3),
+                         'description': _text(rng, 80)}, slug
+        for order in range(2):
+            yield CarouselSlide, {'hotel': slug, 'title': _text(rng, 4), 'image': f'bench/slide{order}.jpg',
+                                  'order': order, **image}, slug
+        for order in range(cards):
+            yield Card, {'hotel': slug, 'title': f'{_text(rng, 3)} {order}', 'order': order,
+                         'category': ('gallery', 'general', 'special_offers')[order % 3],
+                         'image': f'bench/card{order}.jpg', 'description': _text(rng, 30), **image}, slug
+        for order in range(rooms):
+            yield RoomType, {'hotel': slug, 'name': f'{_text(rng, 2)} Room {order}', 'order': order,
+                             'image': f'bench/room{order}.jpg', 'description': _text(rng, 40),
+                             'price_per_night': f'{rng.randrange(3000, 30000)}.00', 'total_rooms': 20, **image}, slug
+        for section_type in ('wedding', 'banquet', 'restaurant', 'faq'):
+            yield SectionContent, {'hotel': slug, 'section_type': section_type, 'title': _text(rng, 4),
+                                   'description': _text(rng, 60)}, slug
+        for order in range(faqs):
+            yield FAQ, {'hotel': slug, 'question': f'{_text(rng, 8)} {order}?', 'answer': _text(rng, 40),
+                        'order': order}, slug
+        for order in range(blogs):
+            yield BlogPost, {'hotel': slug, 'title': f'{_text(rng, 6)} {order}', 'excerpt': _text(rng, 25),
+                             'content': _text(rng, 400), 'image': f'bench/blog{order}.jpg',
+                             'category': rng.choice(('Travel', 'Food', 'Events')),
+                             'published_date': (today - timedelta(days=order)).isoformat(), **image}, slug
+
+
+def generate_dataset(hotels, cards, faqs, blogs, rooms):
+    """Import the synthetic portfolio and open its room inventory, returns the row counts"""
+    importer, _ = import_rows(synthetic_rows(hotels, cards, faqs, blogs, rooms))
+    open_inventory(RoomType.objects.filter(hotel__slug__startswith=BENCHMARK_SLUG_PREFIX))
+    return importer.created
+
+
+def generate_scale_dataset(hotels, cards, faqs, blogs, rooms, chunk=500):
+    """Bulk insert a large portfolio directly, a tenth of the content inactive"""
+    rng = random.Random(SEED)
+    categories = [category for category, _ in Card.CATEGORY_CHOICES]
+    image = {'image_width': 800, 'image_height': 600}
+    today = timezone.localdate()
+    for first in range(0, hotels, chunk):
+        with transaction.atomic():
+            created = Hotel.objects.bulk_create([
+                Hotel(slug=f'{BENCHMARK_SLUG_PREFIX}{number}', name=f'Benchmark Hotel {number}', tagline=_text(rng, 6),
+                      address=f'{number} Road', phone=f'+91 22 {number:08d}', email=f'hotel{number}@example.com')
+                for number in range(first, min(first + chunk, hotels))
+            ])
+            Card.objects.bulk_create([
+                Card(hotel=hotel, title=f'Card {order}', category=categories[order % len(categories)], order=order,
+                     is_active=rng.random() > 0.1, image=f'bench/card{order % 10}.jpg', **image)
+                for hotel in created for order in range(cards)
+            ], batch_size=5000)
+            RoomType.objects.bulk_create([
+                RoomType(hotel=hotel, name=f'Room {order}', order=order, is_available=rng.random() > 0.1,
+                         image=f'bench/room{order}.jpg', price_per_night=rng.randrange(3000, 30000), **image)
+                for hotel in created for order in range(rooms)
+            ], batch_size=5000)
+            FAQ.objects.bulk_create([
+                FAQ(hotel=hotel, question=f'Question {order}?', answer=_text(rng, 10), order=order,
+                    is_active=rng.random() > 0.1)
+                for hotel in created for order in range(faqs)
+            ], batch_size=5000)
+            BlogPost.objects.bulk_create([
+                BlogPost(hotel=hotel, title=f'Post {order}', excerpt=_text(rng, 10), content=_text(rng, 30),
+                         image=f'bench/blog{order % 10}.jpg', published_date=today - timedelta(days=rng.randrange(1000)),
+                         is_published=rng.random() > 0.1, **image)
+                for hotel in created for order in range(blogs)
+            ], batch_size=5000)
+
+
+@contextmanager
+def dropped_indexes(indexes=CONTENT_INDEXES):
+    """Run without the given (model, index name) indexes, recreating them afterwards"""
+    found = [
+        (model, next(index for index in model._meta.indexes if index.name == name)) for model, name in indexes
+    ]
+    with connection.schema_editor() as editor:
+        for model, index in found:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in found:
+                editor.add_index(model, index)
+
+
+def home_query_plans(hotel_id, repeat=50):
+    """Plan and mean time of each query loading a hotel's home page content"""
+    with CaptureQueriesContext(connection) as captured:
+        hotel_page_queryset().get(pk=hotel_id)
+
+    plans = []
+    with connection.cursor() as cursor:
+        for query in captured.captured_queries:
+            sql = query['sql']
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cursor.execute(sql)
+                cursor.fetchall()
+            table = re.search(r'FROM "(\w+)"', sql)
+            plans.append({
+                'table': table.group(1) if table else None,
+                'plan': plan,
+                'mean_ms': round((time.perf_counter() - started) / repeat * 1000, 3),
+            })
+    return plans
+
+
+def benchmark_targets(sample=20):
+    """{endpoint name: paths} of the pages and read APIs, requests cycle through the paths"""
+    slugs = list(Hotel.objects.filter(slug__startswith=BENCHMARK_SLUG_PREFIX, is_active=True)
+                 .order_by('pk').values_list('slug', flat=True)[:sample])
+    posts = list(BlogPost.objects.filter(hotel__slug__in=slugs, is_published=True)
+                 .order_by('hotel_id', '-published_date', '-id').values_list('hotel__slug', 'pk')[:sample])
+    check_in = timezone.localdate() + timedelta(days=7)
+    stay = f'check_in={check_in}&check_out={check_in + timedelta(days=2)}'
+    return {
+        'home_default': ['/'],
+        'home': [f'/{slug}/' for slug in slugs],
+        'hotel_list': ['/hotels/list/'],
+        'blog_index': [f'/{slug}/blog/' for slug in slugs],
+        'blog_post': [f'/{slug}/blog/{pk}/' for slug, pk in posts],
+        'hotel_directory_api': ['/api/hotels/?limit=20'],
+        'search_api': [f'/api/search/?q={word}' for word in WORDS[:sample]],
+        'compare_api': [f'/api/compare/?slugs={",".join(slugs[i:i + 3])}' for i in range(0, len(slugs), 3)],
+        'availability_api': [f'/api/availability/?{stay}&rooms=1'] + [f'/api/availability/?{stay}&hotel={slug}' for slug in slugs],
+        'rates_api': [f'/api/rates/?hotel={slug}' for slug in slugs],
+        'state_api': ['/api/state/?read=user,consent,comparison'],
+    }
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted ``values``"""
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def summarize(endpoint, client, latencies, elapsed, errors, queries, sizes):
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        'endpoint': endpoint,
+        'client': client,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3),
+            **{f'p{percent}': round(percentile(latencies, percent), 3) for percent in PERCENTILES},
+            'max': round(latencies[-1], 3),
+        },
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        'bytes_per_response': round(statistics.fmean(sizes)) if sizes else None,
+    }
+
+
+def run_test_client(endpoint, paths, requests, warmup):
+    """Requests one after another in process, counting the queries of each"""
+    client = Client()
+    for number in range(warmup):
+        client.get(paths[number % len(paths)])
+
+    latencies, queries, sizes = [], [], []
+    errors = 0
+    started = time.perf_counter()
+    for number in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            begin = time.perf_counter()
+            response = client.get(paths[number % len(paths)])
+            latencies.append(time.perf_counter() - begin)
+        errors += response.status_code >= 400
+        queries.append(len(captured.captured_queries))
+        sizes.append(len(response.content))
+    return summarize(endpoint, 'test_client', latencies, time.perf_counter() - started, errors, queries, sizes)
+
+
+class QueryCountingHandler(WSGIHandler):
+    """WSGI handler recording the database queries of each request"""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            response = super().__call__(environ, start_response)
+        with self._lock:
+            self.queries.append(count[0])
+        return response
+
+
+class LoadServer:
+    """Threaded WSGI server of the site on a free local port"""
+
+    def __init__(self):
+        self.handler = QueryCountingHandler()
+        self.server = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+        self.server.set_app(self.handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='benchmark-server', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _http_get(port, path):
+    """(latency, status, bytes) of one request on a new connection"""
+    begin = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', path, headers={'Host': '127.0.0.1'})
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    return time.perf_counter() - begin, response.status, len(body)
+
+
+def run_http_load(server, endpoint, paths, requests, concurrency, warmup):
+    """Requests from ``concurrency`` threads at once against the local server"""
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='benchmark-client') as pool:
+        list(pool.map(lambda number: _http_get(server.port, paths[number % len(paths)]), range(warmup)))
+        server.handler.queries.clear()
+        started = time.perf_counter()
+        results = list(pool.map(lambda number: _http_get(server.port, paths[number % len(paths)]), range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _, _ in results]
+    errors = sum(status >= 400 for _, status, _ in results)
+    sizes = [size for _, _, size in results]
+    return summarize(endpoint, 'http', latencies, elapsed, errors, list(server.handler.queries), sizes)
+
+
+def compare_results(baseline, results, tolerance=10):
+    """(endpoint, client, p95 change %, throughput change %, regressed) of the runs found in both"""
+    previous = {(run['endpoint'], run['client']): run for run in baseline['results']}
+    changes = []
+    for run in results['results']:
+        old = previous.get((run['endpoint'], run['client']))
+        if old is None:
+            continue
+        p95 = (run['latency_ms']['p95'] / old['latency_ms']['p95'] - 1) * 100 if old['latency_ms']['p95'] else 0
+        throughput = ((run['throughput_rps'] / old['throughput_rps'] - 1) * 100
+                      if old['throughput_rps'] and run['throughput_rps'] else 0)
+        changes.append((run['endpoint'], run['client'], round(p95, 1), round(throughput, 1), p95 > tolerance))
+    return changes
@@ -0,0 +1,379 @@
+# hotel/bundles.py
+"""Hotel content bundles, see the import_hotels and export_hotels commands
+
+A bundle is a directory holding the rows of every hotel model, either as
+content.jsonl (one {"model": ..., ...fields} object per line, hotels first)
+or as one CSV file per model, plus the media files they use under media/.
+Rows of a hotel name it by slug in a "hotel" field, blog authors are
+usernames, and a row is matched to an existing one by its NATURAL_KEYS.
+
+Both directions stream: rows are written as they are read from the
+database, and imported in transactional batches of bulk inserts and upserts,
+resolving hotels through an in-memory slug map. Media files are copied by a
+thread pool while rows are read.
+"""
+import csv
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, FileField
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.text import slugify
+
+from .availability import log_inventory_change
+from .cache import invalidate_all_pages
+from .models import Hotel, MainInfo, CarouselSlide, Card, RoomType, RateCalendar, SectionContent, FAQ, BlogPost
+from .rates import invalidate_hotel_rates
+from .renditions import schedule_renditions
+from .search import rebuild_index, search_available
+
+# Hotels first: the other rows refer to them
+BUNDLE_MODELS = (Hotel, MainInfo, CarouselSlide, Card, RoomType, SectionContent, FAQ, BlogPost)
+MODELS_BY_NAME = {model._meta.model_name: model for model in BUNDLE_MODELS}
+
+# Fields identifying a row, "hotel" being the slug of its hotel
+NATURAL_KEYS = {
+    Hotel: ('slug',),
+    MainInfo: ('hotel',),
+    CarouselSlide: ('hotel', 'order'),
+    Card: ('hotel', 'category', 'title'),
+    RoomType: ('hotel', 'name'),
+    SectionContent: ('hotel', 'section_type'),
+    FAQ: ('hotel', 'question'),
+    BlogPost: ('hotel', 'title'),
+}
+
+# Kept by the site itself, never exported or imported
+SITE_FIELDS = {'id', 'content_version', 'content_updated_at', 'created_at', 'updated_at'}
+# Rendered from other fields as rows are written, never exported or imported
+RENDERED_FIELDS = {'content_html'}
+
+JSONL_FILE = 'content.jsonl'
+MEDIA_DIR = 'media'
+IMPORT_BATCH_SIZE = 500
+MEDIA_WORKERS = 8
+
+
+def bundle_fields(model):
+    """Names of the plain fields of a model carried in bundles"""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.is_relation and field.name not in SITE_FIELDS and field.name not in RENDERED_FIELDS
+    ]
+
+
+def media_fields(model):
+    return [field.name for field in model._meta.concrete_fields if isinstance(field, FileField)]
+
+
+def csv_file(model):
+    return f'{model._meta.model_name}.csv'
+
+
+def _copy_to_bundle(name, media_root):
+    target = safe_join(media_root, name)
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name) as source, open(target, 'wb') as copy:
+        shutil.copyfileobj(source, copy)
+
+
+def _copy_from_bundle(name, media_root):
+    if default_storage.exists(name):
+        return
+    with open(safe_join(media_root, name), 'rb') as source:
+        default_storage.save(name, File(source))
+
+
+class BundleWriter:
+    """Writes the rows of a bundle, as JSONL or one CSV per model"""
+
+    def __init__(self, path, format='jsonl'):
+        if format not in ('jsonl', 'csv'):
+            raise ValueError('format must be jsonl or csv')
+        self.path = path
+        self.format = format
+        self.files = {}
+        self.writers = {}
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, model, row):
+        if self.format == 'jsonl':
+            if None not in self.files:
+                self.files[None] = open(os.path.join(self.path, JSONL_FILE), 'w', encoding='utf-8')
+            self.files[None].write(json.dumps({'model': model._meta.model_name, **row}, cls=DjangoJSONEncoder) + '\n')
+            return
+        if model not in self.writers:
+            self.files[model] = open(os.path.join(self.path, csv_file(model)), 'w', encoding='utf-8', newline='')
+            self.writers[model] = csv.DictWriter(self.files[model], fieldnames=list(row))
+            self.writers[model].writeheader()
+        self.writers[model].writerow({key: '' if value is None else value for key, value in row.items()})
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+def export_bundle(path, format='jsonl', hotel_slugs=None, media=True, workers=MEDIA_WORKERS):
+    """Write hotels and their content to a bundle directory
+
+    Returns ({model name: rows written}, media files copied, copy errors).
+    """
+    writer = BundleWriter(path, format)
+    media_root = os.path.join(path, MEDIA_DIR)
+    counts = {}
+    copied = set()
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bundle-media') as pool:
+        try:
+            for model in BUNDLE_MODELS:
+                relations = {}
+                if model is not Hotel:
+                    relations['hotel'] = 'hotel__slug'
+                if model is BlogPost:
+                    relations['author'] = 'author__username'
+                fields = bundle_fields(model)
+                rows = model.objects.order_by('pk').values(*fields, *relations.values())
+                if hotel_slugs:
+                    rows = rows.filter(**{'slug__in' if model is Hotel else 'hotel__slug__in': hotel_slugs})
+
+                counts[model._meta.model_name] = 0
+                for row in rows.iterator(chunk_size=2000):
+                    writer.write(model, {
+                        **{name: row[lookup] for name, lookup in relations.items()},
+                        **{name: row[name] for name in fields},
+                    })
+                    counts[model._meta.model_name] += 1
+                    for name in media_fields(model):
+                        if media and row[name] and row[name] not in copied:
+                            copied.add(row[name])
+                            futures.append(pool.submit(_copy_to_bundle, row[name], media_root))
+        finally:
+            writer.close()
+    errors = [future.exception() for future in futures if future.exception()]
+    return counts, len(copied) - len(errors), errors
+
+
+def read_bundle(path):
+    """(model, row, location) of every row of a bundle, hotels first"""
+    jsonl = os.path.join(path, JSONL_FILE)
+    if os.path.exists(jsonl):
+        with open(jsonl, encoding='utf-8') as file:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    model = MODELS_BY_NAME[row.pop('model')]
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    raise ValueError(f'{JSONL_FILE}:{number}: not a row of a hotel model')
+                yield model, row, f'{JSONL_FILE}:{number}'
+        return
+
+    found = False
+    for model in BUNDLE_MODELS:
+        name = os.path.join(path, csv_file(model))
+        if not os.path.exists(name):
+            continue
+        found = True
+        with open(name, encoding='utf-8', newline='') as file:
+            for number, row in enumerate(csv.DictReader(file), 2):
+                yield model, row, f'{csv_file(model)}:{number}'
+    if not found:
+        raise ValueError(f'{path} holds neither {JSONL_FILE} nor per-model CSV files')
+
+
+class BundleImporter:
+    """Creates or updates the rows of a bundle in batches
+
+    Rows are matched to existing ones by their NATURAL_KEYS. Fields missing
+    from a row get their default value.
+    """
+
+    def __init__(self, media_root=None, batch_size=IMPORT_BATCH_SIZE, workers=MEDIA_WORKERS):
+        self.media_root = media_root
+        self.batch_size = batch_size
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bundle-media')
+        self.media = {}
+        self.pending = {}
+        self.hotels = dict(Hotel.objects.values_list('slug', 'pk'))
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.created = dict.fromkeys(MODELS_BY_NAME, 0)
+        self.updated = dict.fromkeys(MODELS_BY_NAME, 0)
+        # Natural keys written so far, a repeated one is an error rather than a silent overwrite
+        self.keys = {model: set() for model in BUNDLE_MODELS}
+        # Hotels whose content changed, and room types whose base price may have
+        self.hotel_ids = set()
+        self.room_type_ids = set()
+
+    def add(self, model, row, location):
+        if model is not Hotel and row.get('hotel') not in self.hotels and Hotel in self.pending:
+            self.flush(Hotel)
+        if self.media_root:
+            for name in media_fields(model):
+                if row.get(name) and row[name] not in self.media:
+                    self.media[row[name]] = self.pool.submit(_copy_from_bundle, row[name], self.media_root)
+        self.pending.setdefault(model, []).append((row, location))
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def instance(self, model, row, location):
+        """Unsaved model instance of a bundle row, raises ValueError when invalid"""
+        row = dict(row)
+        values = {}
+        if model is not Hotel:
+            slug = row.pop('hotel', None)
+            if slug not in self.hotels:
+                raise ValueError(f'{location}: unknown hotel {slug!r}')
+            values['hotel_id'] = self.hotels[slug]
+        if model is BlogPost:
+            values['author_id'] = self.users.get(row.pop('author', None) or None)
+
+        fields = set(bundle_fields(model))
+        unknown = set(row) - fields
+        if unknown:
+            raise ValueError(f'{location}: unknown {model._meta.model_name} fields {", ".join(sorted(unknown))}')
+        for name, value in row.items():
+            field = model._meta.get_field(name)
+            if value == '' and field.null:
+                value = None
+            try:
+                values[field.attname] = field.to_python(value)
+            except ValidationError as exc:
+                raise ValueError(f'{location}: {name}: {"; ".join(exc.messages)}')
+        if model is Hotel and not values.get('slug'):
+            values['slug'] = slugify(values.get('name', ''))
+        try:
+            return model(**values)
+        except OSError as exc:
+            # Images without width and height are opened to measure them
+            raise ValueError(f'{location}: {exc}')
+
+    def flush(self, model):
+        """Write the pending rows of a model in one transaction"""
+        rows = self.pending.pop(model, [])
+        if not rows:
+            return
+        # Image rows read their dimensions from the files when they are not given
+        wait(self.media.values())
+
+        key_fields = [('hotel_id' if name == 'hotel' else name) for name in NATURAL_KEYS[model]]
+        instances = {}
+        for row, location in rows:
+            instance = self.instance(model, row, location)
+            key = tuple(getattr(instance, name) for name in key_fields)
+            if key in instances or key in self.keys[model]:
+                shown = {name: row.get('hotel') if name == 'hotel' else getattr(instance, name) for name in NATURAL_KEYS[model]}
+                raise ValueError(f'{location}: duplicate {model._meta.model_name} '
+                                 f'{", ".join(f"{name}={value!r}" for name, value in shown.items())}')
+            instances[key] = instance
+
+        existing_rows = model.objects.all()
+        if model is Hotel:
+            existing_rows = existing_rows.filter(slug__in=[key[0] for key in instances])
+        else:
+            existing_rows = existing_rows.filter(hotel_id__in={instance.hotel_id for instance in instances.values()})
+        existing = {tuple(row[1:]): row[0] for row in existing_rows.values_list('pk', *key_fields)}
+
+        new, changed = [], []
+        now = timezone.now()
+        for key, instance in instances.items():
+            if key in existing:
+                instance.pk = existing[key]
+                changed.append(instance)
+            else:
+                new.append(instance)
+            for field in model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    setattr(instance, field.attname, now)
+            # Done by save(), which bulk writes skip
+            if model is BlogPost:
+                instance.render_content()
+
+        update_fields = [
+            field.attname for field in model._meta.concrete_fields
+            if not field.primary_key and (field.name not in SITE_FIELDS or getattr(field, 'auto_now', False))
+        ]
+        with transaction.atomic():
+            model.objects.bulk_create(new, batch_size=self.batch_size)
+            # An upsert on the primary key rewrites existing rows in one
+            # statement, bulk_update() builds a CASE per field that grows with the batch
+            if changed:
+                model.objects.bulk_create(
+                    changed, batch_size=self.batch_size,
+                    update_conflicts=True, unique_fields=['pk'], update_fields=update_fields,
+                )
+
+        # Renditions of the imported images, as the post_save signal would
+        if media_fields(model):
+            for instance in instances.values():
+                schedule_renditions(instance)
+
+        self.keys[model].update(instances)
+        self.created[model._meta.model_name] += len(new)
+        self.updated[model._meta.model_name] += len(changed)
+        if model is Hotel:
+            self.hotels.update(Hotel.objects.filter(slug__in=[key[0] for key in instances]).values_list('slug', 'pk'))
+            self.hotel_ids.update(self.hotels[key[0]] for key in instances)
+        else:
+            self.hotel_ids.update(instance.hotel_id for instance in instances.values())
+        if model is RoomType:
+            self.room_type_ids.update(instance.pk for instance in changed)
+
+    def finish(self):
+        """Write the remaining rows, returns {media file: error} of the files that could not be copied"""
+        for model in BUNDLE_MODELS:
+            self.flush(model)
+        return {name: future.exception() for name, future in self.media.items() if future.exception()}
+
+
+def refresh_imported(hotel_ids, room_type_ids):
+    """Bring caches, calendars and the search index up to date with imported rows
+
+    Bulk writes send no model signals, so this does what the signals would have
+    (images get their renditions as each batch is written).
+    """
+    Hotel.objects.filter(pk__in=hotel_ids).update(
+        content_version=F('content_version') + 1, content_updated_at=timezone.now(),
+    )
+    # Recompiled on their next read, from the imported base prices
+    RateCalendar.objects.filter(room_type_id__in=room_type_ids).delete()
+    for slug in Hotel.objects.filter(pk__in=hotel_ids).values_list('slug', flat=True):
+        invalidate_hotel_rates(slug)
+    invalidate_all_pages()
+    log_inventory_change()
+    if search_available():
+        rebuild_index()
+
+
+def import_rows(rows, media_root=None, batch_size=IMPORT_BATCH_SIZE, workers=MEDIA_WORKERS):
+    """Create or update (model, row, location) rows, raises ValueError at the first invalid row
+
+    Batches written before an error are kept. Returns the BundleImporter,
+    with its counts, and {media file: error} of the files not copied.
+    """
+    importer = BundleImporter(media_root, batch_size, workers)
+    try:
+        for model, row, location in rows:
+            importer.add(model, row, location)
+        missing = importer.finish()
+    finally:
+        importer.pool.shutdown(cancel_futures=True)
+        if importer.hotel_ids:
+            refresh_imported(importer.hotel_ids, importer.room_type_ids)
+    return importer, missing
+
+
+def import_bundle(path, batch_size=IMPORT_BATCH_SIZE, media=True, workers=MEDIA_WORKERS):
+    """Create or update the rows of a bundle directory, see import_rows()"""
+    return import_rows(read_bundle(path), os.path.join(path, MEDIA_DIR) if media else None, batch_size, workers)
@@ -0,0 +1,274 @@
+# hotel/cache.py
+import hashlib
+import json
+import time
+from calendar import timegm
+
+from django.core.cache import cache
+
+from .loaders import (
+    load_default_slug, load_directory_version, load_page_version, load_preview_images,
+    load_hotel_directory_page, load_comparison,
+    aload_default_slug, aload_directory_version, aload_page_version,
+    DIRECTORY_PAGE_SIZE, DIRECTORY_FIELDS,
+)
+
+PAGE_CACHE_TIMEOUT = 24*60*60  # 1 day, pages are invalidated by signals anyway
+PAGE_GENERATION_KEY = 'hotel:pages:generation'
+
+# The rendered page embeds the absolute URL (canonical and og:url tags), so one
+# hotel is cached as a small dict of URL -> HTML. Cap it so arbitrary query
+# strings cannot grow an entry without bound.
+MAX_PAGE_VARIANTS = 8
+
+
+def _generation():
+    """Generation shared by every page, bumped when the hotel list changes"""
+    return cache.get_or_set(PAGE_GENERATION_KEY, time.time_ns, None)
+
+
+async def _ageneration():
+    return await cache.aget_or_set(PAGE_GENERATION_KEY, time.time_ns, None)
+
+
+def _page_key(generation, slug):
+    return f'hotel:page:{generation}:{slug}'
+
+
+def _version_key(generation, slug):
+    return f'hotel:page-version:{generation}:{slug}'
+
+
+def _default_slug_key(generation):
+    return f'hotel:default-slug:{generation}'
+
+
+def _directory_version_key(generation):
+    return f'hotel:version:{generation}'
+
+
+def _fragment_key(generation, hotel_id, section):
+    return f'hotel:fragment:{generation}:{hotel_id}:{section}'
+
+
+def _fragment_version_key(generation, hotel_id, section):
+    return f'hotel:fragment-version:{generation}:{hotel_id}:{section}'
+
+
+def get_default_slug():
+    """Cached slug of the hotel shown to visitors without a slug or preference"""
+    key = _default_slug_key(_generation())
+    slug = cache.get(key)
+    if slug is None:
+        slug = load_default_slug()
+        if slug is not None:
+            cache.set(key, slug, PAGE_CACHE_TIMEOUT)
+    return slug
+
+
+def get_preview_images():
+    """Cached {hotel id: preview image URL}, refreshed when hotels or slides change"""
+    return cache.get_or_set(f'hotel:previews:{_generation()}', load_preview_images, PAGE_CACHE_TIMEOUT)
+
+
+def get_hotel_directory_page(after=None, limit=DIRECTORY_PAGE_SIZE, fields=DIRECTORY_FIELDS):
+    """Cached page of the active hotel directory, see load_hotel_directory_page"""
+    page = hashlib.md5(json.dumps([after, limit, fields]).encode(), usedforsecurity=False).hexdigest()
+    return cache.get_or_set(
+        f'hotel:directory:{_generation()}:{page}',
+        lambda: load_hotel_directory_page(
+            get_preview_images() if 'preview_image' in fields else {}, after, limit, fields,
+        ),
+        PAGE_CACHE_TIMEOUT,
+    )
+
+
+def get_comparison_version(slugs):
+    """Version stamp of a comparison, made of the page versions of its hotels"""
+    versions = [get_page_version(slug) for slug in slugs]
+    return {
+        'token': '|'.join(version['token'] if version else f'{slug}:' for slug, version in zip(slugs, versions)),
+        'last_modified': max((version['last_modified'] for version in versions if version), default=None),
+    }
+
+
+def get_comparison(slugs, version):
+    """Cached load_comparison() of a sorted set of slugs, reloaded when any of the hotels changes"""
+    key = 'hotel:compare:{}:{}'.format(
+        _generation(), hashlib.md5(','.join(slugs).encode(), usedforsecurity=False).hexdigest(),
+    )
+    entry = cache.get(key)
+    if entry and entry['token'] == version['token']:
+        return entry['hotels']
+    hotels = load_comparison(slugs, get_preview_images())
+    cache.set(key, {'token': version['token'], 'hotels': hotels}, PAGE_CACHE_TIMEOUT)
+    return hotels
+
+
+def _versioned(key, version, load):
+    """Cached ``load()``, loaded again once the hotel's page version changed"""
+    entry = cache.get(key)
+    if entry and entry['token'] == version['token']:
+        return entry['value']
+    value = load()
+    cache.set(key, {'token': version['token'], 'value': value}, PAGE_CACHE_TIMEOUT)
+    return value
+
+
+def get_blog_page(version, url, render):
+    """Cached body of a blog page at ``url``, ``render()`` again once the hotel's page version changed"""
+    page = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+    return _versioned(f'hotel:blog:{_generation()}:{version["hotel_id"]}:{page}', version, render)
+
+
+def get_page_version(slug):
+    """Cached version stamp of a hotel page, or None for an unknown slug"""
+    key = _version_key(_generation(), slug)
+    version = cache.get(key)
+    if version is None:
+        version = load_page_version(slug)
+        if version is not None:
+            cache.set(key, version, PAGE_CACHE_TIMEOUT)
+    return version
+
+
+def get_directory_version():
+    """Cached version stamp of the hotel list"""
+    key = _directory_version_key(_generation())
+    version = cache.get(key)
+    if version is None:
+        version = load_directory_version()
+        cache.set(key, version, PAGE_CACHE_TIMEOUT)
+    return version
+
+
+# Async variants for the ASGI views, the database is only hit on a cache miss
+
+async def aget_default_slug():
+    key = _default_slug_key(await _ageneration())
+    slug = await cache.aget(key)
+    if slug is None:
+        slug = await aload_default_slug()
+        if slug is not None:
+            await cache.aset(key, slug, PAGE_CACHE_TIMEOUT)
+    return slug
+
+
+async def aget_page_version(slug):
+    key = _version_key(await _ageneration(), slug)
+    version = await cache.aget(key)
+    if version is None:
+        version = await aload_page_version(slug)
+        if version is not None:
+            await cache.aset(key, version, PAGE_CACHE_TIMEOUT)
+    return version
+
+
+async def aget_directory_version():
+    key = _directory_version_key(await _ageneration())
+    version = await cache.aget(key)
+    if version is None:
+        version = await aload_directory_version()
+        await cache.aset(key, version, PAGE_CACHE_TIMEOUT)
+    return version
+
+
+async def aget_cached_page(slug, url, version):
+    entry = await cache.aget(_page_key(await _ageneration(), slug))
+    if entry and entry['token'] == version['token']:
+        return entry['pages'].get(url)
+    return None
+
+
+def conditional_validators(version, url):
+    """Strong ETag and Last-Modified timestamp for a page at ``url``"""
+    digest = hashlib.md5(f"{version['token']}|{url}".encode(), usedforsecurity=False).hexdigest()
+    last_modified = version['last_modified']
+    return f'"{digest}"', timegm(last_modified.utctimetuple()) if last_modified else None
+
+
+def get_cached_page(slug, url, version):
+    """Return the rendered home page body for a hotel slug and URL, or None
+
+    Bodies are stored with the version they were rendered from, so a page
+    rendered while an edit was being saved is never served for the new version.
+    """
+    entry = cache.get(_page_key(_generation(), slug))
+    if entry and entry['token'] == version['token']:
+        return entry['pages'].get(url)
+    return None
+
+
+def cache_page(slug, url, content, version):
+    """Store a rendered home page body for a hotel slug and URL"""
+    key = _page_key(_generation(), slug)
+    entry = cache.get(key)
+    if not entry or entry['token'] != version['token']:
+        entry = {'token': version['token'], 'pages': {}}
+    if url in entry['pages'] or len(entry['pages']) < MAX_PAGE_VARIANTS:
+        entry['pages'][url] = content
+        cache.set(key, entry, PAGE_CACHE_TIMEOUT)
+
+
+class SectionFragments:
+    """Cached HTML of a hotel's home page sections
+
+    Every section has its own version stamp, replaced when its content changes
+    (see invalidate_sections), and fragments are stored with the stamp they
+    were rendered under. Stamps and fragments of all sections are read in a
+    single cache round trip.
+    """
+
+    def __init__(self, hotel_id, sections):
+        self.hotel_id = hotel_id
+        self.generation = _generation()
+        version_keys = {section: _fragment_version_key(self.generation, hotel_id, section) for section in sections}
+        fragment_keys = {section: _fragment_key(self.generation, hotel_id, section) for section in sections}
+        found = cache.get_many([*version_keys.values(), *fragment_keys.values()])
+
+        self.versions, self.fragments = {}, {}
+        for section in sections:
+            version = found.get(version_keys[section])
+            if version is None:
+                cache.add(version_keys[section], time.time_ns(), None)
+                version = cache.get(version_keys[section])
+            self.versions[section] = version
+            entry = found.get(fragment_keys[section])
+            if entry and entry['version'] == version:
+                self.fragments[section] = entry['html']
+
+    @property
+    def missing(self):
+        """Sections that have to be rendered"""
+        return [section for section in self.versions if section not in self.fragments]
+
+    def get(self, section):
+        return self.fragments.get(section)
+
+    def store(self, section, html):
+        if section not in self.versions:
+            return
+        self.fragments[section] = html
+        cache.set(
+            _fragment_key(self.generation, self.hotel_id, section),
+            {'version': self.versions[section], 'html': html},
+            PAGE_CACHE_TIMEOUT,
+        )
+
+
+def invalidate_sections(hotel_id, sections):
+    """Outdate the cached fragments of some sections of a hotel's home page"""
+    generation = _generation()
+    version = time.time_ns()
+    cache.set_many({_fragment_version_key(generation, hotel_id, section): version for section in sections}, None)
+
+
+def invalidate_hotel_page(slug):
+    """Drop the cached pages and version stamp of a single hotel"""
+    generation = _generation()
+    cache.delete_many([_page_key(generation, slug), _version_key(generation, slug)])
+
+
+def invalidate_all_pages():
+    """Drop every cached hotel page by moving to a new generation"""
+    cache.set(PAGE_GENERATION_KEY, time.time_ns(), None)
@@ -0,0 +1,184 @@
+# hotel/client_state.py
+"""Visitor state kept in cookies: visits and preferences (the visitor cookie,
+see hotel/visitor.py), newsletter, consent, booking draft and comparison list
+
+ClientState reads the request cookies once and records every change, so any
+number of reads and writes can be answered with a single response (see
+views.state_api).
+"""
+import json
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+YEAR = 365 * 24 * 60 * 60
+MONTH = 30 * 24 * 60 * 60
+DAY = 24 * 60 * 60
+
+PREFERENCE_TYPES = ('theme', 'language', 'newsletter')
+CONSENT_TYPES = ('essential', 'analytics', 'marketing')
+BOOKING_FIELDS = ('check_in', 'check_out', 'guests')
+MAX_COMPARISON_HOTELS = 3
+
+
+class ClientState:
+    """Cookie backed state of one visitor, with the changes to send back"""
+
+    def __init__(self, request):
+        self.cookies = dict(request.COOKIES)
+        self.visitor = request.visitor
+        # name -> set_cookie() kwargs, or None to delete the cookie
+        self.changes = {}
+
+    def set(self, name, value, max_age, httponly=False):
+        self.cookies[name] = value
+        self.changes[name] = {'value': value, 'max_age': max_age, 'httponly': httponly, 'samesite': 'Lax'}
+
+    def delete(self, name):
+        self.cookies.pop(name, None)
+        self.changes[name] = None
+
+    def json_cookie(self, name, default):
+        try:
+            value = json.loads(self.cookies.get(name, ''))
+        except (json.JSONDecodeError, TypeError):
+            return default
+        return value if isinstance(value, type(default)) else default
+
+    def apply(self, response):
+        """Write the recorded cookie changes to ``response``"""
+        for name, cookie in self.changes.items():
+            if cookie is None:
+                response.delete_cookie(name, samesite='Lax')
+            else:
+                response.set_cookie(name, **cookie)
+        return response
+
+    # Reads
+
+    def user_data(self):
+        return {
+            **self.visitor.as_dict(),
+            'newsletter_subscribed': self.cookies.get('newsletter_subscribed') == 'true',
+        }
+
+    def consent(self):
+        consent = {
+            consent_type: self.cookies.get(f'cookie_consent_{consent_type}', 'false') == 'true'
+            for consent_type in CONSENT_TYPES
+        }
+        consent['given_at'] = self.cookies.get('cookie_consent_given')
+        return consent
+
+    def booking_draft(self):
+        """The saved booking form data, or None. Expired drafts are deleted"""
+        return self.load_booking_draft()[0]
+
+    def load_booking_draft(self):
+        """(data, expired) of the saved booking form data"""
+        booking = self.json_cookie('booking_form_data', {})
+        if not booking:
+            return None, False
+        try:
+            expires_at = datetime.fromisoformat(booking.get('expires_at', '').replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            expires_at = None
+        if expires_at is not None and timezone.now() > expires_at:
+            self.delete('booking_form_data')
+            return None, True
+        return booking, False
+
+    def comparison(self):
+        return self.json_cookie('comparison_list', [])
+
+    # Writes, raising ValueError for invalid input
+
+    def set_preference(self, params):
+        preference_type = params.get('type')
+        value = params.get('value')
+        if preference_type not in PREFERENCE_TYPES:
+            raise ValueError('Invalid preference type')
+        # None or '' resets a preference to its default
+        if value is not None and not isinstance(value, (str, bool) if preference_type == 'newsletter' else str):
+            raise ValueError('Invalid preference value')
+        if preference_type == 'newsletter':
+            self.set('newsletter_subscribed', 'true' if value in (True, 'true') else 'false', YEAR, httponly=True)
+        else:
+            self.visitor.set_preference(preference_type, value)
+        return {'type': preference_type, 'value': value}
+
+    def clear_preferences(self, params=None):
+        self.visitor.clear_preferences()
+        self.delete('newsletter_subscribed')
+        return {}
+
+    def update_comparison(self, params):
+        action = params.get('action')
+        hotel_slug = params.get('hotel_slug')
+        hotel_name = params.get('hotel_name')
+        if action in ('add', 'remove') and (not hotel_slug or not isinstance(hotel_slug, str)):
+            raise ValueError('Invalid hotel slug')
+        if hotel_name is not None and not isinstance(hotel_name, str):
+            raise ValueError('Invalid hotel name')
+        hotel_name = hotel_name or hotel_slug
+        comparison_list = self.comparison()
+
+        if action == 'add':
+            message = f'{hotel_name} is already in the comparison list'
+            if not any(isinstance(h, dict) and h.get('slug') == hotel_slug for h in comparison_list):
+                comparison_list.append({'slug': hotel_slug, 'name': hotel_name, 'added_at': timezone.now().isoformat()})
+                comparison_list = comparison_list[-MAX_COMPARISON_HOTELS:]
+                message = f'Added {hotel_name} to comparison list'
+        elif action == 'remove':
+            comparison_list = [h for h in comparison_list if not isinstance(h, dict) or h.get('slug') != hotel_slug]
+            message = f'Removed {hotel_name} from comparison list'
+        elif action == 'clear':
+            comparison_list = []
+            message = 'Cleared comparison list'
+        else:
+            raise ValueError('Invalid action')
+
+        self.set('comparison_list', json.dumps(comparison_list), MONTH)
+        return {'action': action, 'comparison_list': comparison_list, 'message': message}
+
+    def save_booking(self, params):
+        booking = params.get('data')
+        if not isinstance(booking, dict):
+            raise ValueError('Invalid booking data')
+        if not all(field in booking for field in BOOKING_FIELDS):
+            raise ValueError('Missing required fields')
+
+        now = timezone.now()
+        booking = {**booking, 'saved_at': now.isoformat(), 'expires_at': (now + timedelta(days=1)).isoformat()}
+        self.set('booking_form_data', json.dumps(booking), DAY)
+        return {'message': 'Booking data saved', 'expires_in': '24 hours'}
+
+    def set_consent(self, params):
+        consent_type = params.get('type', 'all')
+        granted = params.get('granted', True) in (True, 'true')
+        if consent_type != 'all' and consent_type not in CONSENT_TYPES:
+            raise ValueError('Invalid consent type')
+
+        for name in CONSENT_TYPES:
+            if consent_type in ('all', name):
+                self.set(f'cookie_consent_{name}', 'true' if granted else 'false', YEAR, httponly=True)
+        if consent_type == 'all':
+            self.set('cookie_consent_given', timezone.now().isoformat(), YEAR, httponly=True)
+        return {'consent_type': consent_type, 'granted': granted}
+
+
+# Operations of a state batch, see views.state_api
+STATE_READS = {
+    'user': ClientState.user_data,
+    'consent': ClientState.consent,
+    'booking': ClientState.booking_draft,
+    'comparison': ClientState.comparison,
+}
+STATE_WRITES = {
+    'set_preference': ClientState.set_preference,
+    'clear_preferences': ClientState.clear_preferences,
+    'comparison': ClientState.update_comparison,
+    'save_booking': ClientState.save_booking,
+    'consent': ClientState.set_consent,
+}
+MAX_STATE_WRITES = 20
@@ -0,0 +1,148 @@
+# hotel/db.py
+"""Production database profile: SQLite pragmas and read replicas
+
+With HOTEL_DB_PRODUCTION on, every SQLite connection is switched to WAL
+journaling with the SQLITE_PRAGMAS below, so readers no longer wait for the
+admin's writes or block them.
+
+ReplicaRouter sends the hotel reads of public GET requests (see
+replica_reads_middleware) to the replicas in HOTEL_DB_REPLICAS, everything
+else, writes included, to the primary. A replica is only read while it is
+fresh: its ReplicaHeartbeat, written on the primary and carried over with
+the data, must be newer than the last write to the hotel tables and no
+older than HOTEL_REPLICA_MAX_LAG seconds. Otherwise reads fall back to the
+primary, so an admin edit shows (and is cached) at once.
+
+Replicas that are SQLite files are local copies of the primary refreshed by
+`manage.py refresh_replicas`; for any other database the command only writes
+the heartbeat and replication carries it over.
+"""
+import contextvars
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.utils import timezone
+
+# Applied to every SQLite connection of the production profile
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),  # Durable at checkpoints, safe against corruption with WAL
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -64 * 1024),  # In KiB when negative: 64 MiB per connection
+    ('temp_store', 'MEMORY'),
+)
+
+# Read and written on the primary only, and writes to them leave the replicas
+# fresh: live availability, lazily compiled rates, analytics and the heartbeat
+PRIMARY_MODELS = {
+    'hotel.roominventory', 'hotel.roomhold', 'hotel.ratecalendar', 'hotel.pageview', 'hotel.dailyhotelstats',
+    'hotel.replicaheartbeat',
+}
+
+LAST_WRITE_KEY = 'hotel:db:last-write'
+
+# Seconds a replica's heartbeat is remembered by a process before it is read again
+HEARTBEAT_CHECK_SECONDS = 5
+
+# Set to a dict for requests whose hotel reads may go to a replica; the router
+# keeps the alias it picks there, so a request reads one consistent copy
+replica_reads = contextvars.ContextVar('hotel_replica_reads', default=None)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver tuning SQLite connections, see SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite' or not settings.HOTEL_DB_PRODUCTION:
+        return
+    with connection.cursor() as cursor:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def replica_aliases():
+    return settings.HOTEL_DB_REPLICAS
+
+
+def note_write():
+    """Mark the replicas stale until their next refresh"""
+    cache.set(LAST_WRITE_KEY, time.time(), None)
+
+
+def read_heartbeat(alias):
+    """Time of the primary's data in the database, or None when it has no heartbeat"""
+    from .models import ReplicaHeartbeat
+
+    try:
+        written_at = ReplicaHeartbeat.objects.using(alias).values_list('written_at', flat=True).first()
+    except DatabaseError:
+        # A replica never refreshed has no table
+        return None
+    return written_at.timestamp() if written_at else None
+
+
+def write_heartbeat():
+    from .models import ReplicaHeartbeat
+
+    ReplicaHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(pk=1, defaults={'written_at': timezone.now()})
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the present, None when it has no heartbeat"""
+    heartbeat = read_heartbeat(alias)
+    return None if heartbeat is None else max(time.time() - heartbeat, 0.0)
+
+
+def refresh_sqlite_replica(alias):
+    """Copy the primary into a SQLite replica in one step, its readers see either copy whole"""
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    target = sqlite3.connect(connections[alias].settings_dict['NAME'], timeout=60)
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
+
+
+class ReplicaRouter:
+    """Routes the hotel reads of public requests to a fresh replica, see the module docstring"""
+
+    def __init__(self):
+        # alias -> (checked at, heartbeat)
+        self._heartbeats = {}
+
+    def _fresh(self, alias, now):
+        checked = self._heartbeats.get(alias)
+        if checked is None or now - checked[0] > HEARTBEAT_CHECK_SECONDS:
+            checked = self._heartbeats[alias] = (now, read_heartbeat(alias))
+        heartbeat = checked[1]
+        if heartbeat is None or now - heartbeat > settings.HOTEL_REPLICA_MAX_LAG:
+            return False
+        last_write = cache.get(LAST_WRITE_KEY)
+        return last_write is None or heartbeat >= last_write
+
+    def db_for_read(self, model, **hints):
+        request = replica_reads.get()
+        if request is None or model._meta.app_label != 'hotel' or model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        alias = request.get('alias')
+        if alias is None:
+            now = time.time()
+            fresh = [alias for alias in replica_aliases() if self._fresh(alias, now)]
+            alias = request['alias'] = random.choice(fresh) if fresh else DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'hotel' and model._meta.label_lower not in PRIMARY_MODELS:
+            transaction.on_commit(note_write, using=DEFAULT_DB_ALIAS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema with the data
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,390 @@
+# hotel/loaders.py
+import asyncio
+import base64
+import binascii
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db import connection, close_old_connections
+from django.db.models import Prefetch, Count, Exists, Max, OuterRef, Q
+
+from .models import Hotel, CarouselSlide, Card, RoomType, SectionContent, FAQ, BlogPost
+
+logger = logging.getLogger(__name__)
+
+# Queries needed to assemble a home page: the hotel (with main info), one per
+# prefetched child table and, on a cold cache, the hotel directory for the navigation.
+HOME_QUERY_BUDGET = 9
+
+# Hotel directory (locations dropdown, hotel list page and /api/hotels/)
+DIRECTORY_PAGE_SIZE = 20
+MAX_DIRECTORY_PAGE_SIZE = 100
+DIRECTORY_FIELDS = ('slug', 'name', 'tagline', 'preview_image')
+HOTEL_API_FIELDS = ('slug', 'name', 'tagline', 'address', 'phone', 'email', 'preview_image')
+
+# Worker threads running the concurrent queries of the async views, each uses
+# its own database connection
+ASYNC_DB_THREADS = 16
+_db_executor = ThreadPoolExecutor(max_workers=ASYNC_DB_THREADS, thread_name_prefix='hotel-db')
+
+# Posts per page of a hotel's blog
+BLOG_PAGE_SIZE = 12
+
+# Home page sections, each cached as its own fragment (see cache.SectionFragments)
+HOME_SECTIONS = (
+    'carousel', 'main_info', 'general_cards', 'gallery', 'rooms_and_suites', 'wedding',
+    'banquet', 'restaurant', 'special_offers', 'faq', 'luxury_dining', 'blogs',
+)
+
+# Sections rendered into the home page response, the cached_section ones of
+# hotel/index.html. Its lazy_section ones are fetched from /<hotel>/section/<name>/
+# as they near the viewport (static/js/sections.js).
+EAGER_SECTIONS = ('carousel', 'main_info', 'general_cards')
+
+# Sections showing the cards of a category / a SectionContent type
+CARD_SECTIONS = {'gallery': 'gallery', 'general': 'general_cards', 'special_offers': 'special_offers'}
+CONTENT_SECTIONS = {'wedding': 'wedding', 'banquet': 'banquet', 'restaurant': 'restaurant', 'faq': 'faq'}
+
+
+def home_content_querysets(sections=HOME_SECTIONS):
+    """{attribute: (relation, queryset, limit)} of the hotel content shown in ``sections``"""
+    content = {}
+    if 'carousel' in sections:
+        content['active_slides'] = ('carousel_slides', CarouselSlide.objects.filter(is_active=True), None)
+    categories = [category for category, section in CARD_SECTIONS.items() if section in sections]
+    if categories:
+        # In card_hotel_category_idx order, cards are split by category anyway
+        content['active_cards'] = (
+            'cards', Card.objects.filter(is_active=True, category__in=categories).order_by('category', 'order'), None,
+        )
+    if 'rooms_and_suites' in sections:
+        content['available_rooms'] = ('room_types', RoomType.objects.filter(is_available=True), None)
+    section_types = [section_type for section_type, section in CONTENT_SECTIONS.items() if section in sections]
+    if section_types:
+        content['active_sections'] = ('sections', SectionContent.objects.filter(is_active=True, section_type__in=section_types), None)
+    if 'faq' in sections:
+        content['active_faqs'] = ('faqs', FAQ.objects.filter(is_active=True), None)
+    if 'blogs' in sections:
+        content['latest_posts'] = (
+            'blog_posts', BlogPost.objects.filter(is_published=True).defer('content', 'content_html'), 3,
+        )
+    return content
+
+
+def hotel_page_queryset(sections=HOME_SECTIONS):
+    """Active hotels with the home page content of ``sections`` prefetched"""
+    hotels = Hotel.objects.filter(is_active=True)
+    if 'main_info' in sections:
+        hotels = hotels.select_related('main_info')
+    return hotels.prefetch_related(*(
+        Prefetch(relation, queryset=queryset[:limit], to_attr=attribute)
+        for attribute, (relation, queryset, limit) in home_content_querysets(sections).items()
+    ))
+
+
+def build_home_context(hotel, sections=HOME_SECTIONS):
+    """Split the prefetched content of a hotel into the home template context
+
+    Only ``sections`` are filled in, the others are served from their cached fragments.
+    """
+    cards = defaultdict(list)
+    for card in getattr(hotel, 'active_cards', ()):
+        cards[card.category].append(card)
+
+    content = {section.section_type: section for section in getattr(hotel, 'active_sections', ())}
+
+    return {
+        'hotel': hotel,
+        'carousel_slides': getattr(hotel, 'active_slides', []),
+        'main_info': getattr(hotel, 'main_info', None) if 'main_info' in sections else None,
+        'gallery_cards': cards['gallery'],
+        'general_cards': cards['general'],
+        'special_offers': cards['special_offers'],
+        'room_types': getattr(hotel, 'available_rooms', []),
+        'wedding_section': content.get('wedding'),
+        'banquet_section': content.get('banquet'),
+        'restaurant_section': content.get('restaurant'),
+        'faq_section': content.get('faq'),
+        'faqs': getattr(hotel, 'active_faqs', []),
+        'blog_posts': getattr(hotel, 'latest_posts', []),
+    }
+
+
+def load_preview_images():
+    """Preview image URL of every hotel: its thumbnail or first active slide"""
+    thumbnail_storage = Hotel._meta.get_field('thumbnail').storage
+    slide_storage = CarouselSlide._meta.get_field('image').storage
+
+    previews = {}
+    for hotel_id, thumbnail in Hotel.objects.values_list('id', 'thumbnail'):
+        previews[hotel_id] = thumbnail_storage.url(thumbnail) if thumbnail else None
+
+    without_thumbnail = [hotel_id for hotel_id, url in previews.items() if url is None]
+    if without_thumbnail:
+        slides = (CarouselSlide.objects.filter(hotel_id__in=without_thumbnail, is_active=True)
+                  .order_by('hotel_id', 'order').values_list('hotel_id', 'image'))
+        for hotel_id, image in slides:
+            if previews[hotel_id] is None:
+                previews[hotel_id] = slide_storage.url(image)
+    return previews
+
+
+def load_comparison(slugs, previews):
+    """{slug: side by side projection} of the active hotels among ``slugs``
+
+    Four queries whatever the number of hotels: the hotels with their FAQ
+    count and whether they blog, then their rooms, sections and cards.
+    """
+    hotels = Hotel.objects.filter(slug__in=slugs, is_active=True).annotate(
+        faq_count=Count('faqs', filter=Q(faqs__is_active=True)),
+        has_blog=Exists(BlogPost.objects.filter(hotel=OuterRef('pk'), is_published=True)),
+    ).only('slug', 'name', 'tagline', 'address', 'phone', 'email').prefetch_related(
+        Prefetch('room_types', queryset=RoomType.objects.filter(is_available=True).only(
+            'hotel_id', 'name', 'price_per_night', 'order',
+        ), to_attr='available_rooms'),
+        Prefetch('sections', queryset=SectionContent.objects.filter(is_active=True).only(
+            'hotel_id', 'section_type',
+        ), to_attr='active_sections'),
+        Prefetch('cards', queryset=Card.objects.filter(is_active=True).only('hotel_id', 'category'), to_attr='active_cards'),
+    )
+
+    comparison = {}
+    for hotel in hotels:
+        sections = {CARD_SECTIONS[card.category] for card in hotel.active_cards if card.category in CARD_SECTIONS}
+        sections.update(CONTENT_SECTIONS[section.section_type] for section in hotel.active_sections
+                        if section.section_type in CONTENT_SECTIONS)
+        if hotel.available_rooms:
+            sections.add('rooms_and_suites')
+        if hotel.faq_count:
+            sections.add('faq')
+        if hotel.has_blog:
+            sections.add('blogs')
+
+        prices = [room.price_per_night for room in hotel.available_rooms if room.price_per_night is not None]
+        comparison[hotel.slug] = {
+            'slug': hotel.slug,
+            'name': hotel.name,
+            'tagline': hotel.tagline,
+            'preview_image': previews.get(hotel.pk),
+            'contact': {'address': hotel.address, 'phone': hotel.phone, 'email': hotel.email},
+            'rooms': [
+                {'name': room.name, 'price_per_night': str(room.price_per_night) if room.price_per_night is not None else None}
+                for room in hotel.available_rooms
+            ],
+            'price_from': str(min(prices)) if prices else None,
+            'sections': [section for section in HOME_SECTIONS if section in sections],
+            'faq_count': hotel.faq_count,
+        }
+    return comparison
+
+
+def encode_cursor(name, pk):
+    """Opaque keyset cursor pointing just after the hotel (name, pk)"""
+    return base64.urlsafe_b64encode(json.dumps([name, pk]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(name, pk) from a cursor, raises ValueError when it is malformed"""
+    try:
+        name, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if not isinstance(name, str) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return name, pk
+
+
+def load_hotel_directory_page(previews, after=None, limit=DIRECTORY_PAGE_SIZE, fields=DIRECTORY_FIELDS):
+    """One page of active hotels ordered by (name, id), selecting only ``fields``
+
+    Keyset pagination: ``after`` is the (name, id) of the last hotel of the
+    previous page, so deep pages cost the same as the first one.
+    """
+    hotels = Hotel.objects.filter(is_active=True).order_by('name', 'id')
+    if after:
+        name, pk = after
+        hotels = hotels.filter(Q(name__gt=name) | Q(name=name, id__gt=pk))
+
+    columns = dict.fromkeys(['id', 'name', *(field for field in fields if field != 'preview_image')])
+    rows = list(hotels.values(*columns)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['name'], rows[-1]['id'])
+
+    results = [
+        {field: previews.get(row['id']) if field == 'preview_image' else row[field] for field in fields}
+        for row in rows
+    ]
+    return {'results': results, 'next_cursor': next_cursor}
+
+
+def encode_post_cursor(post):
+    """Opaque keyset cursor pointing just after a blog post"""
+    return encode_cursor(post.published_date.isoformat(), post.pk)
+
+
+def decode_post_cursor(cursor):
+    """(published date, pk) from a blog cursor, raises ValueError when it is malformed"""
+    published, pk = decode_cursor(cursor)
+    return date.fromisoformat(published), pk
+
+
+def load_blog_index(hotel_id, after=None, category=None, limit=BLOG_PAGE_SIZE):
+    """A hotel, one page of its published posts and their category facet
+
+    Posts are ordered by (published_date, id) descending and paged by keyset,
+    ``after`` being the (published_date, id) of the last post of the previous
+    page. Both the pages and the facet counts are read from the partial
+    indexes of published posts, so deep pages cost the same as the first one.
+    """
+    published_posts = BlogPost.objects.filter(hotel_id=hotel_id, is_published=True)
+    posts = published_posts.defer('content', 'content_html')
+    if category:
+        posts = posts.filter(category=category)
+    if after:
+        published, pk = after
+        # A date range the index seeks to, minus the posts of that date already shown
+        posts = posts.filter(published_date__lte=published).exclude(published_date=published, id__gte=pk)
+    posts = list(posts[:limit + 1])
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_post_cursor(posts[-1])
+
+    return {
+        'hotel': Hotel.objects.get(pk=hotel_id),
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'categories': list(
+            published_posts.order_by('category').values('category').annotate(count=Count('id')).values_list('category', 'count')
+        ),
+    }
+
+
+def load_blog_post(hotel_id, post_id):
+    """A published post of a hotel with its hotel, or None"""
+    return BlogPost.objects.select_related('hotel').filter(hotel_id=hotel_id, pk=post_id, is_published=True).first()
+
+
+def load_default_slug():
+    """Slug of the hotel shown to visitors without a slug or preference"""
+    return Hotel.objects.filter(is_active=True).order_by('pk').values_list('slug', flat=True).first()
+
+
+def _directory_version(directory):
+    return {
+        'token': f"{directory['count']}:{directory['updated'].isoformat() if directory['updated'] else ''}",
+        'last_modified': directory['updated'],
+    }
+
+
+def _page_version(slug, own, directory):
+    hotel_id, content_version, content_updated_at = own
+    return {
+        'hotel_id': hotel_id,
+        'token': f"{slug}:{content_version}:{content_updated_at.isoformat()}:{directory['token']}",
+        'last_modified': max(content_updated_at, directory['last_modified']),
+    }
+
+
+def _directory_stats():
+    return Hotel.objects.aggregate(count=Count('id'), updated=Max('content_updated_at'))
+
+
+def _page_stamp(slug):
+    return Hotel.objects.filter(slug=slug, is_active=True).values_list('id', 'content_version', 'content_updated_at')
+
+
+def load_directory_version():
+    """Version stamp of the hotel list, shown in the dropdown of every page"""
+    return _directory_version(_directory_stats())
+
+
+def load_page_version(slug):
+    """Version stamp of an active hotel's page, or None for an unknown slug"""
+    own = _page_stamp(slug).first()
+    if own is None:
+        return None
+    return _page_version(slug, own, load_directory_version())
+
+
+# Async variants for the ASGI views (see async_views.py)
+
+async def aload_default_slug():
+    return await Hotel.objects.filter(is_active=True).order_by('pk').values_list('slug', flat=True).afirst()
+
+
+async def aload_directory_version():
+    return _directory_version(await Hotel.objects.aaggregate(count=Count('id'), updated=Max('content_updated_at')))
+
+
+async def aload_page_version(slug):
+    own = await _page_stamp(slug).afirst()
+    if own is None:
+        return None
+    return _page_version(slug, own, await aload_directory_version())
+
+
+def _in_own_connection(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def in_worker_thread(func, *args, **kwargs):
+    """Run a blocking database call in a worker thread with its own connection
+
+    Django's async ORM runs every query of a request on one shared thread, so
+    awaiting several querysets together still runs them one after another.
+    Calls made through here run concurrently.
+    """
+    return await sync_to_async(_in_own_connection, thread_sensitive=False, executor=_db_executor)(func, *args, **kwargs)
+
+
+async def aload_home_hotel(hotel_id, sections=HOME_SECTIONS):
+    """Async hotel_page_queryset().get(pk=hotel_id), None when it is gone
+
+    The hotel row and every content list are loaded concurrently, so the
+    load takes as long as the slowest query instead of the sum of them.
+    """
+    hotels = Hotel.objects.filter(is_active=True)
+    if 'main_info' in sections:
+        hotels = hotels.select_related('main_info')
+    content = home_content_querysets(sections)
+
+    hotel, *lists = await asyncio.gather(
+        hotels.filter(pk=hotel_id).afirst(),
+        *(
+            in_worker_thread(list, queryset.filter(hotel_id=hotel_id)[:limit])
+            for relation, queryset, limit in content.values()
+        ),
+    )
+    if hotel is not None:
+        for attribute, items in zip(content, lists):
+            setattr(hotel, attribute, items)
+    return hotel
+
+
+@contextmanager
+def query_budget(limit, label):
+    """Log a warning when the wrapped block runs more than ``limit`` queries"""
+    executed = [0]
+
+    def counter(execute, sql, params, many, context):
+        executed[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        yield
+    if executed[0] > limit:
+        logger.warning('%s ran %d queries (budget %d)', label, executed[0], limit)
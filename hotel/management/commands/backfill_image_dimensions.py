@@ -0,0 +1,68 @@
+# hotel/management/commands/backfill_image_dimensions.py
+from django.core.management.base import BaseCommand
+from django.db.models import ImageField, Q
+from PIL import Image
+
+from hotel.signals import IMAGE_MODELS
+
+
+def read_dimensions(storage, name):
+    """Read (width, height) from the image header without decoding pixels"""
+    with storage.open(name, 'rb') as f:
+        with Image.open(f) as img:
+            return img.size
+
+
+class Command(BaseCommand):
+    help = 'Stores width/height of existing images so templates never open image files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--force', action='store_true', help='Re-read dimensions that are already stored')
+
+    def handle(self, *args, **options):
+        for model in IMAGE_MODELS:
+            image_fields = [
+                field for field in model._meta.fields
+                if isinstance(field, ImageField) and field.width_field and field.height_field
+            ]
+            if not image_fields:
+                continue
+
+            # Only rows with an image whose dimensions are missing
+            pending = Q()
+            for field in image_fields:
+                has_image = ~Q(**{field.name: ''}) & Q(**{f'{field.name}__isnull': False})
+                if options['force']:
+                    pending |= has_image
+                else:
+                    pending |= has_image & Q(**{f'{field.width_field}__isnull': True})
+
+            update_fields = [name for field in image_fields for name in (field.width_field, field.height_field)]
+            batch, updated, failed = [], 0, 0
+            # Plain values rather than instances: loading an instance with empty
+            # dimension fields makes Django read every image in full.
+            rows = model.objects.filter(pending).values('pk', *[field.name for field in image_fields])
+            for row in rows.iterator(chunk_size=options['batch_size']):
+                instance = model(pk=row['pk'])
+                for field in image_fields:
+                    if not row[field.name]:
+                        continue
+                    try:
+                        width, height = read_dimensions(field.storage, row[field.name])
+                    except (OSError, ValueError) as exc:
+                        failed += 1
+                        self.stderr.write(self.style.WARNING(f'{model.__name__} {row["pk"]} {field.name}: {exc}'))
+                        continue
+                    setattr(instance, field.width_field, width)
+                    setattr(instance, field.height_field, height)
+                batch.append(instance)
+                if len(batch) >= options['batch_size']:
+                    updated += model.objects.bulk_update(batch, update_fields)
+                    batch = []
+            if batch:
+                updated += model.objects.bulk_update(batch, update_fields)
+
+            self.stdout.write(f'{model.__name__}: {updated} rows updated, {failed} images unreadable')
+
+        self.stdout.write(self.style.SUCCESS('Image dimensions backfilled'))
@@ -0,0 +1,115 @@
+# hotel/management/commands/benchmark.py
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from hotel.analytics import page_views
+from hotel.benchmark import (
+    DATASET, LoadServer, benchmark_database, benchmark_targets, compare_results, generate_dataset, run_http_load,
+    run_test_client,
+)
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the pages and read APIs against a generated dataset in a throwaway database: '
+            'throughput, p50/p95/p99 latency, queries per request and response bytes, written as JSON')
+
+    def add_arguments(self, parser):
+        for name, default in DATASET.items():
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=f'{"Hotels" if name == "hotels" else f"{name.capitalize()} per hotel"} (default {default})')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint and client')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests first, filling the caches')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads of the HTTP load')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only this endpoint (repeatable)')
+        parser.add_argument('--no-http', action='store_true', help='Only drive the endpoints through the test client')
+        parser.add_argument('--output', help='JSON file for the results (default benchmark-<time>.json)')
+        parser.add_argument('--baseline', help='Results of an earlier run to compare with')
+        parser.add_argument('--tolerance', type=float, default=10, help='p95 increase in percent counted as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+
+        # The dataset goes in a database of its own, removed afterwards
+        with benchmark_database():
+            try:
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver', '127.0.0.1']):
+                    results = self.run_benchmarks(options)
+            finally:
+                page_views.flush()
+
+        output = options['output'] or f'benchmark-{timezone.now():%Y%m%d-%H%M%S}.json'
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+        self.report(results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if baseline:
+            regressions = self.report_changes(compare_results(baseline, results, options['tolerance']))
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{regressions} endpoints regressed by more than {options["tolerance"]}% at p95')
+
+    def run_benchmarks(self, options):
+        self.stdout.write('Generating the dataset')
+        created = generate_dataset(*(options[name] for name in DATASET))
+
+        targets = benchmark_targets()
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - set(targets)
+            if unknown:
+                raise CommandError(f'Unknown endpoints {", ".join(sorted(unknown))}, choose from {", ".join(targets)}')
+            targets = {name: paths for name, paths in targets.items() if name in options['endpoints']}
+
+        runs = []
+        for endpoint, paths in targets.items():
+            self.stdout.write(f'Test client: {endpoint}')
+            runs.append(run_test_client(endpoint, paths, options['requests'], options['warmup']))
+        if not options['no_http']:
+            with LoadServer() as server:
+                for endpoint, paths in targets.items():
+                    self.stdout.write(f'HTTP x{options["concurrency"]}: {endpoint}')
+                    runs.append(run_http_load(
+                        server, endpoint, paths, options['requests'], options['concurrency'], options['warmup'],
+                    ))
+
+        return {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'debug': settings.DEBUG,
+            'database': connection.vendor,
+            'dataset': {**{name: options[name] for name in DATASET}, 'rows': created},
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'concurrency': options['concurrency'],
+            'results': runs,
+        }
+
+    def report(self, results):
+        self.stdout.write(f'{"endpoint":<22}{"client":<13}{"req/s":>9}{"p50":>9}{"p95":>9}{"p99":>9}'
+                          f'{"queries":>9}{"bytes":>9}{"errors":>8}')
+        for run in results['results']:
+            latency = run['latency_ms']
+            self.stdout.write(
+                f'{run["endpoint"]:<22}{run["client"]:<13}{run["throughput_rps"] or 0:>9.1f}'
+                f'{latency["p50"]:>9.2f}{latency["p95"]:>9.2f}{latency["p99"]:>9.2f}'
+                f'{run["queries_per_request"] or 0:>9.2f}{run["bytes_per_response"] or 0:>9}{run["errors"]:>8}'
+            )
+
+    def report_changes(self, changes):
+        regressions = 0
+        for endpoint, client, p95, throughput, regressed in changes:
+            line = f'{endpoint:<22}{client:<13}p95 {p95:+.1f}%  throughput {throughput:+.1f}%'
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+            regressions += regressed
+        return regressions
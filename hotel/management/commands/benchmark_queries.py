@@ -0,0 +1,45 @@
+# hotel/management/commands/benchmark_queries.py
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from hotel.benchmark import (
+    SCALE_DATASET, benchmark_database, dropped_indexes, generate_scale_dataset, home_query_plans,
+)
+from hotel.models import Hotel
+
+
+class Command(BaseCommand):
+    help = ('Shows the query plans and timings of the home page content queries on a large generated portfolio '
+            '(10,000 hotels and a million cards by default), without and with the content indexes')
+
+    def add_arguments(self, parser):
+        for name, default in SCALE_DATASET.items():
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=f'{"Hotels" if name == "hotels" else f"{name.capitalize()} per hotel"} (default {default})')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs of each query to time')
+        parser.add_argument('--output', help='JSON file for the plans and timings')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            started = time.monotonic()
+            generate_scale_dataset(*(options[name] for name in SCALE_DATASET))
+            self.stdout.write(f'Generated {options["hotels"]} hotels in {time.monotonic() - started:.0f}s')
+
+            # A hotel in the middle of the tables
+            hotel_id = Hotel.objects.order_by('pk').values_list('pk', flat=True)[options['hotels'] // 2]
+            with dropped_indexes():
+                before = home_query_plans(hotel_id, options['repeat'])
+            after = home_query_plans(hotel_id, options['repeat'])
+
+        for old, new in zip(before, after):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{new["table"]}: {old["mean_ms"]:.3f}ms -> {new["mean_ms"]:.3f}ms'))
+            self.stdout.write('  without: ' + ' | '.join(old['plan']))
+            self.stdout.write('  with:    ' + ' | '.join(new['plan']))
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({'dataset': {name: options[name] for name in SCALE_DATASET},
+                           'without_indexes': before, 'with_indexes': after}, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
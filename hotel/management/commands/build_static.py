@@ -0,0 +1,88 @@
+# hotel/management/commands/build_static.py
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+# Inline blocks above this size belong in a static file. JSON blocks (structured
+# data, json_script) are page data and stay inline.
+INLINE_LIMIT = 1024
+INLINE_BLOCK = re.compile(r'<(script|style)\b([^>]*)>(.*?)</\1>', re.S | re.I)
+
+
+def project_templates():
+    """Template files of this project (third-party apps are skipped)"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for engine in engines.all():
+        for directory in getattr(engine, 'template_dirs', ()):
+            directory = Path(directory).resolve()
+            if base_dir not in directory.parents:
+                continue
+            for path in sorted(directory.rglob('*.html')):
+                yield path
+
+
+def inline_blocks(path):
+    """(line, tag, size) of the inline <script>/<style> blocks of a template"""
+    text = path.read_text()
+    for match in INLINE_BLOCK.finditer(text):
+        tag, attributes, body = match.groups()
+        if tag.lower() == 'script' and ('src=' in attributes or 'json' in attributes):
+            continue
+        yield text.count('\n', 0, match.start()) + 1, tag.lower(), len(body.encode())
+
+
+class Command(BaseCommand):
+    help = ('Builds static files for production: minified, content-hashed and '
+            'precompressed (.gz/.br) in STATIC_ROOT')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Empty STATIC_ROOT first')
+        parser.add_argument('--strict', action='store_true',
+                            help=f'Fail when a template has an inline block over {INLINE_LIMIT} bytes')
+
+    def handle(self, *args, **options):
+        oversized = []
+        for path in project_templates():
+            for line, tag, size in inline_blocks(path):
+                if size > INLINE_LIMIT:
+                    oversized.append(f'{path.relative_to(settings.BASE_DIR)}:{line} inline <{tag}> of {size} bytes')
+        for message in oversized:
+            self.stderr.write(self.style.WARNING(f'{message}, move it to a static file'))
+        if oversized and options['strict']:
+            raise CommandError(f'{len(oversized)} oversized inline blocks')
+
+        call_command('collectstatic', interactive=False, clear=options['clear'], verbosity=options['verbosity'])
+
+        self.report(options['verbosity'])
+
+    def report(self, verbosity):
+        """Sizes of the hashed CSS and JS files as served"""
+        totals = {}
+        for name, hashed_name in sorted(staticfiles_storage.hashed_files.items()):
+            extension = os.path.splitext(name)[1]
+            if extension not in ('.css', '.js') or name.startswith('admin/'):
+                continue
+            sizes = [staticfiles_storage.size(hashed_name)] + [
+                staticfiles_storage.size(hashed_name + suffix) if staticfiles_storage.exists(hashed_name + suffix) else None
+                for suffix in ('.gz', '.br')
+            ]
+            if verbosity > 1:
+                self.stdout.write(f'{hashed_name}: {self.sizes(sizes)}')
+            total = totals.setdefault(extension, [0, 0, 0])
+            for i, size in enumerate(sizes):
+                total[i] += size if size is not None else sizes[0]
+
+        for extension, sizes in totals.items():
+            self.stdout.write(f'{extension[1:].upper()} total: {self.sizes(sizes)}')
+        self.stdout.write(self.style.SUCCESS(f'Static files built in {settings.STATIC_ROOT}'))
+
+    @staticmethod
+    def sizes(sizes):
+        labels = ('minified', 'gzip', 'brotli')
+        return ', '.join(f'{label} {size / 1024:.1f} KB' for label, size in zip(labels, sizes) if size is not None)
@@ -0,0 +1,29 @@
+# hotel/management/commands/compile_rates.py
+from django.core.management.base import BaseCommand
+
+from hotel.models import RoomType
+from hotel.rates import RATE_DAYS, compile_calendar, invalidate_hotel_rates
+
+
+class Command(BaseCommand):
+    help = (f'Moves the rate calendars of all room types to start today, compiling the nights new to '
+            f'the {RATE_DAYS} night window. Run it daily so no request has to')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Compile every night, not only the new ones')
+        parser.add_argument('--hotel', help='Only the room types of this hotel slug')
+
+    def handle(self, *args, **options):
+        room_types = RoomType.objects.select_related('hotel')
+        if options['hotel']:
+            room_types = room_types.filter(hotel__slug=options['hotel'])
+
+        compiled = 0
+        slugs = set()
+        for room_type in room_types.iterator():
+            compile_calendar(room_type, None if options['full'] else ())
+            slugs.add(room_type.hotel.slug)
+            compiled += 1
+        for slug in slugs:
+            invalidate_hotel_rates(slug)
+        self.stdout.write(self.style.SUCCESS(f'Compiled the rates of {compiled} room types'))
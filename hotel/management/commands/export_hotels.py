@@ -0,0 +1,24 @@
+# hotel/management/commands/export_hotels.py
+from django.core.management.base import BaseCommand
+
+from hotel.bundles import MEDIA_WORKERS, export_bundle
+
+
+class Command(BaseCommand):
+    help = 'Exports hotels and all their content to a bundle directory (see hotel/bundles.py) for import_hotels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundle', help='Directory to write, created when missing')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+        parser.add_argument('--hotel', action='append', dest='hotels', help='Only this hotel slug (repeatable)')
+        parser.add_argument('--no-media', action='store_true', help='Do not copy the media files')
+        parser.add_argument('--workers', type=int, default=MEDIA_WORKERS, help='Threads copying media files')
+
+    def handle(self, *args, **options):
+        counts, copied, errors = export_bundle(
+            options['bundle'], options['format'], options['hotels'], not options['no_media'], options['workers'],
+        )
+        for error in errors:
+            self.stderr.write(self.style.WARNING(f'Media not copied: {error}'))
+        rows = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Exported {rows} and {copied} media files to {options["bundle"]}'))
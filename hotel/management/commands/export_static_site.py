@@ -0,0 +1,40 @@
+# hotel/management/commands/export_static_site.py
+import os
+import time
+
+from django.core.exceptions import DisallowedHost
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel.static_export import export_site
+
+
+class Command(BaseCommand):
+    help = ('Prerenders the page of every active hotel and the hotel list to index.html files with .gz/.br '
+            'siblings for a web server to serve directly. Only pages that changed since the last export '
+            'are rendered again')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory of the exported pages, the web server document root for them')
+        parser.add_argument('--base-url', required=True,
+                            help='Scheme and host the pages are served from, e.g. https://www.example.com')
+        parser.add_argument('--full', action='store_true', help='Render every page, changed or not')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Rendering processes (default one per CPU), 1 renders in this process')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            written, unchanged, removed, errors = export_site(
+                options['output'], options['base_url'], options['full'], options['workers'],
+            )
+        except (ValueError, DisallowedHost) as error:
+            raise CommandError(error)
+
+        for path, error in sorted(errors.items()):
+            self.stderr.write(self.style.ERROR(f'{path}: {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {written} pages in {time.perf_counter() - started:.1f}s, '
+            f'{unchanged} unchanged, {removed} removed, to {options["output"]}'
+        ))
+        if errors:
+            raise CommandError(f'{len(errors)} pages failed, they are retried by the next export')
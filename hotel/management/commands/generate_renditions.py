@@ -0,0 +1,53 @@
+# hotel/management/commands/generate_renditions.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models import ImageField
+
+from hotel.renditions import generate_renditions
+from hotel.signals import IMAGE_MODELS
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without a configured Django
+    django.setup()
+
+
+def _render(name, force):
+    return name, generate_renditions(name, force=force)
+
+
+class Command(BaseCommand):
+    help = 'Generates responsive WebP/AVIF renditions for every stored image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in IMAGE_MODELS:
+            for field in model._meta.fields:
+                if isinstance(field, ImageField):
+                    names.update(
+                        model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                        .values_list(field.name, flat=True)
+                    )
+
+        self.stdout.write(f'Generating renditions for {len(names)} images')
+        written = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, name, options['force']): name for name in sorted(names)}
+            for future in as_completed(futures):
+                try:
+                    name, count = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f'{futures[future]}: {exc}'))
+                    continue
+                written += count
+                if count:
+                    self.stdout.write(f'{name}: {count} renditions')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} renditions ({failed} images failed)'))
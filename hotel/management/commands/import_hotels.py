@@ -0,0 +1,37 @@
+# hotel/management/commands/import_hotels.py
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel.bundles import IMPORT_BATCH_SIZE, MEDIA_WORKERS, import_bundle
+
+
+class Command(BaseCommand):
+    help = ('Creates or updates hotels and their content from a bundle directory written by export_hotels '
+            '(see hotel/bundles.py). Run generate_renditions afterwards for the responsive images')
+
+    def add_arguments(self, parser):
+        parser.add_argument('bundle', help='Bundle directory')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows written per transaction')
+        parser.add_argument('--no-media', action='store_true', help='Do not copy the media files')
+        parser.add_argument('--workers', type=int, default=MEDIA_WORKERS, help='Threads copying media files')
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['bundle']):
+            raise CommandError(f'{options["bundle"]} is not a directory')
+
+        started = time.monotonic()
+        try:
+            importer, missing = import_bundle(
+                options['bundle'], options['batch_size'], not options['no_media'], options['workers'],
+            )
+        except ValueError as exc:
+            raise CommandError(f'{exc} (earlier batches were imported)')
+
+        for name, error in missing.items():
+            self.stderr.write(self.style.WARNING(f'Media file {name} not copied: {error}'))
+        counts = ', '.join(
+            f'{name} {importer.created[name]} created / {importer.updated[name]} updated' for name in importer.created
+        )
+        self.stdout.write(self.style.SUCCESS(f'Imported in {time.monotonic() - started:.1f}s: {counts}'))
@@ -0,0 +1,18 @@
+# hotel/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel.search import rebuild_index, search_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from hotels, rooms, sections, FAQs and blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Search needs SQLite with FTS5')
+
+        indexed = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt: {indexed} documents'))
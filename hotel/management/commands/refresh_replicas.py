@@ -0,0 +1,56 @@
+# hotel/management/commands/refresh_replicas.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from hotel.db import refresh_sqlite_replica, replica_aliases, replica_lag, write_heartbeat
+
+
+class Command(BaseCommand):
+    help = ('Writes a heartbeat on the primary and copies it into the SQLite read replicas, '
+            'or with --check reports how far each replica is behind')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report the lag, failing when a replica is behind HOTEL_REPLICA_MAX_LAG')
+        parser.add_argument('--every', type=float, help='Keep refreshing, every this many seconds')
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No read replicas configured, see HOTEL_DB_REPLICAS')
+
+        if options['check']:
+            self.check_lag(aliases)
+            return
+
+        while True:
+            started = time.monotonic()
+            self.refresh(aliases)
+            if not options['every']:
+                break
+            time.sleep(max(options['every'] - (time.monotonic() - started), 0))
+
+    def refresh(self, aliases):
+        # Written first, so the copies carry the time of their data
+        write_heartbeat()
+        for alias in aliases:
+            if connections[alias].vendor != 'sqlite':
+                # Replicated by the database itself, heartbeat included
+                continue
+            started = time.perf_counter()
+            refresh_sqlite_replica(alias)
+            self.stdout.write(f'{alias}: copied in {time.perf_counter() - started:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {len(aliases)} replicas'))
+
+    def check_lag(self, aliases):
+        behind = []
+        for alias in aliases:
+            lag = replica_lag(alias)
+            if lag is None or lag > settings.HOTEL_REPLICA_MAX_LAG:
+                behind.append(alias)
+            self.stdout.write(f'{alias}: ' + ('no heartbeat' if lag is None else f'{lag:.1f}s behind'))
+        if behind:
+            raise CommandError(f'Behind by more than {settings.HOTEL_REPLICA_MAX_LAG}s: {", ".join(behind)}')
@@ -0,0 +1,23 @@
+# hotel/management/commands/update_inventory.py
+from django.core.management.base import BaseCommand
+
+from hotel.availability import AVAILABILITY_DAYS, open_inventory, release_expired_holds
+from hotel.models import RoomType
+
+
+class Command(BaseCommand):
+    help = ('Opens the missing nights of the booking horizon (offering total_rooms of each room type) '
+            'and releases expired room holds. Run it daily, or every few minutes for the holds')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=AVAILABILITY_DAYS, help='Nights to open from today')
+        parser.add_argument('--hotel', help='Only the room types of this hotel slug')
+
+    def handle(self, *args, **options):
+        room_types = RoomType.objects.all()
+        if options['hotel']:
+            room_types = room_types.filter(hotel__slug=options['hotel'])
+
+        added = open_inventory(room_types, options['days'])
+        released = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Opened {added} room nights, released {released} expired holds'))
@@ -0,0 +1,149 @@
+# hotel/metrics.py
+"""Per-view request metrics of this process, in Prometheus text format
+
+metrics_middleware records every request under the name of the URL it
+matched: a latency histogram, its status, response bytes, and the number
+and time of its database queries. Queries are counted by an execute wrapper
+on every connection into the counter of the current request, found through
+a context variable, so the queries async views run in other threads count too.
+
+Each thread counts into its own store, so recording takes no lock and
+never contends; /metrics adds the stores up when it is scraped. A thread
+reuses the store of the dead thread whose id it inherits, so the stores
+never outnumber the threads running at once.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+from django.db.backends.signals import connection_created
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label of requests that matched no URL
+UNMATCHED = 'unmatched'
+
+# Offsets in a series: requests, seconds, queries, query seconds, bytes, then the buckets
+REQUESTS, SECONDS, QUERIES, QUERY_SECONDS, BYTES, BUCKETS = range(6)
+SERIES_SIZE = BUCKETS + len(LATENCY_BUCKETS) + 1
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class QueryCounter:
+    """Queries of one request and their time"""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+current_queries = contextvars.ContextVar('hotel_request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the counter of the current request"""
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.count += 1
+        queries.seconds += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter, dispatch_uid='metrics_count_queries')
+
+
+class RequestMetrics:
+    """Counters of the requests served by this process, by view and status"""
+
+    def __init__(self):
+        # thread id -> {(view, status): series}
+        self._stores = {}
+
+    def observe(self, view, status, seconds, queries, query_seconds, size):
+        store = self._stores.get(threading.get_ident())
+        if store is None:
+            store = self._stores.setdefault(threading.get_ident(), {})
+        series = store.get((view, status))
+        if series is None:
+            series = store[view, status] = [0] * SERIES_SIZE
+        series[REQUESTS] += 1
+        series[SECONDS] += seconds
+        series[QUERIES] += queries
+        series[QUERY_SECONDS] += query_seconds
+        series[BYTES] += size
+        series[BUCKETS + bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def totals(self):
+        """{(view, status): series} summed over all threads"""
+        totals = {}
+        for store in list(self._stores.values()):
+            for key, series in list(store.items()):
+                total = totals.setdefault(key, [0] * SERIES_SIZE)
+                for offset, value in enumerate(series):
+                    total[offset] += value
+        return totals
+
+    def exposition(self):
+        """The metrics in Prometheus text exposition format"""
+        totals = self.totals()
+        by_view = {}
+        for (view, status), series in totals.items():
+            total = by_view.setdefault(view, [0] * SERIES_SIZE)
+            for offset, value in enumerate(series):
+                total[offset] += value
+
+        lines = [
+            '# HELP hotel_http_requests_total Requests served, by view and status.',
+            '# TYPE hotel_http_requests_total counter',
+        ]
+        for (view, status), series in sorted(totals.items()):
+            lines.append(f'hotel_http_requests_total{{view="{view}",status="{status}"}} {series[REQUESTS]}')
+
+        lines += [
+            '# HELP hotel_http_request_duration_seconds Time to respond, by view.',
+            '# TYPE hotel_http_request_duration_seconds histogram',
+        ]
+        for view, series in sorted(by_view.items()):
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), series[BUCKETS:]):
+                cumulative += count
+                lines.append(f'hotel_http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'hotel_http_request_duration_seconds_sum{{view="{view}"}} {series[SECONDS]:.6f}')
+            lines.append(f'hotel_http_request_duration_seconds_count{{view="{view}"}} {series[REQUESTS]}')
+
+        for name, offset, kind, help_text in (
+            ('hotel_db_queries_total', QUERIES, 'counter', 'Database queries run by requests, by view.'),
+            ('hotel_db_query_duration_seconds_total', QUERY_SECONDS, 'counter', 'Time spent in database queries, by view.'),
+            ('hotel_http_response_bytes_total', BYTES, 'counter', 'Response body bytes sent, by view.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for view, series in sorted(by_view.items()):
+                value = f'{series[offset]:.6f}' if isinstance(series[offset], float) else series[offset]
+                lines.append(f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def view_label(request):
+    """Namespaced URL name the request matched"""
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name if match else None) or UNMATCHED
+
+
+def response_size(response):
+    return 0 if response.streaming else len(response.content)
@@ -0,0 +1,92 @@
+# hotel/middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.urls import reverse
+from django.utils.decorators import sync_and_async_middleware
+
+from .db import replica_reads
+from .metrics import QueryCounter, current_queries, request_metrics, response_size, view_label
+from .visitor import Visitor
+
+
+@sync_and_async_middleware
+def visitor_middleware(get_response):
+    """Decode the visitor cookie once into ``request.visitor``, write it back when changed"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.visitor = Visitor.from_request(request)
+            response = await get_response(request)
+            request.visitor.save(response)
+            return response
+    else:
+        def middleware(request):
+            request.visitor = Visitor.from_request(request)
+            response = get_response(request)
+            request.visitor.save(response)
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record the latency, queries, size and status of every request, see hotel/metrics.py"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            queries = QueryCounter()
+            token = current_queries.set(queries)
+            try:
+                response = await get_response(request)
+            finally:
+                current_queries.reset(token)
+            request_metrics.observe(view_label(request), response.status_code, time.perf_counter() - started,
+                                    queries.count, queries.seconds, response_size(response))
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            queries = QueryCounter()
+            token = current_queries.set(queries)
+            try:
+                response = get_response(request)
+            finally:
+                current_queries.reset(token)
+            request_metrics.observe(view_label(request), response.status_code, time.perf_counter() - started,
+                                    queries.count, queries.seconds, response_size(response))
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_reads_middleware(get_response):
+    """Let the hotel reads of public GET requests go to the read replicas, see hotel/db.py
+
+    The admin reads what it writes, so it always reads the primary.
+    """
+    admin_prefix = None
+
+    def allowed(request):
+        nonlocal admin_prefix
+        if admin_prefix is None:
+            admin_prefix = reverse('admin:index')
+        return request.method in ('GET', 'HEAD') and not request.path.startswith(admin_prefix)
+
+    def choice(request):
+        return {} if allowed(request) else None
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = replica_reads.set(choice(request))
+            try:
+                return await get_response(request)
+            finally:
+                replica_reads.reset(token)
+    else:
+        def middleware(request):
+            token = replica_reads.set(choice(request))
+            try:
+                return get_response(request)
+            finally:
+                replica_reads.reset(token)
+    return middleware
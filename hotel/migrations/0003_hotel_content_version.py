@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0002_hotel_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='content_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped whenever the hotel or any of its content changes'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0003_hotel_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='carouselslide',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='carouselslide',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='roomtype',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='roomtype',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image1_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image1_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image2_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image2_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image3_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sectioncontent',
+            name='image3_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='blogs/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='cards/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='carouselslide',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='carousel/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='thumbnail',
+            field=models.ImageField(blank=True, height_field='thumbnail_height', help_text='Image for dropdown preview', null=True, upload_to='hotel_thumbnails/', width_field='thumbnail_width'),
+        ),
+        migrations.AlterField(
+            model_name='roomtype',
+            name='image',
+            field=models.ImageField(height_field='image_height', upload_to='rooms/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='sectioncontent',
+            name='image1',
+            field=models.ImageField(blank=True, height_field='image1_height', upload_to='sections/', width_field='image1_width'),
+        ),
+        migrations.AlterField(
+            model_name='sectioncontent',
+            name='image2',
+            field=models.ImageField(blank=True, height_field='image2_height', upload_to='sections/', width_field='image2_width'),
+        ),
+        migrations.AlterField(
+            model_name='sectioncontent',
+            name='image3',
+            field=models.ImageField(blank=True, height_field='image3_height', upload_to='sections/', width_field='image3_width'),
+        ),
+    ]
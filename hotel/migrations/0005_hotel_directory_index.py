@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0004_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='hotel_directory_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+# Search index, see hotel/search.py. rowid = pk * 8 + kind code
+# (hotel 0, faq 1, blog 2, section 3, room 4).
+CREATE_SEARCH_TABLE = """
+CREATE VIRTUAL TABLE hotel_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    hotel_id UNINDEXED,
+    anchor UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '3'
+)
+"""
+
+POPULATE_SEARCH_TABLE = [
+    """
+    INSERT INTO hotel_search (rowid, kind, object_id, hotel_id, anchor, title, body)
+    SELECT id * 8, 'hotel', id, id, '', name, tagline || char(10) || address
+    FROM hotel_hotel WHERE is_active
+    """,
+    """
+    INSERT INTO hotel_search (rowid, kind, object_id, hotel_id, anchor, title, body)
+    SELECT id * 8 + 1, 'faq', id, hotel_id, '#faq-section', question, answer
+    FROM hotel_faq WHERE is_active
+    """,
+    """
+    INSERT INTO hotel_search (rowid, kind, object_id, hotel_id, anchor, title, body)
+    SELECT id * 8 + 2, 'blog', id, hotel_id, '#blogs-section', title, excerpt || char(10) || content
+    FROM hotel_blogpost WHERE is_published
+    """,
+    """
+    INSERT INTO hotel_search (rowid, kind, object_id, hotel_id, anchor, title, body)
+    SELECT id * 8 + 3, 'section', id, hotel_id,
+           CASE section_type
+               WHEN 'wedding' THEN '#wedding-venues'
+               WHEN 'banquet' THEN '#banquet-halls'
+               WHEN 'restaurant' THEN '#restaurant'
+               WHEN 'faq' THEN '#faq-section'
+               ELSE ''
+           END,
+           title, description
+    FROM hotel_sectioncontent WHERE is_active
+    """,
+    """
+    INSERT INTO hotel_search (rowid, kind, object_id, hotel_id, anchor, title, body)
+    SELECT id * 8 + 4, 'room', id, hotel_id, '#rooms-and-suites', name, description
+    FROM hotel_roomtype WHERE is_available
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; search is disabled on other databases
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SEARCH_TABLE)
+    for sql in POPULATE_SEARCH_TABLE:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS hotel_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0005_hotel_directory_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField(db_index=True)),
+                ('is_new_visitor', models.BooleanField(default=False)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='page_views', to='hotel.hotel')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyHotelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('new_visitors', models.PositiveIntegerField(default=0)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='hotel.hotel')),
+            ],
+            options={
+                'verbose_name': 'daily hotel stats',
+                'verbose_name_plural': 'daily hotel stats',
+                'ordering': ['-date', 'hotel'],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='daily_hotel_stats_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0007_page_view_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomtype',
+            name='total_rooms',
+            field=models.PositiveIntegerField(default=0, help_text='Rooms of this type, the default allotment of new inventory dates'),
+        ),
+        migrations.CreateModel(
+            name='RoomHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(editable=False, unique=True)),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('rooms', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='hotel.roomtype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RoomInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('allotment', models.PositiveIntegerField(default=0)),
+                ('held', models.PositiveIntegerField(default=0, help_text='Rooms held or booked')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='hotel.roomtype')),
+            ],
+            options={
+                'verbose_name_plural': 'room inventory',
+                'ordering': ['room_type', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='room_inventory_unique'), models.CheckConstraint(condition=models.Q(('held__lte', models.F('allotment'))), name='room_inventory_not_overheld')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0008_room_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateField()),
+                ('prices', models.BinaryField(help_text="array('q') of prices in paise, -1 for nights without a price")),
+                ('compiled_at', models.DateTimeField(auto_now=True)),
+                ('room_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rate_calendar', to='hotel.roomtype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RateRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='E.g. Weekend, Diwali, Monsoon discount', max_length=100)),
+                ('kind', models.CharField(choices=[('price', 'Nightly price'), ('percent', 'Percent adjustment')], default='price', max_length=10)),
+                ('value', models.DecimalField(decimal_places=2, help_text='Nightly price, or percent to add (negative for a discount)', max_digits=8)),
+                ('start_date', models.DateField(blank=True, help_text='First night, empty for no limit', null=True)),
+                ('end_date', models.DateField(blank=True, help_text='Last night, empty for no limit', null=True)),
+                ('weekdays', models.CharField(blank=True, help_text='Nights it applies on, e.g. fri,sat. Empty for every night', max_length=30)),
+                ('priority', models.IntegerField(default=0, help_text='Rules apply from low to high priority, later ones on top')),
+                ('is_active', models.BooleanField(default=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_rules', to='hotel.roomtype')),
+            ],
+            options={
+                'ordering': ['room_type', 'priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0009_rate_calendar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['hotel', '-published_date'], name='blog_post_hotel_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hotel', 'category', 'order'], name='card_hotel_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['hotel', 'order'], name='faq_hotel_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomtype',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['hotel', 'order'], name='room_type_hotel_order_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.html import linebreaks, urlize
+
+
+def render_posts(apps, schema_editor):
+    # As hotel.models.render_post_content renders them
+    BlogPost = apps.get_model('hotel', 'BlogPost')
+    posts = list(BlogPost.objects.only('content'))
+    for post in posts:
+        post.content_html = linebreaks(urlize(post.content, nofollow=True, autoescape=True))
+    BlogPost.objects.bulk_update(posts, ['content_html'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0011_replica_heartbeat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='blogpost',
+            options={'ordering': ['-published_date', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='blogpost',
+            name='blog_post_hotel_date_idx',
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='content rendered to HTML on save'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['hotel', '-published_date', '-id'], name='blog_post_hotel_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['hotel', 'category', '-published_date', '-id'], name='blog_post_category_idx'),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel', '0012_blog_content_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='blogpost',
+            constraint=models.UniqueConstraint(fields=('hotel', 'title'), name='blog_post_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.UniqueConstraint(fields=('hotel', 'category', 'title'), name='card_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='faq',
+            constraint=models.UniqueConstraint(fields=('hotel', 'question'), name='faq_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomtype',
+            constraint=models.UniqueConstraint(fields=('hotel', 'name'), name='room_type_unique'),
+        ),
+    ]
@@ -2,9 +2,8 @@
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.utils.html import linebreaks, urlize
 from django.utils.text import slugify
-from PIL import Image
-import os
 
 class Hotel(models.Model):
     name = models.CharField(max_length=200)
@@ -13,25 +12,43 @@ class Hotel(models.Model):
     address = models.TextField()
     phone = models.CharField(max_length=100)
     email = models.EmailField()
-    thumbnail = models.ImageField(upload_to='hotel_thumbnails/', blank=True, null=True, help_text="Image for dropdown preview")
+    thumbnail = models.ImageField(upload_to='hotel_thumbnails/', blank=True, null=True, help_text="Image for dropdown preview",
+                                  width_field='thumbnail_width', height_field='thumbnail_height')
+    thumbnail_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    content_version = models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the hotel or any of its content changes")
+    content_updated_at = models.DateTimeField(default=timezone.now, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination of the hotel directory (partial: Django filters
+            # booleans as a bare "is_active" term that only a partial index can match)
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True), name='hotel_directory_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    @classmethod
+    def bump_content_version(cls, hotel_id):
+        """Mark the content of a hotel as changed"""
+        cls.objects.filter(pk=hotel_id).update(
+            content_version=models.F('content_version') + 1,
+            content_updated_at=timezone.now(),
+        )
+    
     def get_preview_image(self):
         """Get preview image - either thumbnail or first carousel image"""
         if self.thumbnail:
             return self.thumbnail.url
-        # Try to get first carousel image
-        first_slide = self.carousel_slides.filter(is_active=True).first()
-        if first_slide:
-            return first_slide.image.url
-        return None
+        # First carousel image, precomputed for all hotels and cached
+        from .cache import get_preview_images
+        return get_preview_images().get(self.pk)
     
     def __str__(self):
         return self.name
@@ -39,7 +56,9 @@ class Hotel(models.Model):
 class CarouselSlide(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='carousel_slides')
     title = models.CharField(max_length=200, blank=True)
-    image = models.ImageField(upload_to='carousel/')
+    image = models.ImageField(upload_to='carousel/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     
@@ -72,7 +91,9 @@ class Card(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='cards')
     title = models.CharField(max_length=200)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
-    image = models.ImageField(upload_to='cards/')
+    image = models.ImageField(upload_to='cards/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     description = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
@@ -81,16 +102,20 @@ class Card(models.Model):
     
     def get_image_dimensions(self):
         """Get image width and height for proper lazy loading"""
-        if self.image:
-            try:
-                with Image.open(self.image.path) as img:
-                    return img.size  # returns (width, height)
-            except:
-                return (400, 300)  # default dimensions
-        return (400, 300)
+        if self.image_width and self.image_height:
+            return (self.image_width, self.image_height)
+        return (400, 300)  # default dimensions
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Home page cards of a hotel by category, in order (partial like hotel_directory_idx)
+            models.Index(fields=['hotel', 'category', 'order'], condition=models.Q(is_active=True), name='card_hotel_category_idx'),
+        ]
+        constraints = [
+            # Natural key of content bundles (hotel/bundles.py)
+            models.UniqueConstraint(fields=['hotel', 'category', 'title'], name='card_unique'),
+        ]
     
     def __str__(self):
         return f"{self.hotel.name} - {self.category}: {self.title}"
@@ -98,18 +123,110 @@ class Card(models.Model):
 class RoomType(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='room_types')
     name = models.CharField(max_length=100)
-    image = models.ImageField(upload_to='rooms/')
+    image = models.ImageField(upload_to='rooms/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     description = models.TextField(blank=True)
     price_per_night = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     is_available = models.BooleanField(default=True)
+    total_rooms = models.PositiveIntegerField(default=0, help_text="Rooms of this type, the default allotment of new inventory dates")
     order = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['hotel', 'order'], condition=models.Q(is_available=True), name='room_type_hotel_order_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'name'], name='room_type_unique'),
+        ]
     
     def __str__(self):
         return f"{self.hotel.name} - {self.name}"
 
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+class RateRule(models.Model):
+    """Nightly price rule of a room type, compiled into its RateCalendar (see hotel/rates.py)"""
+    KIND_CHOICES = [
+        ('price', 'Nightly price'),
+        ('percent', 'Percent adjustment'),
+    ]
+    
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='rate_rules')
+    name = models.CharField(max_length=100, help_text="E.g. Weekend, Diwali, Monsoon discount")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='price')
+    value = models.DecimalField(max_digits=8, decimal_places=2, help_text="Nightly price, or percent to add (negative for a discount)")
+    start_date = models.DateField(null=True, blank=True, help_text="First night, empty for no limit")
+    end_date = models.DateField(null=True, blank=True, help_text="Last night, empty for no limit")
+    weekdays = models.CharField(max_length=30, blank=True, help_text="Nights it applies on, e.g. fri,sat. Empty for every night")
+    priority = models.IntegerField(default=0, help_text="Rules apply from low to high priority, later ones on top")
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        ordering = ['room_type', 'priority', 'id']
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValidationError({'end_date': 'The last night is before the first one'})
+        unknown = set(self.weekday_names()) - set(WEEKDAYS)
+        if unknown:
+            raise ValidationError({'weekdays': f'Unknown days {", ".join(sorted(unknown))}, use {",".join(WEEKDAYS)}'})
+        if self.kind == 'price' and self.value is not None and self.value < 0:
+            raise ValidationError({'value': 'Prices cannot be negative'})
+    
+    def weekday_names(self):
+        return [day.strip().lower()[:3] for day in self.weekdays.split(',') if day.strip()]
+    
+    def __str__(self):
+        return f"{self.room_type} - {self.name}"
+
+class RateCalendar(models.Model):
+    """Compiled nightly prices of a room type from ``start`` on, see hotel/rates.py"""
+    room_type = models.OneToOneField(RoomType, on_delete=models.CASCADE, related_name='rate_calendar')
+    start = models.DateField()
+    prices = models.BinaryField(help_text="array('q') of prices in paise, -1 for nights without a price")
+    compiled_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.room_type} - from {self.start}"
+
+class RoomInventory(models.Model):
+    """Rooms of a type offered and held on one night, see hotel/availability.py"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='inventory')
+    date = models.DateField()
+    allotment = models.PositiveIntegerField(default=0)
+    held = models.PositiveIntegerField(default=0, help_text="Rooms held or booked")
+    
+    class Meta:
+        ordering = ['room_type', 'date']
+        verbose_name_plural = 'room inventory'
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='room_inventory_unique'),
+            models.CheckConstraint(condition=models.Q(held__lte=models.F('allotment')), name='room_inventory_not_overheld'),
+        ]
+    
+    @property
+    def free(self):
+        return self.allotment - self.held
+    
+    def __str__(self):
+        return f"{self.room_type} - {self.date}"
+
+class RoomHold(models.Model):
+    """Rooms held for a stay, released by token or once expired"""
+    token = models.UUIDField(unique=True, editable=False)
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='holds')
+    check_in = models.DateField()
+    check_out = models.DateField()
+    rooms = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.room_type} - {self.check_in} to {self.check_out} ({self.rooms})"
+
 class SectionContent(models.Model):
     SECTION_CHOICES = [
         ('wedding', 'Wedding Venues'),
@@ -122,9 +239,15 @@ class SectionContent(models.Model):
     section_type = models.CharField(max_length=20, choices=SECTION_CHOICES)
     title = models.CharField(max_length=200)
     description = models.TextField()
-    image1 = models.ImageField(upload_to='sections/', blank=True)
-    image2 = models.ImageField(upload_to='sections/', blank=True)
-    image3 = models.ImageField(upload_to='sections/', blank=True)
+    image1 = models.ImageField(upload_to='sections/', blank=True, width_field='image1_width', height_field='image1_height')
+    image1_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image1_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image2 = models.ImageField(upload_to='sections/', blank=True, width_field='image2_width', height_field='image2_height')
+    image2_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image2_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image3 = models.ImageField(upload_to='sections/', blank=True, width_field='image3_width', height_field='image3_height')
+    image3_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image3_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     button1_text = models.CharField(max_length=50, default="Know More")
     button1_link = models.CharField(max_length=200, blank=True)
     button2_text = models.CharField(max_length=50, default="Enquire Now")
@@ -152,23 +275,95 @@ class FAQ(models.Model):
         ordering = ['order']
         verbose_name = 'FAQ'
         verbose_name_plural = 'FAQs'
+        indexes = [
+            models.Index(fields=['hotel', 'order'], condition=models.Q(is_active=True), name='faq_hotel_order_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'question'], name='faq_unique'),
+        ]
     
     def __str__(self):
         return f"{self.hotel.name} - {self.question[:50]}"
 
+def render_post_content(content):
+    """HTML of a blog post's plain text content, safe to show unescaped"""
+    return linebreaks(urlize(content, nofollow=True, autoescape=True))
+
 class BlogPost(models.Model):
     hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='blog_posts')
     title = models.CharField(max_length=200)
     excerpt = models.TextField()
     content = models.TextField()
-    image = models.ImageField(upload_to='blogs/')
+    image = models.ImageField(upload_to='blogs/', width_field='image_width', height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    content_html = models.TextField(blank=True, editable=False, help_text="content rendered to HTML on save")
     category = models.CharField(max_length=100, default="General")
     published_date = models.DateField(default=timezone.now)
     is_published = models.BooleanField(default=True)
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     
     class Meta:
-        ordering = ['-published_date']
+        ordering = ['-published_date', '-id']
+        indexes = [
+            # Latest posts of a hotel, and the keyset pages of its blog
+            models.Index(fields=['hotel', '-published_date', '-id'], condition=models.Q(is_published=True), name='blog_post_hotel_date_idx'),
+            # Category facet counts, and the pages of one category
+            models.Index(fields=['hotel', 'category', '-published_date', '-id'], condition=models.Q(is_published=True), name='blog_post_category_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'title'], name='blog_post_unique'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.render_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html'}
+        super().save(*args, **kwargs)
+    
+    def render_content(self):
+        """Render ``content`` to ``content_html``: escaped, links made clickable, blank lines between paragraphs"""
+        self.content_html = render_post_content(self.content)
+    
+    def __str__(self):
+        return f"{self.hotel.name} - {self.title}"
+
+
+class PageView(models.Model):
+    """One hotel page view, written in batches by hotel.analytics"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='page_views')
+    viewed_at = models.DateTimeField(db_index=True)
+    is_new_visitor = models.BooleanField(default=False)
+    
+    def __str__(self):
+        return f"{self.hotel_id} - {self.viewed_at:%Y-%m-%d %H:%M}"
+
+class DailyHotelStats(models.Model):
+    """Page views of a hotel per day, rolled up as page views are written"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    new_visitors = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date', 'hotel']
+        verbose_name = 'daily hotel stats'
+        verbose_name_plural = 'daily hotel stats'
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='daily_hotel_stats_unique'),
+        ]
+    
+    @property
+    def returning_visitors(self):
+        return self.views - self.new_visitors
+    
+    def __str__(self):
+        return f"{self.hotel.name} - {self.date}"
+
+class ReplicaHeartbeat(models.Model):
+    """Time of the primary's data a replica holds, written by refresh_replicas, see hotel/db.py"""
+    written_at = models.DateTimeField()
     
     def __str__(self):
-        return f"{self.hotel.name} - {self.title}"
\ No newline at end of file
+        return f"{self.written_at:%Y-%m-%d %H:%M:%S}"
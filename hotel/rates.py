@@ -0,0 +1,199 @@
+# hotel/rates.py
+"""Nightly room rates
+
+A room type's RateRules are compiled into a dense array of nightly prices
+(RateCalendar, in paise) covering a rolling RATE_DAYS window from today.
+Recompiling after a rule change only touches the nights that rule covers,
+plus the nights that entered the window since the last compile.
+
+Readers get one cached bundle per hotel holding every room type's prices and
+their prefix sums, so a month calendar is a slice and a stay total is a
+subtraction.
+"""
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import WEEKDAYS, Hotel, RoomType, RateRule, RateCalendar
+
+RATE_DAYS = 365
+NO_PRICE = -1
+RATES_CACHE_TIMEOUT = 24*60*60
+
+
+def parse_month(value, today=None):
+    """First day of a YYYY-MM month (default the current one), raises ValueError when invalid"""
+    if not value:
+        return (today or timezone.localdate()).replace(day=1)
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except (AttributeError, ValueError):
+        raise ValueError('month must be YYYY-MM')
+
+
+def parse_rate_stay(check_in, check_out, start):
+    """(check_in, check_out) of a stay within the rates window from ``start``, raises ValueError when invalid"""
+    try:
+        check_in = date.fromisoformat(check_in)
+        check_out = date.fromisoformat(check_out)
+    except (TypeError, ValueError):
+        raise ValueError('check_in and check_out must be dates (YYYY-MM-DD)')
+    if check_in >= check_out:
+        raise ValueError('check_out must be after check_in')
+    if check_in < start or check_out > start + timedelta(days=RATE_DAYS):
+        raise ValueError(f'Rates are published for the next {RATE_DAYS} nights')
+    return check_in, check_out
+
+
+def to_paise(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal('1'), ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Price string of an amount in paise, None for NO_PRICE"""
+    return None if paise < 0 else f'{paise // 100}.{paise % 100:02d}'
+
+
+def compiled_rules(room_type):
+    """(start, end, weekdays, kind, value) of the active rules of a room type, in the order they apply"""
+    return [
+        (rule.start_date, rule.end_date, {WEEKDAYS.index(day) for day in rule.weekday_names() if day in WEEKDAYS},
+         rule.kind, rule.value)
+        for rule in RateRule.objects.filter(room_type=room_type, is_active=True).order_by('priority', 'id')
+    ]
+
+
+def nightly_price(base, rules, night):
+    """Price of a night in paise: the base price (paise or NO_PRICE) with the matching rules applied"""
+    price = base
+    weekday = night.weekday()
+    for start, end, weekdays, kind, value in rules:
+        if (start and night < start) or (end and night > end) or (weekdays and weekday not in weekdays):
+            continue
+        if kind == 'price':
+            price = to_paise(value)
+        elif price != NO_PRICE:
+            price = max(int((Decimal(price) * (100 + value) / 100).quantize(Decimal('1'), ROUND_HALF_UP)), 0)
+    return price
+
+
+def compile_calendar(room_type, nights=None, today=None):
+    """Compile the nightly prices of a room type and save its RateCalendar
+
+    ``nights`` limits the work to a (first, last) range of nights; () compiles
+    only the nights new to the window. None compiles every night.
+    """
+    today = today or timezone.localdate()
+    calendar = RateCalendar.objects.filter(room_type=room_type).first()
+
+    prices = array('q')
+    if calendar is not None and nights is not None:
+        prices.frombytes(calendar.prices)
+        shift = (today - calendar.start).days
+        if len(prices) == RATE_DAYS and 0 <= shift < RATE_DAYS:
+            prices = prices[shift:] + array('q', [NO_PRICE]) * shift
+            dirty = set(range(RATE_DAYS - shift, RATE_DAYS))
+            if nights:
+                first, last = nights
+                first = max((first - today).days if first else 0, 0)
+                last = min((last - today).days if last else RATE_DAYS - 1, RATE_DAYS - 1)
+                dirty.update(range(first, last + 1))
+        else:
+            nights = None
+    if calendar is None or nights is None:
+        prices = array('q', [NO_PRICE]) * RATE_DAYS
+        dirty = range(RATE_DAYS)
+
+    base = to_paise(room_type.price_per_night) if room_type.price_per_night is not None else NO_PRICE
+    rules = compiled_rules(room_type)
+    for day in dirty:
+        prices[day] = nightly_price(base, rules, today + timedelta(days=day))
+
+    calendar, _ = RateCalendar.objects.update_or_create(
+        room_type=room_type, defaults={'start': today, 'prices': prices.tobytes()},
+    )
+    return calendar
+
+
+def _rates_key(slug):
+    return f'hotel:rates:{slug}'
+
+
+def build_hotel_rates(slug, today=None):
+    """Rates bundle of an active hotel, compiling stale calendars, or None"""
+    today = today or timezone.localdate()
+    hotel = Hotel.objects.filter(slug=slug, is_active=True).only('slug', 'name').first()
+    if hotel is None:
+        return None
+
+    room_types = []
+    for room_type in RoomType.objects.filter(hotel=hotel, is_available=True).select_related('rate_calendar'):
+        try:
+            calendar = room_type.rate_calendar
+        except RateCalendar.DoesNotExist:
+            calendar = None
+        if calendar is None or calendar.start != today:
+            calendar = compile_calendar(room_type, None if calendar is None else (), today)
+
+        prices = array('q')
+        prices.frombytes(calendar.prices)
+        # Prefix sums: totals[i] is the price of nights [0, i), unpriced[i] how many had none
+        totals = array('q', [0])
+        unpriced = array('l', [0])
+        for price in prices:
+            totals.append(totals[-1] + max(price, 0))
+            unpriced.append(unpriced[-1] + (price == NO_PRICE))
+        room_types.append({
+            'id': room_type.pk,
+            'name': room_type.name,
+            'prices': prices,
+            'totals': totals,
+            'unpriced': unpriced,
+        })
+
+    return {'start': today, 'slug': hotel.slug, 'name': hotel.name, 'room_types': room_types}
+
+
+def get_hotel_rates(slug):
+    """Rates bundle of a hotel from the cache (see build_hotel_rates), or None"""
+    today = timezone.localdate()
+    rates = cache.get(_rates_key(slug))
+    if rates is None or rates['start'] != today:
+        rates = build_hotel_rates(slug, today)
+        if rates is not None:
+            cache.set(_rates_key(slug), rates, RATES_CACHE_TIMEOUT)
+    return rates
+
+
+def stay_total(rates, room_type, check_in, check_out):
+    """Price of the nights [check_in, check_out) in paise, None when a night has no price"""
+    first = (check_in - rates['start']).days
+    last = (check_out - rates['start']).days
+    if room_type['unpriced'][last] - room_type['unpriced'][first]:
+        return None
+    return room_type['totals'][last] - room_type['totals'][first]
+
+
+def month_nights(rates, month):
+    """(first index, nights) of a month (a date on its first day) within the rates window"""
+    next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    first = max((month - rates['start']).days, 0)
+    last = min((next_month - rates['start']).days, RATE_DAYS)
+    return first, [rates['start'] + timedelta(days=day) for day in range(first, last)]
+
+
+def invalidate_hotel_rates(slug):
+    cache.delete(_rates_key(slug))
+
+
+def recompile_room_type(room_type_id, nights=None):
+    """Compile a room type's calendar after a change and drop its hotel's cached rates"""
+    room_type = RoomType.objects.filter(pk=room_type_id).select_related('hotel').first()
+    if room_type is None:
+        return
+    compile_calendar(room_type, nights)
+    invalidate_hotel_rates(room_type.hotel.slug)
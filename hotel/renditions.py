@@ -0,0 +1,120 @@
+# hotel/renditions.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import ImageField
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Widths generated for uploaded images. Images are never upscaled: the first
+# width at or above the original holds a full-size copy and larger ones are skipped.
+RENDITION_WIDTHS = (480, 960, 1440, 1920)
+
+# Modern formats, most efficient first (this is also the <source> order)
+RENDITION_FORMATS = {
+    'avif': {'format': 'AVIF', 'mime': 'image/avif', 'options': {'quality': 60}},
+    'webp': {'format': 'WEBP', 'mime': 'image/webp', 'options': {'quality': 80, 'method': 4}},
+}
+
+RENDITIONS_DIR = 'renditions'
+AVAILABLE_TIMEOUT = None  # renditions never go away once generated
+MISSING_TIMEOUT = 5*60  # re-check images without renditions every 5 minutes
+
+# Upload-time renditions are encoded off the request thread
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='renditions')
+
+
+def rendition_name(name, width, fmt):
+    """Storage name of one rendition, e.g. renditions/cards/card1-480w.webp"""
+    base, _ = os.path.splitext(name)
+    return f'{RENDITIONS_DIR}/{base}-{width}w.{fmt}'
+
+
+def rendition_widths(original_width=None):
+    """Configured widths needed for an image of ``original_width`` pixels"""
+    if not original_width:
+        return list(RENDITION_WIDTHS)
+    smaller = [width for width in RENDITION_WIDTHS if width < original_width]
+    return smaller + [width for width in RENDITION_WIDTHS if width >= original_width][:1]
+
+
+def _available_key(name):
+    return f'hotel:renditions:{name}'
+
+
+def renditions_available(name):
+    """Whether renditions exist for an image, cached so templates never stat files"""
+    available = cache.get(_available_key(name))
+    if available is None:
+        # The smallest rendition is written last, see generate_renditions
+        last = rendition_name(name, RENDITION_WIDTHS[0], list(RENDITION_FORMATS)[-1])
+        available = default_storage.exists(last)
+        cache.set(_available_key(name), available, AVAILABLE_TIMEOUT if available else MISSING_TIMEOUT)
+    return available
+
+
+def generate_renditions(name, force=False):
+    """Write every width and format of a stored image, returns the number written"""
+    written = 0
+    with default_storage.open(name, 'rb') as source:
+        with Image.open(source) as original:
+            original.load()
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+
+            for width in reversed(rendition_widths(original.width)):
+                resized = None
+                for fmt, spec in RENDITION_FORMATS.items():
+                    target = rendition_name(name, width, fmt)
+                    if default_storage.exists(target):
+                        if not force:
+                            continue
+                        default_storage.delete(target)
+                    if resized is None:
+                        resized = original.copy()
+                        resized.thumbnail((width, resized.height))
+                    buffer = BytesIO()
+                    resized.save(buffer, spec['format'], **spec['options'])
+                    default_storage.save(target, ContentFile(buffer.getvalue()))
+                    written += 1
+
+    cache.set(_available_key(name), True, AVAILABLE_TIMEOUT)
+    return written
+
+
+def _generate_quietly(name):
+    try:
+        generate_renditions(name)
+    except Exception:
+        logger.exception('Could not generate renditions for %s', name)
+
+
+def image_names(instance):
+    """Names of the images stored on a model instance"""
+    return [
+        getattr(instance, field.name).name
+        for field in instance._meta.fields
+        if isinstance(field, ImageField) and getattr(instance, field.name)
+    ]
+
+
+def schedule_renditions(instance):
+    """Generate renditions for an instance's images once the save is committed"""
+    for name in image_names(instance):
+        if not renditions_available(name):
+            transaction.on_commit(lambda name=name: _executor.submit(_generate_quietly, name))
+
+
+def rendition_srcset(name, fmt, original_width=None):
+    """srcset attribute value for one format of an image"""
+    return ', '.join(
+        f'{default_storage.url(rendition_name(name, width, fmt))} {min(width, original_width or width)}w'
+        for width in rendition_widths(original_width)
+    )
@@ -0,0 +1,196 @@
+# hotel/search.py
+import re
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils.html import escape
+
+from .models import Hotel, RoomType, SectionContent, FAQ, BlogPost
+
+# SQLite FTS5 table holding one row per searchable object, created by migration
+# 0006. Only title and body are tokenized; the other columns locate the object.
+# Words are not stemmed so that prefix queries (search as you type) match, and
+# 3 character prefixes are indexed to keep those queries fast.
+SEARCH_TABLE = 'hotel_search'
+
+# Relevance weights of the title and body columns for bm25()
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_QUERY_TERMS = 8
+MIN_PREFIX_LENGTH = 3  # shorter words match whole words only
+SNIPPET_TOKENS = 16
+
+# Page anchors of the section templates
+SECTION_ANCHORS = {
+    'wedding': '#wedding-venues',
+    'banquet': '#banquet-halls',
+    'restaurant': '#restaurant',
+    'faq': '#faq-section',
+}
+
+# Control characters mark matches in snippets, so the text can be escaped before <mark> is added
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def search_document(instance):
+    """(kind, hotel id, anchor, title, body) of a searchable object, None when it is hidden"""
+    if isinstance(instance, Hotel):
+        if not instance.is_active:
+            return None
+        return ('hotel', instance.pk, '', instance.name, f'{instance.tagline}\n{instance.address}')
+    if isinstance(instance, FAQ):
+        if not instance.is_active:
+            return None
+        return ('faq', instance.hotel_id, '#faq-section', instance.question, instance.answer)
+    if isinstance(instance, BlogPost):
+        if not instance.is_published:
+            return None
+        return ('blog', instance.hotel_id, '#blogs-section', instance.title, f'{instance.excerpt}\n{instance.content}')
+    if isinstance(instance, SectionContent):
+        if not instance.is_active:
+            return None
+        return ('section', instance.hotel_id, SECTION_ANCHORS.get(instance.section_type, ''),
+                instance.title, instance.description)
+    if isinstance(instance, RoomType):
+        if not instance.is_available:
+            return None
+        return ('room', instance.hotel_id, '#rooms-and-suites', instance.name, instance.description)
+    raise TypeError(f'{type(instance).__name__} is not searchable')
+
+
+SEARCH_MODELS = (Hotel, FAQ, BlogPost, SectionContent, RoomType)
+
+# Columns read by search_document. Rebuilds load only these, which also keeps
+# ImageFields from opening files to fill in missing dimensions.
+SEARCH_FIELDS = {
+    Hotel: ('is_active', 'name', 'tagline', 'address'),
+    FAQ: ('hotel_id', 'is_active', 'question', 'answer'),
+    BlogPost: ('hotel_id', 'is_published', 'title', 'excerpt', 'content'),
+    SectionContent: ('hotel_id', 'is_active', 'section_type', 'title', 'description'),
+    RoomType: ('hotel_id', 'is_available', 'name', 'description'),
+}
+
+# Index rows use rowid = pk * KIND_STRIDE + kind code, so an object's row is
+# found through the rowid b-tree instead of a scan of the unindexed columns.
+KIND_CODES = {'hotel': 0, 'faq': 1, 'blog': 2, 'section': 3, 'room': 4}
+KIND_STRIDE = 8
+MODEL_KINDS = {Hotel: 'hotel', FAQ: 'faq', BlogPost: 'blog', SectionContent: 'section', RoomType: 'room'}
+
+
+def search_rowid(instance):
+    return instance.pk * KIND_STRIDE + KIND_CODES[MODEL_KINDS[type(instance)]]
+
+
+def _document_row(instance):
+    document = search_document(instance)
+    if document is None:
+        return None
+    kind, hotel_id, anchor, title, body = document
+    return [search_rowid(instance), kind, instance.pk, hotel_id, anchor, title, body]
+
+
+def _insert_rows(cursor, rows):
+    if rows:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, hotel_id, anchor, title, body) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+    return len(rows)
+
+
+def index_instance(instance):
+    """Add, refresh or drop (when hidden) the index row of one object"""
+    if not search_available():
+        return
+    row = _document_row(instance)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [search_rowid(instance)])
+        if row:
+            _insert_rows(cursor, [row])
+
+
+def unindex_instance(instance):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [search_rowid(instance)])
+
+
+def rebuild_index(batch_size=1000):
+    """Repopulate the whole index, returns the number of indexed objects"""
+    indexed = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        for model in SEARCH_MODELS:
+            batch = []
+            for instance in model.objects.only(*SEARCH_FIELDS[model]).iterator(chunk_size=batch_size):
+                row = _document_row(instance)
+                if row:
+                    batch.append(row)
+                if len(batch) >= batch_size:
+                    indexed += _insert_rows(cursor, batch)
+                    batch = []
+            indexed += _insert_rows(cursor, batch)
+        # Merge the b-trees written by the bulk load into one for faster queries
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def build_match_query(text):
+    """FTS5 MATCH expression for free text: every word, matched as a prefix
+    once it is at least MIN_PREFIX_LENGTH characters long
+
+    Words are quoted, so FTS5 operators typed by visitors are matched as text.
+    """
+    terms = re.findall(r'\w+', text.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' if len(term) >= MIN_PREFIX_LENGTH else f'"{term}"' for term in terms)
+
+
+def _highlight(snippet):
+    return escape(snippet).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def search(text, hotel_slug=None, limit=SEARCH_PAGE_SIZE):
+    """Ranked matches for ``text``, optionally restricted to one hotel"""
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    sql = (
+        f'SELECT s.kind, s.object_id, s.anchor, s.title, '
+        f"snippet({SEARCH_TABLE}, 5, %s, %s, '…', {SNIPPET_TOKENS}), h.slug, h.name "
+        f'FROM {SEARCH_TABLE} s JOIN hotel_hotel h ON h.id = s.hotel_id '
+        f'WHERE {SEARCH_TABLE} MATCH %s AND h.is_active '
+    )
+    params = [_MATCH_START, _MATCH_END, match]
+    if hotel_slug:
+        sql += 'AND h.slug = %s '
+        params.append(hotel_slug)
+    sql += f'ORDER BY bm25({SEARCH_TABLE}, 0, 0, 0, 0, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'type': kind,
+            'id': object_id,
+            'title': title,
+            'snippet': _highlight(snippet),
+            'hotel': {'slug': slug, 'name': name},
+            'url': reverse('home_with_slug', args=[slug]) + anchor,
+        }
+        for kind, object_id, anchor, title, snippet, slug, name in rows
+    ]
@@ -0,0 +1,180 @@
+# hotel/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .availability import log_inventory_change, log_hotel_inventory_change
+from .models import (
+    Hotel, CarouselSlide, MainInfo, Card, RoomType, RoomInventory, RateRule, SectionContent, FAQ, BlogPost,
+)
+from .cache import invalidate_hotel_page, invalidate_all_pages, invalidate_sections
+from .loaders import CARD_SECTIONS, CONTENT_SECTIONS
+from .rates import invalidate_hotel_rates, recompile_room_type
+from .renditions import schedule_renditions
+from .search import SEARCH_MODELS, index_instance, unindex_instance
+
+# Content shown only on the page of the hotel it belongs to
+HOTEL_CONTENT_MODELS = (MainInfo, Card, RoomType, SectionContent, FAQ, BlogPost)
+
+# Fields deciding which home page section a content row is shown in
+SECTION_FIELDS = {Card: ('category',), SectionContent: ('section_type',)}
+
+# Models with ImageFields that get responsive renditions
+IMAGE_MODELS = (Hotel, CarouselSlide, Card, RoomType, SectionContent, BlogPost)
+
+
+def hotel_slug_for(hotel_id):
+    """Slug of a hotel (None once the hotel is gone)"""
+    return Hotel.objects.filter(pk=hotel_id).values_list('slug', flat=True).first()
+
+
+def home_sections_for(instance):
+    """Home page sections (see loaders.HOME_SECTIONS) showing a content row"""
+    if isinstance(instance, MainInfo):
+        return ('main_info',)
+    if isinstance(instance, Card):
+        return (CARD_SECTIONS[instance.category],) if instance.category in CARD_SECTIONS else ()
+    if isinstance(instance, RoomType):
+        return ('rooms_and_suites',)
+    if isinstance(instance, SectionContent):
+        return (CONTENT_SECTIONS[instance.section_type],) if instance.section_type in CONTENT_SECTIONS else ()
+    if isinstance(instance, FAQ):
+        return ('faq',)
+    if isinstance(instance, BlogPost):
+        return ('blogs',)
+    return ()
+
+
+def invalidate_hotel_content(hotel_id, sections):
+    slug = hotel_slug_for(hotel_id)
+    if slug:
+        invalidate_hotel_page(slug)
+    if sections:
+        invalidate_sections(hotel_id, sections)
+
+
+# Caches are invalidated once the change is committed: a page rendered before
+# that would still read the old rows and cache them as current.
+
+@receiver(pre_save, sender=Hotel)
+def remember_previous_slug(sender, instance, raw=False, **kwargs):
+    """Keep the slug a hotel's rates were cached under before a rename"""
+    instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._previous_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Hotel)
+def hotel_changed(sender, instance, **kwargs):
+    """Hotels feed the locations dropdown on every page"""
+    Hotel.bump_content_version(instance.pk)
+    transaction.on_commit(invalidate_all_pages)
+    # Deactivating a hotel takes its rooms off the availability index
+    transaction.on_commit(partial(log_hotel_inventory_change, instance.pk))
+    for slug in {instance.slug, getattr(instance, '_previous_slug', None)} - {None}:
+        transaction.on_commit(partial(invalidate_hotel_rates, slug))
+
+
+@receiver([post_save, post_delete], sender=CarouselSlide)
+def carousel_slide_changed(sender, instance, **kwargs):
+    """Slides are used as dropdown previews on every page"""
+    Hotel.bump_content_version(instance.hotel_id)
+    transaction.on_commit(invalidate_all_pages)
+
+
+def remember_previous_location(sender, instance, raw=False, **kwargs):
+    """Keep the hotel and section a row was shown in before an edit moves it"""
+    instance._previous_location = None
+    if instance.pk and not raw:
+        row = sender.objects.filter(pk=instance.pk).values('hotel_id', *SECTION_FIELDS.get(sender, ())).first()
+        if row:
+            previous = sender(**row)
+            instance._previous_location = (previous.hotel_id, home_sections_for(previous))
+
+
+def hotel_content_changed(sender, instance, **kwargs):
+    locations = {(instance.hotel_id, home_sections_for(instance))}
+    if getattr(instance, '_previous_location', None):
+        locations.add(instance._previous_location)
+    for hotel_id, sections in locations:
+        Hotel.bump_content_version(hotel_id)
+        transaction.on_commit(partial(invalidate_hotel_content, hotel_id, sections))
+
+
+for model in HOTEL_CONTENT_MODELS:
+    pre_save.connect(remember_previous_location, sender=model, dispatch_uid=f'page_cache_{model.__name__}_pre_save')
+    post_save.connect(hotel_content_changed, sender=model, dispatch_uid=f'page_cache_{model.__name__}_save')
+    post_delete.connect(hotel_content_changed, sender=model, dispatch_uid=f'page_cache_{model.__name__}_delete')
+
+
+def image_saved(sender, instance, **kwargs):
+    schedule_renditions(instance)
+
+
+for model in IMAGE_MODELS:
+    post_save.connect(image_saved, sender=model, dispatch_uid=f'renditions_{model.__name__}_save')
+
+
+def search_document_saved(sender, instance, **kwargs):
+    index_instance(instance)
+
+
+def search_document_deleted(sender, instance, **kwargs):
+    unindex_instance(instance)
+
+
+for model in SEARCH_MODELS:
+    post_save.connect(search_document_saved, sender=model, dispatch_uid=f'search_{model.__name__}_save')
+    post_delete.connect(search_document_deleted, sender=model, dispatch_uid=f'search_{model.__name__}_delete')
+
+
+def inventory_changed(sender, instance, **kwargs):
+    room_type_id = instance.pk if sender is RoomType else instance.room_type_id
+    transaction.on_commit(partial(log_inventory_change, room_type_id))
+
+
+for model in (RoomType, RoomInventory):
+    post_save.connect(inventory_changed, sender=model, dispatch_uid=f'availability_{model.__name__}_save')
+    post_delete.connect(inventory_changed, sender=model, dispatch_uid=f'availability_{model.__name__}_delete')
+
+
+# Rate calendars are recompiled once the change is committed, a rule change
+# only for the nights it covers (before and after the edit).
+
+def remember_previous_rule(sender, instance, raw=False, **kwargs):
+    instance._previous_rule = None
+    if instance.pk and not raw:
+        instance._previous_rule = sender.objects.filter(pk=instance.pk).values_list(
+            'room_type_id', 'start_date', 'end_date',
+        ).first()
+
+
+def rate_rule_changed(sender, instance, **kwargs):
+    nights = (instance.start_date, instance.end_date)
+    previous = getattr(instance, '_previous_rule', None)
+    if previous and previous[0] != instance.room_type_id:
+        transaction.on_commit(partial(recompile_room_type, previous[0], previous[1:]))
+    elif previous:
+        starts, ends = (previous[1], instance.start_date), (previous[2], instance.end_date)
+        nights = (None if None in starts else min(starts), None if None in ends else max(ends))
+    transaction.on_commit(partial(recompile_room_type, instance.room_type_id, nights))
+
+
+def room_type_rates_changed(sender, instance, **kwargs):
+    """The base price applies to every night"""
+    transaction.on_commit(partial(recompile_room_type, instance.pk))
+
+
+def room_type_rates_deleted(sender, instance, **kwargs):
+    slug = hotel_slug_for(instance.hotel_id)
+    if slug:
+        transaction.on_commit(partial(invalidate_hotel_rates, slug))
+
+
+pre_save.connect(remember_previous_rule, sender=RateRule, dispatch_uid='rates_RateRule_pre_save')
+post_save.connect(rate_rule_changed, sender=RateRule, dispatch_uid='rates_RateRule_save')
+post_delete.connect(rate_rule_changed, sender=RateRule, dispatch_uid='rates_RateRule_delete')
+post_save.connect(room_type_rates_changed, sender=RoomType, dispatch_uid='rates_RoomType_save')
+post_delete.connect(room_type_rates_deleted, sender=RoomType, dispatch_uid='rates_RoomType_delete')
@@ -0,0 +1,183 @@
+# hotel/static_export.py
+"""Prerendered hotel pages, see the export_static_site command
+
+Every active hotel's home page and the hotel list are rendered through their
+views as a first-time visitor without cookies sees them, and written as
+<path>/index.html with .gz/.br siblings, so a web server can answer those
+URLs from files (nginx: try_files $uri/index.html @django; gzip_static on;
+brotli_static on). The bare / stays with Django, it shows the visitor's
+preferred hotel.
+
+A manifest beside the pages keeps a stamp of what each page was rendered
+from: the hotel's content version, the hotel directory shown in the page's
+dropdown, the base URL and the static files manifest. Incremental exports
+render only the pages whose stamp changed and remove the pages of hotels
+that are no longer active. Pages render in a process pool, each worker
+with its own database connection, and are replaced atomically.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import django
+from django.apps import apps
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .models import Hotel
+from .storage import MIN_COMPRESS_SIZE, compressed_variants
+
+MANIFEST_FILE = '.export-manifest.json'
+PAGE_FILE = 'index.html'
+
+
+def _stamp(*parts):
+    return hashlib.md5(json.dumps(parts, default=str).encode(), usedforsecurity=False).hexdigest()
+
+
+def request_factory(base_url):
+    """RequestFactory building requests for ``base_url``, e.g. https://www.example.com"""
+    url = urlsplit(base_url)
+    if url.scheme not in ('http', 'https') or not url.netloc or url.path not in ('', '/'):
+        raise ValueError(f'Base URL must be scheme://host[:port], got {base_url!r}')
+    return RequestFactory(HTTP_HOST=url.netloc, secure=url.scheme == 'https')
+
+
+def page_stamps(base_url):
+    """{path: (hotel slug or None for the hotel list, stamp)} of every page to export"""
+    from .cache import get_hotel_directory_page
+    from .views import HOTEL_LIST_FIELDS
+
+    site = (base_url, getattr(staticfiles_storage, 'manifest_hash', ''), get_hotel_directory_page())
+    pages = {}
+    for slug, content_version, content_updated_at in (
+        Hotel.objects.filter(is_active=True).order_by('pk').values_list('slug', 'content_version', 'content_updated_at')
+    ):
+        pages[reverse('home_with_slug', args=[slug])] = (slug, _stamp(site, content_version, content_updated_at))
+
+    # The list shows the first active hotel in its header and footer
+    header = Hotel.objects.filter(is_active=True).values_list('pk', 'content_version').first()
+    pages[reverse('hotel_list')] = (None, _stamp(site, header, get_hotel_directory_page(fields=HOTEL_LIST_FIELDS)))
+    return pages
+
+
+def render_page(factory, path, slug):
+    """HTML of a page for a visitor without cookies, None once its hotel is gone"""
+    from . import views
+    from .visitor import Visitor
+
+    request = factory.get(path)
+    request.visitor = Visitor.from_request(request)
+    # Not a visit, see views.record_visit
+    request.is_prerender = True
+    try:
+        response = views.home(request, hotel_slug=slug) if slug else views.hotel_list(request)
+    except Http404:
+        return None
+    if response.status_code != 200:
+        raise ValueError(f'{path} answered {response.status_code}')
+    return response.content
+
+
+def _replace(path, data):
+    """Write a file so readers only ever see the old or the new one whole"""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as file:
+        file.write(data)
+    # Temporary files are private, the web server has to read these
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def write_page(output, path, html):
+    """Write a page and its compressed siblings under ``output``"""
+    directory = os.path.join(output, path.strip('/'))
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.join(directory, PAGE_FILE)
+    variants = compressed_variants(html) if len(html) >= MIN_COMPRESS_SIZE else {}
+    for suffix in ('.gz', '.br'):
+        if suffix in variants:
+            _replace(name + suffix, variants[suffix])
+        elif os.path.exists(name + suffix):
+            os.remove(name + suffix)
+    _replace(name, html)
+
+
+def remove_page(output, path):
+    """Remove a page's files, and its directory once nothing else is left there"""
+    directory = os.path.join(output, path.strip('/'))
+    for suffix in ('', '.gz', '.br'):
+        if os.path.exists(os.path.join(directory, PAGE_FILE + suffix)):
+            os.remove(os.path.join(directory, PAGE_FILE + suffix))
+    if os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+
+
+def _init_worker():
+    # Set up afresh where workers are spawned rather than forked
+    if not apps.ready:
+        django.setup()
+
+
+def export_page(output, base_url, path, slug):
+    """Render and write one page; (path, written, error message)"""
+    try:
+        html = render_page(request_factory(base_url), path, slug)
+        if html is None:
+            remove_page(output, path)
+            return path, False, None
+        write_page(output, path, html)
+        return path, True, None
+    except Exception as error:
+        return path, False, f'{type(error).__name__}: {error}'
+
+
+def read_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST_FILE)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def export_site(output, base_url, full=False, workers=None):
+    """Render the pages that changed since the last export into ``output``
+
+    Returns (pages written, pages unchanged, pages removed, {path: error}).
+    """
+    # Fails here, once, when the host is not in ALLOWED_HOSTS
+    request_factory(base_url).get('/').get_host()
+    os.makedirs(output, exist_ok=True)
+
+    previous = {} if full else read_manifest(output)
+    pages = page_stamps(base_url)
+    changed = {path: slug for path, (slug, stamp) in pages.items() if previous.get(path) != stamp}
+
+    removed = 0
+    for path in set(previous) - set(pages):
+        remove_page(output, path)
+        removed += 1
+
+    results = []
+    if workers == 1:
+        results = [export_page(output, base_url, path, slug) for path, slug in changed.items()]
+    elif changed:
+        # Forked workers must not share the connections of this process
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = list(pool.map(
+                export_page, *zip(*((output, base_url, path, slug) for path, slug in changed.items())), chunksize=16,
+            ))
+
+    errors = {path: error for path, written, error in results if error}
+    gone = {path for path, written, error in results if not written and not error}
+    # Failed pages are left out of the manifest so the next export retries them
+    manifest = {path: stamp for path, (slug, stamp) in pages.items() if path not in errors and path not in gone}
+    _replace(os.path.join(output, MANIFEST_FILE), json.dumps(manifest, indent=0).encode())
+    written = sum(written for path, written, error in results)
+    return written, len(pages) - len(changed), removed + len(gone), errors
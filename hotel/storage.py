@@ -0,0 +1,98 @@
+# hotel/storage.py
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # .br files are skipped, web servers fall back to the .gz ones
+    brotli = None
+
+# Files worth precompressing, and the smallest one worth it
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map')
+MIN_COMPRESS_SIZE = 256
+
+# Only keep a compressed sibling that saves at least 5%
+MAX_COMPRESSED_RATIO = 0.95
+
+
+def minify(name, content):
+    """Minified text of a CSS or JS file, or None for other files"""
+    if name.endswith(('.min.css', '.min.js')):
+        return None
+    if name.endswith('.css'):
+        import rcssmin
+        return rcssmin.cssmin(content)
+    if name.endswith('.js'):
+        import rjsmin
+        return rjsmin.jsmin(content)
+    return None
+
+
+def compressed_variants(data):
+    """{suffix: bytes} of the precompressed siblings worth writing for ``data``"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {
+        suffix: compressed for suffix, compressed in variants.items()
+        if len(compressed) <= len(data) * MAX_COMPRESSED_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that minifies CSS/JS and precompresses collected files
+
+    Hashed names come from the source files, so they still change whenever a
+    source changes and the files can be cached forever. The .gz/.br siblings
+    are meant to be served directly by the web server.
+    """
+
+    def stored_name(self, name):
+        # Templates link a few files that are not shipped yet (favicons, default
+        # social images); keep their plain URLs instead of failing the page.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        written = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception):
+                written.add(name)
+                if hashed_name:
+                    written.add(hashed_name)
+
+        if dry_run:
+            return
+        for name in sorted(written):
+            self.optimize_file(name)
+
+    def _replace(self, name, data):
+        self.delete(name)
+        self._save(name, ContentFile(data))
+
+    def optimize_file(self, name):
+        """Minify one collected file in place and write its compressed siblings"""
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as f:
+            data = f.read()
+
+        try:
+            minified = minify(name, data.decode())
+        except UnicodeDecodeError:
+            minified = None
+        if minified is not None and len(minified.encode()) < len(data):
+            data = minified.encode()
+            self._replace(name, data)
+
+        for suffix in ('.gz', '.br'):
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+        if len(data) >= MIN_COMPRESS_SIZE:
+            for suffix, compressed in compressed_variants(data).items():
+                self._save(name + suffix, ContentFile(compressed))
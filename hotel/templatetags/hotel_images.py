@@ -0,0 +1,41 @@
+# hotel/templatetags/hotel_images.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from hotel.renditions import RENDITION_FORMATS, renditions_available, rendition_srcset
+
+register = template.Library()
+
+
+def stored_dimensions(image):
+    """(width, height) saved on the model for an ImageField file, or (None, None)"""
+    field = image.field
+    return (
+        getattr(image.instance, field.width_field, None) if field.width_field else None,
+        getattr(image.instance, field.height_field, None) if field.height_field else None,
+    )
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """Render an ImageField as a <picture> with AVIF/WebP srcsets
+
+    Usage: {% responsive_image card.image alt=card.title sizes="50vw" class="img-fluid" loading="lazy" %}
+    Falls back to a plain <img> of the original until renditions exist.
+    width/height come from the model's dimension fields, never from the file.
+    """
+    if not image:
+        return ''
+    width, height = stored_dimensions(image)
+    if width and height:
+        attrs.setdefault('width', width)
+        attrs.setdefault('height', height)
+    img = format_html('<img src="{}" alt="{}"{}>', image.url, alt, flatatt(attrs))
+    if not renditions_available(image.name):
+        return img
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((spec['mime'], rendition_srcset(image.name, fmt, width), sizes) for fmt, spec in RENDITION_FORMATS.items()),
+    )
+    return format_html('<picture>{}{}</picture>', sources, img)
@@ -0,0 +1,52 @@
+# hotel/templatetags/hotel_sections.py
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+class CachedSectionNode(template.Node):
+    def __init__(self, section, nodelist):
+        self.section = section
+        self.nodelist = nodelist
+
+    def render(self, context):
+        fragments = context.get('section_fragments')
+        if fragments is None:
+            return self.nodelist.render(context)
+
+        section = self.section.resolve(context)
+        html = fragments.get(section)
+        if html is None:
+            html = self.nodelist.render(context)
+            fragments.store(section, html)
+        return mark_safe(html)
+
+
+@register.tag
+def cached_section(parser, token):
+    """Cache a home page section, see hotel.cache.SectionFragments
+
+    Usage: {% cached_section 'faq' %}{% include 'hotel/sections/faq.html' %}{% endcached_section %}
+    Renders normally when the view passes no ``section_fragments``.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f'{bits[0]} takes a single section name')
+    nodelist = parser.parse(('endcached_section',))
+    parser.delete_first_token()
+    return CachedSectionNode(parser.compile_filter(bits[1]), nodelist)
+
+
+@register.simple_tag(takes_context=True)
+def lazy_section(context, section):
+    """Placeholder of a home page section fetched by static/js/sections.js as it nears the viewport
+
+    Usage: {% lazy_section 'faq' %}
+    """
+    return format_html(
+        '<div class="lazy-section" data-section="{}" data-section-url="{}" aria-busy="true"></div>',
+        section, reverse('section_fragment', args=[context['hotel'].slug, section]),
+    )
@@ -1,3 +1,542 @@
-from django.test import TestCase
+import json
+import tempfile
+import time
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .analytics import page_views, record_page_view
+from .availability import (
+    AVAILABILITY_VERSION_KEY, MAX_ROOMS, MAX_STAY_NIGHTS, AvailabilityIndex, RoomsUnavailable,
+    _change_key, hold_rooms, log_inventory_change, parse_stay, release_hold,
+)
+from .bundles import export_bundle, import_bundle, import_rows
+from .loaders import (
+    decode_cursor, decode_post_cursor, encode_cursor, encode_post_cursor, load_blog_index, load_hotel_directory_page,
+)
+from .models import (
+    Hotel, Card, FAQ, RoomType, RoomInventory, RoomHold, RateRule, RateCalendar, BlogPost, PageView, DailyHotelStats,
+)
+from .rates import RATE_DAYS, build_hotel_rates, compile_calendar, from_paise, stay_total, to_paise
+from .visitor import HOTEL_MEMORY, MAX_RECENT_HOTELS, MAX_SLUG_LENGTH, VISITOR_COOKIE, VISITOR_SALT, Visitor
+
+
+def create_hotel(slug='test-hotel', **fields):
+    return Hotel.objects.create(
+        name=fields.pop('name', slug.replace('-', ' ').title()), slug=slug, tagline='Tagline', address='Address',
+        phone='000', email='hotel@example.com', **fields,
+    )
+
+
+def create_room_type(hotel, name='Deluxe Room', **fields):
+    # Dimensions given so the image file is never opened
+    return RoomType.objects.create(
+        hotel=hotel, name=name, image='rooms/test.jpg', image_width=800, image_height=600, **fields,
+    )
+
+
+class ParseStayTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def test_valid_stay(self):
+        check_in = self.today + timedelta(days=3)
+        self.assertEqual(
+            parse_stay(check_in.isoformat(), (check_in + timedelta(days=2)).isoformat(), '2'),
+            (check_in, check_in + timedelta(days=2), 2),
+        )
+
+    def test_invalid_stays(self):
+        tomorrow = self.today + timedelta(days=1)
+        for check_in, check_out, rooms in [
+            ('not a date', tomorrow.isoformat(), 1),
+            (None, tomorrow.isoformat(), 1),
+            (self.today - timedelta(days=1), tomorrow, 1),
+            (tomorrow, tomorrow, 1),
+            (tomorrow, tomorrow + timedelta(days=MAX_STAY_NIGHTS + 1), 1),
+            (self.today + timedelta(days=400), self.today + timedelta(days=401), 1),
+            (tomorrow, tomorrow + timedelta(days=1), 0),
+            (tomorrow, tomorrow + timedelta(days=1), MAX_ROOMS + 1),
+            (tomorrow, tomorrow + timedelta(days=1), 'two'),
+        ]:
+            with self.subTest(check_in=check_in, check_out=check_out, rooms=rooms):
+                with self.assertRaises(ValueError):
+                    parse_stay(check_in, check_out, rooms)
+
+
+class RoomHoldTests(TestCase):
+    def setUp(self):
+        self.room_type = create_room_type(create_hotel(), total_rooms=2)
+        self.check_in = timezone.localdate() + timedelta(days=1)
+        RoomInventory.objects.bulk_create([
+            RoomInventory(room_type=self.room_type, date=self.check_in + timedelta(days=day), allotment=2)
+            for day in range(3)
+        ])
+
+    def held(self):
+        return list(RoomInventory.objects.order_by('date').values_list('held', flat=True))
+
+    def test_hold_takes_rooms_of_every_night(self):
+        hold = hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=2), 2)
+        self.assertEqual(self.held(), [2, 2, 0])
+        self.assertEqual((hold.rooms, hold.check_in), (2, self.check_in))
+
+    def test_sold_out_night_rolls_back_the_hold(self):
+        RoomInventory.objects.filter(date=self.check_in + timedelta(days=1)).update(held=1)
+        with self.assertRaises(RoomsUnavailable):
+            hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=3), 2)
+        # The nights that still had the rooms are given back with the failed hold
+        self.assertEqual(self.held(), [0, 1, 0])
+        self.assertFalse(RoomHold.objects.exists())
+
+    def test_missing_night_is_unavailable(self):
+        with self.assertRaises(RoomsUnavailable):
+            hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=4))
+        self.assertEqual(self.held(), [0, 0, 0])
+
+    def test_unavailable_room_type_cannot_be_held(self):
+        RoomType.objects.filter(pk=self.room_type.pk).update(is_available=False)
+        with self.assertRaises(RoomsUnavailable):
+            hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=1))
+
+    def test_hold_is_released_once(self):
+        first = hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=2))
+        hold_rooms(self.room_type.pk, self.check_in, self.check_in + timedelta(days=1))
+        self.assertTrue(release_hold(first.token))
+        self.assertFalse(release_hold(first.token))
+        self.assertEqual(self.held(), [1, 0, 0])
+
+
+class AvailabilityIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.room_type = create_room_type(create_hotel())
+        RoomInventory.objects.bulk_create([
+            RoomInventory(room_type=self.room_type, date=self.today + timedelta(days=day), allotment=3)
+            for day in range(10)
+        ])
+
+    def free(self, index, night):
+        return index.free[index.rows[self.room_type.pk] * index.days + (night - index.start).days]
+
+    def test_search(self):
+        index = AvailabilityIndex.build(self.today, 0)
+        RoomInventory.objects.filter(date=self.today + timedelta(days=2)).update(held=2)
+        index.reload([self.room_type.pk])
+        self.assertEqual(
+            [available for room_type, available in index.search(self.today, self.today + timedelta(days=3), 1)], [1],
+        )
+        self.assertEqual(index.search(self.today, self.today + timedelta(days=3), 2), [])
+        self.assertEqual(index.search(self.today, self.today + timedelta(days=3), 1, 'other-hotel'), [])
+
+    def test_replay_reloads_changed_room_types(self):
+        version = cache.get_or_set(AVAILABILITY_VERSION_KEY, 0, None)
+        index = AvailabilityIndex.build(self.today, version)
+        RoomInventory.objects.filter(date=self.today).update(held=3)
+        log_inventory_change(self.room_type.pk)
+
+        self.assertTrue(index.replay(version + 1))
+        self.assertEqual(index.version, version + 1)
+        self.assertEqual(self.free(index, self.today), 0)
+
+    def test_replay_needs_a_rebuild_when_the_log_is_gone(self):
+        version = cache.get_or_set(AVAILABILITY_VERSION_KEY, 0, None)
+        index = AvailabilityIndex.build(self.today, version)
+        log_inventory_change(self.room_type.pk)
+        cache.delete(_change_key(version + 1))
+        self.assertFalse(index.replay(version + 1))
+
+    def test_replay_needs_a_rebuild_after_a_change_of_everything(self):
+        version = cache.get_or_set(AVAILABILITY_VERSION_KEY, 0, None)
+        index = AvailabilityIndex.build(self.today, version)
+        log_inventory_change()
+        self.assertFalse(index.replay(version + 1))
+
+    def test_advance_shifts_and_loads_the_new_night(self):
+        index = AvailabilityIndex(self.today, 0, days=5)
+        index.load(RoomType.objects.all())
+        self.assertEqual(self.free(index, self.today + timedelta(days=4)), 3)
+        RoomInventory.objects.filter(date=self.today + timedelta(days=5)).update(held=1)
+
+        self.assertTrue(index.advance(self.today + timedelta(days=2)))
+        self.assertEqual(index.start, self.today + timedelta(days=2))
+        self.assertEqual(self.free(index, self.today + timedelta(days=2)), 3)
+        self.assertEqual(self.free(index, self.today + timedelta(days=5)), 2)
+        self.assertEqual(self.free(index, self.today + timedelta(days=6)), 3)
+
+    def test_advance_past_the_horizon_needs_a_rebuild(self):
+        index = AvailabilityIndex(self.today, 0, days=5)
+        self.assertFalse(index.advance(self.today + timedelta(days=5)))
+        self.assertFalse(index.advance(self.today - timedelta(days=1)))
+
+
+class VisitorTests(TestCase):
+    def request(self, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return request
+
+    def test_pack_round_trip(self):
+        visitor = Visitor()
+        for slug in ['goa', 'mumbai', 'h' * MAX_SLUG_LENGTH]:
+            visitor.record_visit(slug)
+        visitor.set_preference('theme', 'dark')
+        visitor.record_activity()
+
+        unpacked = Visitor.unpack(visitor.pack())
+        self.assertEqual(unpacked.as_dict(), visitor.as_dict())
+        self.assertEqual(unpacked.preferred_hotel, 'h' * MAX_SLUG_LENGTH)
+        self.assertEqual(unpacked.visit_count, 3)
+
+    def test_recent_hotels_are_capped(self):
+        visitor = Visitor()
+        for number in range(MAX_RECENT_HOTELS + 2):
+            visitor.record_visit(f'hotel-{number}')
+        self.assertEqual(Visitor.unpack(visitor.pack()).recent_hotels[0], f'hotel-{MAX_RECENT_HOTELS + 1}')
+        self.assertEqual(len(Visitor.unpack(visitor.pack()).recent_hotels), MAX_RECENT_HOTELS)
+
+    def test_oversized_string_is_left_out_not_cut(self):
+        self.assertIsNone(Visitor.unpack(Visitor(preferred_hotel='h' * 300).pack()).preferred_hotel)
+
+    def test_signed_cookie_is_read_back(self):
+        visitor = Visitor()
+        visitor.record_visit('goa')
+        response = HttpResponse()
+        visitor.save(response)
+
+        read = Visitor.from_request(self.request(**{VISITOR_COOKIE: response.cookies[VISITOR_COOKIE].value}))
+        self.assertEqual(read.preferred_hotel, 'goa')
+        self.assertEqual(read.current_hotel, 'goa')
+        self.assertFalse(read.changed)
+
+    def test_tampered_cookie_starts_afresh(self):
+        value = signing.Signer(salt=VISITOR_SALT).sign(Visitor(preferred_hotel='goa').pack())
+        for cookie in [value[:-1] + ('A' if value[-1] != 'A' else 'B'), 'garbage']:
+            with self.subTest(cookie=cookie):
+                self.assertIsNone(Visitor.from_request(self.request(**{VISITOR_COOKIE: cookie})).preferred_hotel)
+
+    def test_stale_hotels_are_forgotten(self):
+        visitor = Visitor(preferred_hotel='goa', recent_hotels=['goa'], last_visit=int(time.time()) - HOTEL_MEMORY - 1)
+        cookie = signing.Signer(salt=VISITOR_SALT).sign(visitor.pack())
+        read = Visitor.from_request(self.request(**{VISITOR_COOKIE: cookie}))
+        self.assertEqual((read.preferred_hotel, read.recent_hotels, read.changed), (None, [], True))
+
+    def test_legacy_cookies_are_migrated_and_deleted(self):
+        request = self.request(
+            preferred_hotel_slug='goa', recent_hotels='["goa", 5, "mumbai", "%s"]' % ('h' * (MAX_SLUG_LENGTH + 1)),
+            visit_count='4', theme_preference='dark', first_visit='2024-01-02T03:04:05Z',
+        )
+        visitor = Visitor.from_request(request)
+        self.assertEqual(visitor.preferred_hotel, 'goa')
+        self.assertEqual(visitor.recent_hotels, ['goa', 'mumbai'])
+        self.assertEqual((visitor.visit_count, visitor.theme), (4, 'dark'))
+        self.assertEqual(visitor.as_dict()['first_visit'], '2024-01-02T03:04:05+00:00')
+
+        response = HttpResponse()
+        visitor.save(response)
+        self.assertIn(VISITOR_COOKIE, response.cookies)
+        for name in ('preferred_hotel_slug', 'recent_hotels', 'visit_count', 'theme_preference', 'first_visit'):
+            self.assertEqual(response.cookies[name]['max-age'], 0)
+
+    def test_malformed_legacy_cookies_are_ignored(self):
+        visitor = Visitor.from_request(self.request(recent_hotels='{"a": 1}', visit_count='many'))
+        self.assertEqual((visitor.recent_hotels, visitor.visit_count), ([], 0))
+
+    def test_invalid_preference(self):
+        with self.assertRaises(ValueError):
+            Visitor().set_preference('font', 'serif')
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor('Goa Résidence', 7)), ('Goa Résidence', 7))
+
+    def test_malformed_cursors(self):
+        for cursor in ['', '!!!', encode_cursor('Goa', 1)[:-2], 'WzFd', 'MQ', 'WyJhIiwiYiJd', 'eyJhIjogMX0']:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_cursor(cursor)
+        with self.assertRaises(ValueError):
+            decode_post_cursor(encode_cursor('not a date', 1))
+
+
+class HotelDirectoryPageTests(TestCase):
+    def setUp(self):
+        # Same names, ordered by id between them
+        for slug, name in [('b', 'Beta'), ('a2', 'Alpha'), ('a1', 'Alpha'), ('c', 'Gamma'), ('d', 'Delta')]:
+            create_hotel(slug, name=name)
+        create_hotel('inactive', name='Aardvark', is_active=False)
+
+    def test_pages_walk_every_active_hotel_once(self):
+        slugs, after = [], None
+        while True:
+            page = load_hotel_directory_page({}, after, limit=2, fields=('slug',))
+            slugs += [hotel['slug'] for hotel in page['results']]
+            if page['next_cursor'] is None:
+                break
+            after = decode_cursor(page['next_cursor'])
+        self.assertEqual(slugs, list(Hotel.objects.filter(is_active=True).order_by('name', 'id').values_list('slug', flat=True)))
+        self.assertNotIn('inactive', slugs)
+
+    def test_only_the_requested_fields(self):
+        page = load_hotel_directory_page({}, limit=1, fields=('name', 'preview_image'))
+        self.assertEqual(page['results'], [{'name': 'Alpha', 'preview_image': None}])
+
+
+class BlogIndexTests(TestCase):
+    def setUp(self):
+        self.hotel = create_hotel()
+        # Several posts a day, so pages break between posts of the same date
+        for day in range(5):
+            for number in range(3):
+                BlogPost.objects.create(
+                    hotel=self.hotel, title=f'Post {day}-{number}', excerpt='Excerpt', content='Content',
+                    image='blogs/test.jpg', image_width=800, image_height=600,
+                    category='Dining' if number else 'News', published_date=date(2024, 1, 1) + timedelta(days=day),
+                )
+        BlogPost.objects.create(
+            hotel=self.hotel, title='Draft', excerpt='Excerpt', content='Content', image='blogs/test.jpg',
+            image_width=800, image_height=600, is_published=False,
+        )
+
+    def walk(self, category=None):
+        titles, after = [], None
+        while True:
+            page = load_blog_index(self.hotel.pk, after, category, limit=4)
+            titles += [post.title for post in page['posts']]
+            if page['next_cursor'] is None:
+                return titles, page
+            after = decode_post_cursor(page['next_cursor'])
+
+    def test_pages_walk_every_published_post_once(self):
+        titles, page = self.walk()
+        expected = BlogPost.objects.filter(is_published=True).order_by('-published_date', '-id')
+        self.assertEqual(titles, [post.title for post in expected])
+        self.assertEqual(page['categories'], [('Dining', 10), ('News', 5)])
+
+    def test_category_pages(self):
+        titles, page = self.walk('News')
+        self.assertEqual(titles, [f'Post {day}-0' for day in reversed(range(5))])
+
+    def test_post_cursor_round_trip(self):
+        post = BlogPost.objects.filter(is_published=True).first()
+        self.assertEqual(decode_post_cursor(encode_post_cursor(post)), (post.published_date, post.pk))
+
+
+class StateApiTests(TestCase):
+    def post(self, batch):
+        return self.client.post('/api/state/', json.dumps(batch), content_type='application/json')
+
+    def test_reads_and_writes_in_one_response(self):
+        response = self.post({
+            'write': [
+                {'op': 'set_preference', 'type': 'theme', 'value': 'dark'},
+                {'op': 'comparison', 'action': 'add', 'hotel_slug': 'goa', 'hotel_name': 'Goa'},
+            ],
+            'read': ['user', 'comparison'],
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([result['status'] for result in body['results']], ['success', 'success'])
+        self.assertEqual(body['state']['user']['theme'], 'dark')
+        self.assertEqual([hotel['slug'] for hotel in body['state']['comparison']], ['goa'])
+        self.assertIn('comparison_list', response.cookies)
+
+    def test_malformed_batches(self):
+        for batch in [[], {'read': 'user'}, {'read': [{}]}, {'read': [['user']]}, {'write': {}}, {'read': ['nope']},
+                      {'write': [{'op': 'clear_preferences'}] * 21}]:
+            with self.subTest(batch=batch):
+                self.assertEqual(self.post(batch).status_code, 400)
+        self.assertEqual(self.client.post('/api/state/', 'not json', content_type='application/json').status_code, 400)
+
+    def test_invalid_writes_fail_alone(self):
+        response = self.post({'write': [
+            {'op': 'set_preference', 'type': 'theme', 'value': ['a']},
+            {'op': 'set_preference', 'type': 'font', 'value': 'serif'},
+            {'op': 'comparison', 'action': 'add', 'hotel_slug': None},
+            {'op': 'comparison', 'action': 'add', 'hotel_slug': ''},
+            {'op': 'comparison', 'action': 'remove', 'hotel_slug': {}},
+            {'op': 'comparison', 'action': 'add', 'hotel_slug': 'goa', 'hotel_name': 5},
+            {'op': 'save_booking', 'data': {'check_in': '2030-01-01'}},
+            {'op': 'unknown'},
+            'not an object',
+            {'op': 'consent', 'type': 'analytics', 'granted': True},
+        ], 'read': ['user', 'comparison']})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([result['status'] for result in body['results']], ['error'] * 9 + ['success'])
+        self.assertEqual(body['state']['user']['theme'], 'light')
+        self.assertEqual(body['state']['comparison'], [])
+        self.assertNotIn('comparison_list', response.cookies)
+
+    def test_get_reads_state(self):
+        response = self.client.get('/api/state/?read=consent')
+        self.assertEqual(list(response.json()['state']), ['consent'])
+        self.assertEqual(self.client.get('/api/state/?read=consent,nope').status_code, 400)
+
+
+class BundleTests(TestCase):
+    def setUp(self):
+        self.hotel = create_hotel('goa')
+        self.card = Card.objects.create(
+            hotel=self.hotel, title='Spa', category='general', description='Original', order=3,
+            image='cards/spa.jpg', image_width=800, image_height=600,
+        )
+        FAQ.objects.create(hotel=self.hotel, question='Parking?', answer='Yes')
+        self.room_type = create_room_type(self.hotel, price_per_night='1000.00')
+        RateCalendar.objects.create(room_type=self.room_type, start=timezone.localdate(), prices=b'')
+
+    def round_trip(self, format):
+        with tempfile.TemporaryDirectory() as path:
+            counts, copied, errors = export_bundle(path, format, media=False)
+            self.assertEqual((counts['hotel'], counts['card'], counts['faq'], counts['roomtype']), (1, 1, 1, 1))
+            Card.objects.filter(pk=self.card.pk).update(description='Edited', order=9)
+            FAQ.objects.all().delete()
+            importer, missing = import_bundle(path, media=False)
+        return importer
+
+    def test_round_trip_updates_rows_in_place(self):
+        for format in ('jsonl', 'csv'):
+            with self.subTest(format=format):
+                importer = self.round_trip(format)
+                self.assertEqual(importer.updated['card'], 1)
+                self.assertEqual(importer.created['faq'], 1)
+                card = Card.objects.get()
+                self.assertEqual((card.pk, card.description, card.order), (self.card.pk, 'Original', 3))
+                self.assertEqual(FAQ.objects.get().answer, 'Yes')
+                self.assertEqual(Hotel.objects.count(), 1)
+
+    def test_missing_fields_get_their_defaults(self):
+        import_rows([(Card, {'hotel': 'goa', 'category': 'general', 'title': 'Spa', 'image': 'cards/spa.jpg',
+                             'image_width': 800, 'image_height': 600}, 'rows:1')])
+        card = Card.objects.get()
+        self.assertEqual((card.pk, card.description, card.order), (self.card.pk, '', 0))
+
+    def test_import_refreshes_versions_and_rates(self):
+        content_version = Hotel.objects.get().content_version
+        import_rows([(RoomType, {'hotel': 'goa', 'name': 'Deluxe Room', 'image': 'rooms/test.jpg',
+                                 'image_width': 800, 'image_height': 600, 'price_per_night': '1500.00'}, 'rows:1')])
+        self.assertGreater(Hotel.objects.get().content_version, content_version)
+        self.assertFalse(RateCalendar.objects.exists())
+        self.assertEqual(RoomType.objects.get().price_per_night, Decimal('1500.00'))
+
+    def test_invalid_rows_name_their_location(self):
+        for row, message in [
+            ({'hotel': 'goa', 'question': 'Wifi?', 'answer': 'Yes', 'colour': 'red'}, 'rows:1: unknown faq fields colour'),
+            ({'hotel': 'nowhere', 'question': 'Wifi?', 'answer': 'Yes'}, "rows:1: unknown hotel 'nowhere'"),
+            ({'hotel': 'goa', 'question': 'Wifi?', 'answer': 'Yes', 'order': 'first'}, 'rows:1: order:'),
+        ]:
+            with self.subTest(row=row):
+                with self.assertRaisesMessage(ValueError, message):
+                    import_rows([(FAQ, row, 'rows:1')])
+        self.assertEqual(FAQ.objects.count(), 1)
+
+    def test_duplicate_natural_keys_are_rejected(self):
+        rows = [
+            (Card, {'hotel': 'goa', 'category': 'general', 'title': 'Pool', 'description': description,
+                    'image': 'cards/pool.jpg', 'image_width': 800, 'image_height': 600}, f'rows:{number}')
+            for number, description in enumerate(['first', 'second'], 1)
+        ]
+        # Within a batch and across batches
+        for batch_size in (10, 1):
+            with self.subTest(batch_size=batch_size):
+                with self.assertRaisesMessage(ValueError, "rows:2: duplicate card hotel='goa', category='general', title='Pool'"):
+                    import_rows(rows, batch_size=batch_size)
+
+
+class RateTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.room_type = create_room_type(create_hotel(), price_per_night='999.99')
+
+    def prices(self, first=0, nights=14):
+        calendar = RateCalendar.objects.get(room_type=self.room_type)
+        prices = array('q')
+        prices.frombytes(calendar.prices)
+        return [from_paise(price) for price in prices[first:first + nights]]
+
+    def test_paise_rounding(self):
+        self.assertEqual(to_paise('10.005'), 1001)
+        self.assertEqual((from_paise(112499), from_paise(5), from_paise(-1)), ('1124.99', '0.05', None))
+
+    def test_price_and_percent_rules_on_weekdays(self):
+        RateRule.objects.create(room_type=self.room_type, name='Weekend', value='2000', weekdays='fri,sat')
+        RateRule.objects.create(room_type=self.room_type, name='Saturday', kind='percent', value='12.5',
+                                weekdays='sat', priority=1)
+        RateRule.objects.create(room_type=self.room_type, name='Monday', kind='percent', value='12.5', weekdays='Monday')
+        compile_calendar(self.room_type, today=self.today)
+
+        prices = self.prices(nights=7)
+        expected = {0: '1124.99', 4: '2000.00', 5: '2250.00'}
+        for day, price in enumerate(prices):
+            night = self.today + timedelta(days=day)
+            self.assertEqual(price, expected.get(night.weekday(), '999.99'), night)
+
+    def test_rule_changes_recompile_their_old_and_new_nights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = RateRule.objects.create(
+                room_type=self.room_type, name='Festival', value='1500',
+                start_date=self.today + timedelta(days=2), end_date=self.today + timedelta(days=3),
+            )
+        self.assertEqual(self.prices(nights=6), ['999.99'] * 2 + ['1500.00'] * 2 + ['999.99'] * 2)
+
+        rule.start_date, rule.end_date = self.today + timedelta(days=4), self.today + timedelta(days=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.save()
+        self.assertEqual(self.prices(nights=7), ['999.99'] * 4 + ['1500.00'] * 2 + ['999.99'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.delete()
+        self.assertEqual(self.prices(nights=7), ['999.99'] * 7)
+
+    def test_window_moves_forward(self):
+        last_night = self.today + timedelta(days=RATE_DAYS)
+        RateRule.objects.create(room_type=self.room_type, name='New Year', value='5000', start_date=last_night)
+        compile_calendar(self.room_type, today=self.today)
+        self.assertEqual(self.prices(RATE_DAYS - 1, 1), ['999.99'])
+
+        # Shifted by one night, only the night new to the window is compiled
+        calendar = compile_calendar(self.room_type, (), today=self.today + timedelta(days=1))
+        self.assertEqual(calendar.start, self.today + timedelta(days=1))
+        self.assertEqual(len(calendar.prices), RATE_DAYS * 8)
+        self.assertEqual(self.prices(RATE_DAYS - 2, 2), ['999.99', '5000.00'])
+
+    def test_stay_totals(self):
+        RoomType.objects.filter(pk=self.room_type.pk).update(price_per_night=None)
+        RateRule.objects.create(room_type=self.room_type, name='Opening', value='1200.50',
+                                start_date=self.today, end_date=self.today + timedelta(days=2))
+        rates = build_hotel_rates(self.room_type.hotel.slug, self.today)
+        room_type = rates['room_types'][0]
+        self.assertEqual(stay_total(rates, room_type, self.today, self.today + timedelta(days=3)), 360150)
+        self.assertEqual(stay_total(rates, room_type, self.today + timedelta(days=1), self.today + timedelta(days=2)), 120050)
+        # The fourth night has no price
+        self.assertIsNone(stay_total(rates, room_type, self.today, self.today + timedelta(days=4)))
+
+
+class PageViewTests(TransactionTestCase):
+    """The writer thread needs the rows committed, TestCase keeps them in its transaction"""
+
+    def test_views_are_stored_and_rolled_up(self):
+        hotel = create_hotel()
+        # Two visitors, both new on their first view
+        for is_new_visitor in (True, False, True):
+            record_page_view(hotel.pk, is_new_visitor)
+        page_views.flush()
+        self.assertEqual(PageView.objects.count(), 3)
+        self.assertEqual(PageView.objects.filter(is_new_visitor=True).count(), 2)
+        stats = DailyHotelStats.objects.get()
+        self.assertEqual((stats.date, stats.views, stats.new_visitors), (timezone.localdate(), 3, 2))
+
+        # The same day again adds to its row
+        record_page_view(hotel.pk)
+        page_views.flush()
+        stats = DailyHotelStats.objects.get()
+        self.assertEqual((stats.views, stats.new_visitors), (4, 2))
+        self.assertEqual(PageView.objects.count(), 4)
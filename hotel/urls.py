@@ -1,13 +1,28 @@
 # hotel/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# Served through ASGI (orchid_hotel/asgi.py) the pages use the async views
+pages = async_views if settings.HOTEL_ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home_default'),
-    path('<slug:hotel_slug>/', views.home, name='home_with_slug'),
-    path('hotels/list/', views.hotel_list, name='hotel_list'),
+    path('', pages.home, name='home_default'),
+    path('<slug:hotel_slug>/', pages.home, name='home_with_slug'),
+    path('hotels/list/', pages.hotel_list, name='hotel_list'),
+    path('<slug:hotel_slug>/section/<slug:section>/', views.section_fragment, name='section_fragment'),
+    path('<slug:hotel_slug>/blog/', views.blog_index, name='blog_index'),
+    path('<slug:hotel_slug>/blog/<int:post_id>/', views.blog_post, name='blog_post'),
+    path('api/hotels/', views.hotel_directory_api, name='hotel_directory_api'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/state/', views.state_api, name='state_api'),
+    path('api/compare/', views.compare_api, name='compare_api'),
+    path('api/availability/', views.availability_api, name='availability_api'),
+    path('api/availability/hold/', views.hold_api, name='hold_api'),
+    path('api/rates/', views.rates_api, name='rates_api'),
+    path('metrics', views.metrics, name='metrics'),
 
-     # Cookie and storage API endpoints
+     # Single purpose cookie and storage endpoints, superseded by api/state/
     path('api/set-preference/', views.set_preference, name='set_preference'),
     path('api/clear-preferences/', views.clear_preferences, name='clear_preferences'),
     path('api/get-user-data/', views.get_user_data, name='get_user_data'),
@@ -1,286 +1,676 @@
 # views.py
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.http import HttpResponse, Http404
+from django.middleware.csrf import get_token
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from .models import *
+from .cache import (
+    get_cached_page, cache_page, get_default_slug, get_page_version, get_directory_version,
+    get_hotel_directory_page, get_comparison_version, get_comparison, get_blog_page,
+    conditional_validators, SectionFragments,
+)
+from .loaders import (
+    HOME_QUERY_BUDGET, HOME_SECTIONS, EAGER_SECTIONS, DIRECTORY_PAGE_SIZE, MAX_DIRECTORY_PAGE_SIZE, DIRECTORY_FIELDS, HOTEL_API_FIELDS,
+    hotel_page_queryset, build_home_context, query_budget, encode_cursor, decode_cursor, decode_post_cursor,
+    load_blog_index, load_blog_post,
+)
+from .analytics import record_page_view
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, request_metrics
+from .availability import RoomsUnavailable, parse_stay, find_available_rooms, hold_rooms, release_hold
+from .rates import RATE_DAYS, parse_month, parse_rate_stay, get_hotel_rates, month_nights, stay_total, from_paise
+from .client_state import ClientState, STATE_READS, STATE_WRITES, MAX_STATE_WRITES, MAX_COMPARISON_HOTELS
+from .search import SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE, search, search_available
 import json
-from datetime import datetime, timedelta
-from django.utils import timezone
+import uuid
+from urllib.parse import quote, urlencode
+
+# Hotel cards on the hotel list page
+HOTEL_LIST_FIELDS = ('slug', 'name', 'tagline', 'address', 'phone')
+
+# Public JSON responses may be reused by browsers and proxies for a minute
+API_CACHE_SECONDS = 60
 
 def home(request, hotel_slug=None):
-    # Check for preferred hotel in cookies if no slug provided
-    preferred_hotel_slug = request.COOKIES.get('preferred_hotel_slug')
+    # Without a slug the visitor's preferred hotel is shown
+    visitor = request.visitor
+    is_first_visit = visitor.first_visit is None
     
-    # Check for recent hotels in cookies
-    recent_hotels_json = request.COOKIES.get('recent_hotels', '[]')
-    try:
-        recent_hotels = json.loads(recent_hotels_json)
-        if not isinstance(recent_hotels, list):
-            recent_hotels = []
-    except (json.JSONDecodeError, TypeError):
-        recent_hotels = []
-    
-    # Track this visit
-    first_visit = request.COOKIES.get('first_visit')
-    if not first_visit:
-        first_visit = timezone.now().isoformat()
-    
-    # Determine which hotel to show
-    if hotel_slug:
-        hotel = get_object_or_404(Hotel, slug=hotel_slug, is_active=True)
-        
-        # Update recent hotels
-        if hotel_slug not in recent_hotels:
-            recent_hotels.insert(0, hotel_slug)
-            # Keep only last 5 hotels
-            recent_hotels = recent_hotels[:5]
-    elif preferred_hotel_slug:
-        # Try to use preferred hotel from cookie
-        try:
-            hotel = Hotel.objects.get(slug=preferred_hotel_slug, is_active=True)
-        except Hotel.DoesNotExist:
-            # Fallback to first active hotel
-            hotel = Hotel.objects.filter(is_active=True).first()
-            if not hotel:
-                # Handle case with no hotels
-                return render(request, 'hotel/no_hotels.html')
-    else:
+    # Determine which hotel to show from the cached version stamps
+    slug = hotel_slug or visitor.preferred_hotel
+    version = get_page_version(slug) if slug else None
+    if version is None:
+        if hotel_slug:
+            raise Http404('No active hotel matches the given slug.')
         # Fallback to first active hotel
-        hotel = Hotel.objects.filter(is_active=True).first()
-        if not hotel:
+        slug = get_default_slug()
+        version = get_page_version(slug) if slug else None
+        if version is None:
             # Handle case with no hotels
             return render(request, 'hotel/no_hotels.html')
     
-    # Prepare context
-    context = {
+    record_visit(request, version['hotel_id'], slug, hotel_slug)
+    
+    # Answer revalidation requests before any cache or template work
+    page_url = request.build_absolute_uri()
+    etag, last_modified = conditional_validators(version, page_url)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    
+    if response is None:
+        # Serve the cached page body when we have one, the visitor cookie is set by the middleware
+        content = get_cached_page(slug, page_url, version)
+        if content is not None:
+            response = HttpResponse(content)
+        else:
+            # Only sections without a current cached fragment load their content,
+            # the sections below the fold are loaded by the browser (section_fragment)
+            fragments = SectionFragments(version['hotel_id'], EAGER_SECTIONS)
+            with query_budget(HOME_QUERY_BUDGET, 'home'):
+                hotel = get_object_or_404(hotel_page_queryset(fragments.missing), slug=slug)
+                
+                # Prepare context from the prefetched hotel content
+                context = build_home_context(hotel, fragments.missing)
+                directory = get_hotel_directory_page()
+                context.update({
+                    'section_fragments': fragments,
+                    'all_hotels': directory['results'],
+                    'all_hotels_next_cursor': directory['next_cursor'],
+                    'recent_hotels': visitor.recent_hotels,
+                    'is_first_visit': is_first_visit,
+                })
+                
+                # Create response
+                response = render(request, 'hotel/index.html', context)
+            
+            cache_page(slug, page_url, response.content, version)
+    
+    set_validators(response, etag, last_modified)
+    if not hotel_slug:
+        # The hotel shown without a slug depends on the visitor cookie
+        patch_vary_headers(response, ['Cookie'])
+    
+    return response
+
+def set_validators(response, etag, last_modified, **cache_control):
+    """Attach ETag/Last-Modified, by default asking caches to revalidate on every use"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, **(cache_control or {'no_cache': True}))
+
+def record_visit(request, hotel_id, slug, hotel_slug):
+    """Track a hotel page view in the analytics and on the visitor cookie"""
+    if getattr(request, 'is_prerender', False):
+        # Rendered for the static site export, nobody visited
+        return
+    
+    record_page_view(hotel_id, is_new_visitor=request.visitor.first_visit is None)
+    
+    # Only hotels opened by their own URL count as recently visited
+    request.visitor.record_visit(slug, recent=bool(hotel_slug))
+    
+    # Preferences can also be set from links, e.g. ?theme_preference=dark
+    for preference in ('theme', 'language'):
+        value = request.GET.get(f'{preference}_preference')
+        if value is not None:
+            request.visitor.set_preference(preference, value)
+
+def hotel_list(request):
+    """View to list all active hotels"""
+    # The page header and footer show the preferred hotel, or the first active one
+    preferred_hotel_slug = request.visitor.preferred_hotel
+    
+    # Answer revalidation requests before any template work
+    page_url = request.build_absolute_uri()
+    etag, last_modified = conditional_validators(get_directory_version(), f'{page_url}|{preferred_hotel_slug}')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    
+    if response is None:
+        hotel = None
+        if preferred_hotel_slug:
+            hotel = Hotel.objects.filter(is_active=True, slug=preferred_hotel_slug).first()
+        
+        # Only the first page of hotels is rendered, the rest load from /api/hotels/ on scroll
+        hotels = get_hotel_directory_page(fields=HOTEL_LIST_FIELDS)
+        directory = get_hotel_directory_page()
+        
+        hotel = hotel or Hotel.objects.filter(is_active=True).first()
+        if hotel is None:
+            return render(request, 'hotel/no_hotels.html')
+        
+        response = render(request, 'hotel/hotel_list.html', hotel_list_context(request, hotel, hotels, directory))
+    
+    finish_hotel_list(request, response, etag, last_modified)
+    return response
+
+def hotel_list_context(request, hotel, hotels, directory):
+    """Template context of the hotel list page"""
+    visit_data = request.visitor.as_dict()
+    return {
         'hotel': hotel,
-        'carousel_slides': CarouselSlide.objects.filter(hotel=hotel, is_active=True),
-        'main_info': MainInfo.objects.filter(hotel=hotel).first(),
-        'gallery_cards': Card.objects.filter(hotel=hotel, category='gallery', is_active=True),
-        'general_cards': Card.objects.filter(hotel=hotel, category='general', is_active=True),
-        'special_offers': Card.objects.filter(hotel=hotel, category='special_offers', is_active=True),
-        'room_types': RoomType.objects.filter(hotel=hotel, is_available=True),
-        'wedding_section': SectionContent.objects.filter(hotel=hotel, section_type='wedding', is_active=True).first(),
-        'banquet_section': SectionContent.objects.filter(hotel=hotel, section_type='banquet', is_active=True).first(),
-        'restaurant_section': SectionContent.objects.filter(hotel=hotel, section_type='restaurant', is_active=True).first(),
-        'faq_section': SectionContent.objects.filter(hotel=hotel, section_type='faq', is_active=True).first(),
-        'faqs': FAQ.objects.filter(hotel=hotel, is_active=True),
-        'blog_posts': BlogPost.objects.filter(hotel=hotel, is_published=True)[:3],
-        'all_hotels': Hotel.objects.filter(is_active=True),
-        'recent_hotels': recent_hotels,
-        'is_first_visit': not bool(request.COOKIES.get('first_visit')),
+        'hotels': hotels['results'],
+        'hotels_next_cursor': hotels['next_cursor'],
+        'hotel_list_fields': ','.join(HOTEL_LIST_FIELDS),
+        'all_hotels': directory['results'],
+        'all_hotels_next_cursor': directory['next_cursor'],
+        # Set of recent hotels for quick lookup
+        'recent_hotel_slugs': set(request.visitor.recent_hotels),
+        'visit_count': request.visitor.visit_count,
+        'first_visit': visit_data['first_visit'],
+        'last_visit': visit_data['last_visit'],
     }
+
+def finish_hotel_list(request, response, etag, last_modified):
+    """Validators of a hotel list response, and the visitor's last activity"""
+    set_validators(response, etag, last_modified)
+    patch_vary_headers(response, ['Cookie'])
+    request.visitor.record_activity()
+
+def section_fragment(request, hotel_slug, section):
+    """One home page section of a hotel as an HTML fragment, for static/js/sections.js
+
+    GET /<hotel>/section/faq/
+    Shares the cached fragments of the home page, and may be reused by
+    browsers and proxies for a minute.
+    """
+    if section not in HOME_SECTIONS:
+        raise Http404('No such section.')
+    version = get_page_version(hotel_slug)
+    if version is None:
+        raise Http404('No active hotel matches the given slug.')
     
-    # Create response
-    response = render(request, 'hotel/index.html', context)
-    
-    # Set cookies
-    # Set current hotel as preferred (30 days expiry)
-    response.set_cookie(
-        'preferred_hotel_slug',
-        hotel.slug,
-        max_age=30*24*60*60,  # 30 days
-        httponly=True,
-        samesite='Lax',
-        secure=False  # Set to True in production with HTTPS
-    )
+    etag, last_modified = conditional_validators(version, request.build_absolute_uri())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        fragments = SectionFragments(version['hotel_id'], [section])
+        html = fragments.get(section)
+        if html is None:
+            hotel = get_object_or_404(hotel_page_queryset([section]), pk=version['hotel_id'])
+            html = render_to_string(f'hotel/sections/{section}.html', build_home_context(hotel, [section]), request)
+            fragments.store(section, html)
+        response = HttpResponse(html)
     
-    # Set current hotel slug cookie for immediate use
-    response.set_cookie(
-        'current_hotel_slug',
-        hotel.slug,
-        max_age=24*60*60,  # 1 day
-        httponly=False,  # Allow JS access
-        samesite='Lax'
-    )
+    set_validators(response, etag, last_modified, public=True, max_age=API_CACHE_SECONDS)
+    return response
+
+def blog_index(request, hotel_slug):
+    """Published posts of a hotel, newest first, optionally of one category
+
+    GET /<hotel>/blog/?category=Dining&after=<cursor>
+    """
+    version = get_page_version(hotel_slug)
+    if version is None:
+        raise Http404('No active hotel matches the given slug.')
+    category = request.GET.get('category') or None
+    after = None
+    if request.GET.get('after'):
+        try:
+            after = decode_post_cursor(request.GET['after'])
+        except ValueError:
+            raise Http404('Invalid page cursor')
+    query = {}
+    if category:
+        query['category'] = category
+    if after:
+        query['after'] = encode_cursor(after[0].isoformat(), after[1])
     
-    # Update recent hotels cookie
-    response.set_cookie(
-        'recent_hotels',
-        json.dumps(recent_hotels),
-        max_age=30*24*60*60,  # 30 days
-        httponly=True,
-        samesite='Lax'
-    )
+    def render_page():
+        blog = load_blog_index(version['hotel_id'], after, category)
+        if category and category not in dict(blog['categories']):
+            raise Http404('No posts in this category.')
+        directory = get_hotel_directory_page()
+        return render(request, 'hotel/blog_index.html', {
+            **blog,
+            'category': category,
+            'is_first_page': after is None,
+            'all_hotels': directory['results'],
+            'all_hotels_next_cursor': directory['next_cursor'],
+        }).content
     
-    # Set first visit cookie if not set
-    if not request.COOKIES.get('first_visit'):
-        response.set_cookie(
-            'first_visit',
-            first_visit,
-            max_age=365*24*60*60,  # 1 year
-            httponly=True,
-            samesite='Lax'
+    return blog_response(request, version, query, render_page)
+
+def blog_post(request, hotel_slug, post_id):
+    """One published post of a hotel, its HTML rendered when it was saved"""
+    version = get_page_version(hotel_slug)
+    if version is None:
+        raise Http404('No active hotel matches the given slug.')
+    
+    def render_page():
+        post = load_blog_post(version['hotel_id'], post_id)
+        if post is None:
+            raise Http404('No published post matches the given id.')
+        directory = get_hotel_directory_page()
+        return render(request, 'hotel/blog_post.html', {
+            'hotel': post.hotel,
+            'post': post,
+            'all_hotels': directory['results'],
+            'all_hotels_next_cursor': directory['next_cursor'],
+        }).content
+    
+    return blog_response(request, version, {}, render_page)
+
+def blog_response(request, version, query, render_page):
+    """Blog page validated and cached under the hotel's page version, like the home page
+
+    ``query`` holds the parameters the page is rendered from. Other query
+    strings are redirected to them first, so every cached page is one the
+    blog links to rather than one per made-up URL.
+    """
+    # Quoted like the urlencode filter of the blog templates' links
+    path = request.path + ('?' + urlencode(query, safe='/', quote_via=quote) if query else '')
+    if request.get_full_path() != path:
+        return redirect(path, permanent=True)
+    page_url = request.build_absolute_uri()
+    etag, last_modified = conditional_validators(version, page_url)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(get_blog_page(version, page_url, render_page))
+    set_validators(response, etag, last_modified)
+    return response
+
+def hotel_directory_api(request):
+    """Paginated JSON list of active hotels
+
+    GET /api/hotels/?cursor=<next_cursor>&limit=20&fields=slug,name,tagline
+    Pages are keyed on (name, id) so every page costs the same to load.
+    """
+    if request.method != 'GET':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
         )
     
-    # Set last visit cookie
-    response.set_cookie(
-        'last_visit',
-        timezone.now().isoformat(),
-        max_age=30*24*60*60,  # 30 days
-        httponly=True,
-        samesite='Lax'
-    )
+    # Answer revalidation requests before touching the database
+    etag, last_modified = conditional_validators(get_directory_version(), request.get_full_path())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    
+    if response is None:
+        try:
+            cursor = request.GET.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            limit = min(max(int(request.GET.get('limit', DIRECTORY_PAGE_SIZE)), 1), MAX_DIRECTORY_PAGE_SIZE)
+            fields = tuple(request.GET['fields'].split(',')) if request.GET.get('fields') else DIRECTORY_FIELDS
+            if not set(fields) <= set(HOTEL_API_FIELDS):
+                raise ValueError(f'Unknown fields, choose from {", ".join(HOTEL_API_FIELDS)}')
+        except ValueError as exc:
+            return HttpResponse(
+                json.dumps({'status': 'error', 'message': str(exc)}),
+                content_type='application/json',
+                status=400
+            )
+        
+        page = get_hotel_directory_page(after, limit, fields)
+        response = HttpResponse(
+            json.dumps({'status': 'success', **page}),
+            content_type='application/json'
+        )
+    
+    set_validators(response, etag, last_modified, public=True, max_age=API_CACHE_SECONDS)
+    return response
+
+def compare_api(request):
+    """Side by side details of up to three hotels: rooms and prices, sections, FAQs and contacts
+
+    GET /api/compare/?slugs=<slug>,<slug>,<slug>
+    """
+    if request.method != 'GET':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
+        )
+    
+    slugs = list(dict.fromkeys(slug.strip() for slug in request.GET.get('slugs', '').split(',') if slug.strip()))
+    if not 1 <= len(slugs) <= MAX_COMPARISON_HOTELS:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': f'slugs must list 1 to {MAX_COMPARISON_HOTELS} hotels'}),
+            content_type='application/json',
+            status=400
+        )
+    
+    # Cached per set of hotels, whatever order they are asked in
+    version = get_comparison_version(sorted(slugs))
+    etag, last_modified = conditional_validators(version, request.get_full_path())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    
+    if response is None:
+        hotels = get_comparison(sorted(slugs), version)
+        response = HttpResponse(
+            json.dumps({
+                'status': 'success',
+                'hotels': [hotels[slug] for slug in slugs if slug in hotels],
+                'missing': [slug for slug in slugs if slug not in hotels],
+            }),
+            content_type='application/json'
+        )
+    
+    set_validators(response, etag, last_modified, public=True, max_age=API_CACHE_SECONDS)
+    return response
+
+def search_api(request):
+    """Ranked full-text search over hotels, rooms, sections, FAQs and blog posts
+
+    GET /api/search/?q=<text>&hotel=<slug>&limit=20
+    """
+    if request.method != 'GET':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
+        )
+    
+    if not search_available():
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Search is not available'}),
+            content_type='application/json',
+            status=503
+        )
+    
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), MAX_SEARCH_PAGE_SIZE)
+    except ValueError:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'limit must be a number'}),
+            content_type='application/json',
+            status=400
+        )
     
-    # Set visit count
-    visit_count = int(request.COOKIES.get('visit_count', 0)) + 1
-    response.set_cookie(
-        'visit_count',
-        str(visit_count),
-        max_age=365*24*60*60,  # 1 year
-        httponly=True,
-        samesite='Lax'
+    response = HttpResponse(
+        json.dumps({
+            'status': 'success',
+            'query': query,
+            'results': search(query, request.GET.get('hotel'), limit),
+        }),
+        content_type='application/json'
     )
+    patch_cache_control(response, public=True, max_age=API_CACHE_SECONDS)
+    return response
+
+def state_api(request):
+    """Batched visitor state, one round trip for any number of reads and writes
+
+    GET /api/state/?read=user,consent,booking,comparison
+    POST /api/state/ {"write": [{"op": "set_preference", "type": "theme", "value": "dark"}, ...],
+                      "read": ["user", "comparison"]}
+    Writes run in order and the reads see their result. All cookie changes
+    come back on this one response. GET also hands out the CSRF cookie POSTs need.
+    """
+    if request.method == 'GET':
+        reads = [key for key in request.GET.get('read', '').split(',') if key] or list(STATE_READS)
+        writes = []
+    elif request.method == 'POST':
+        try:
+            batch = json.loads(request.body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            batch = None
+        if (not isinstance(batch, dict) or not isinstance(batch.get('read', []), list)
+                or not all(isinstance(key, str) for key in batch.get('read', []))
+                or not isinstance(batch.get('write', []), list)):
+            return HttpResponse(
+                json.dumps({'status': 'error', 'message': 'Expected a JSON object with "read" (names) and "write" lists'}),
+                content_type='application/json',
+                status=400
+            )
+        reads = batch.get('read', [])
+        writes = batch.get('write', [])
+    else:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
+        )
     
-    # Set user preferences cookies if they exist in request
-    if 'theme_preference' in request.GET:
-        response.set_cookie(
-            'theme_preference',
-            request.GET.get('theme_preference'),
-            max_age=365*24*60*60,
-            httponly=False,
-            samesite='Lax'
+    unknown = [key for key in reads if key not in STATE_READS]
+    if unknown or len(writes) > MAX_STATE_WRITES:
+        message = (f'Unknown state {", ".join(map(str, unknown))}, choose from {", ".join(STATE_READS)}' if unknown
+                   else f'At most {MAX_STATE_WRITES} writes per request')
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': message}),
+            content_type='application/json',
+            status=400
         )
     
-    if 'language_preference' in request.GET:
-        response.set_cookie(
-            'language_preference',
-            request.GET.get('language_preference'),
-            max_age=365*24*60*60,
-            httponly=False,
-            samesite='Lax'
+    state = ClientState(request)
+    results = []
+    for write in writes:
+        operation = STATE_WRITES.get(write.get('op')) if isinstance(write, dict) else None
+        if operation is None:
+            results.append({'status': 'error', 'message': f'Unknown operation, choose from {", ".join(STATE_WRITES)}'})
+            continue
+        try:
+            results.append({'status': 'success', **operation(state, write)})
+        except ValueError as exc:
+            results.append({'status': 'error', 'message': str(exc)})
+    
+    response = HttpResponse(
+        json.dumps({
+            'status': 'success',
+            'results': results,
+            'state': {key: STATE_READS[key](state) for key in reads},
+        }),
+        content_type='application/json'
+    )
+    add_never_cache_headers(response)
+    get_token(request)
+    return state.apply(response)
+
+def availability_api(request):
+    """Room types with enough rooms free on every night of a stay, across all hotels
+
+    GET /api/availability/?check_in=2026-11-01&check_out=2026-11-03&rooms=1&hotel=<slug>
+    """
+    if request.method != 'GET':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
         )
     
+    try:
+        check_in, check_out, rooms = parse_stay(
+            request.GET.get('check_in'), request.GET.get('check_out'), request.GET.get('rooms', 1)
+        )
+    except ValueError as exc:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': str(exc)}),
+            content_type='application/json',
+            status=400
+        )
+    
+    response = HttpResponse(
+        json.dumps({
+            'status': 'success',
+            'check_in': check_in.isoformat(),
+            'check_out': check_out.isoformat(),
+            'rooms': rooms,
+            'results': find_available_rooms(check_in, check_out, rooms, request.GET.get('hotel')),
+        }),
+        content_type='application/json'
+    )
+    patch_cache_control(response, no_cache=True)
     return response
 
-def hotel_list(request):
-    """View to list all active hotels"""
-    hotels = Hotel.objects.filter(is_active=True)
+def hold_api(request):
+    """Hold rooms while the visitor books, or release a hold
+
+    POST /api/availability/hold/ {"room_type": 3, "check_in": "2026-11-01", "check_out": "2026-11-03", "rooms": 1}
+    POST /api/availability/hold/ {"release": "<token>"}
+    """
+    if request.method != 'POST':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
+        )
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid JSON data'}),
+            content_type='application/json',
+            status=400
+        )
+    
+    if 'release' in data:
+        released = release_hold(data['release']) if is_uuid(data['release']) else False
+        return HttpResponse(
+            json.dumps({'status': 'success', 'released': released}),
+            content_type='application/json'
+        )
     
-    # Get recent hotels from cookies
-    recent_hotels_json = request.COOKIES.get('recent_hotels', '[]')
     try:
-        recent_hotels = json.loads(recent_hotels_json)
-        if not isinstance(recent_hotels, list):
-            recent_hotels = []
-    except (json.JSONDecodeError, TypeError):
-        recent_hotels = []
-    
-    # Create a dictionary of recent hotels for quick lookup
-    recent_hotel_slugs = set(recent_hotels)
-    
-    # Get visit count
-    visit_count = int(request.COOKIES.get('visit_count', 0))
-    
-    context = {
-        'hotels': hotels,
-        'recent_hotel_slugs': recent_hotel_slugs,
-        'visit_count': visit_count,
-        'first_visit': request.COOKIES.get('first_visit'),
-        'last_visit': request.COOKIES.get('last_visit'),
-    }
+        room_type_id = int(data.get('room_type'))
+    except (TypeError, ValueError):
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'room_type must be a room type id'}),
+            content_type='application/json',
+            status=400
+        )
     
-    # Create response with cookie updates
-    response = render(request, 'hotel/hotel_list.html', context)
+    try:
+        hold = hold_rooms(room_type_id, data.get('check_in'), data.get('check_out'), data.get('rooms', 1))
+    except ValueError as exc:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': str(exc)}),
+            content_type='application/json',
+            status=400
+        )
+    except RoomsUnavailable as exc:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': str(exc)}),
+            content_type='application/json',
+            status=409
+        )
     
-    # Update last activity timestamp
-    response.set_cookie(
-        'last_activity',
-        timezone.now().isoformat(),
-        max_age=30*24*60*60,
-        httponly=True,
-        samesite='Lax'
+    return HttpResponse(
+        json.dumps({
+            'status': 'success',
+            'token': str(hold.token),
+            'expires_at': hold.expires_at.isoformat(),
+        }),
+        content_type='application/json',
+        status=201
     )
+
+def rates_api(request):
+    """Nightly rates of a hotel's room types for a month, and optionally the total of a stay
+
+    GET /api/rates/?hotel=<slug>&month=2026-11&check_in=2026-11-01&check_out=2026-11-03
+    """
+    if request.method != 'GET':
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Invalid request method'}),
+            content_type='application/json',
+            status=400
+        )
+    
+    rates = get_hotel_rates(request.GET.get('hotel', ''))
+    if rates is None:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': 'Hotel not found'}),
+            content_type='application/json',
+            status=404
+        )
+    
+    try:
+        month = parse_month(request.GET.get('month'), rates['start'])
+        first, nights = month_nights(rates, month)
+        if not nights:
+            raise ValueError(f'Rates are published for the next {RATE_DAYS} nights')
+        stay = None
+        if request.GET.get('check_in') or request.GET.get('check_out'):
+            stay = parse_rate_stay(request.GET.get('check_in'), request.GET.get('check_out'), rates['start'])
+    except ValueError as exc:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': str(exc)}),
+            content_type='application/json',
+            status=400
+        )
     
+    data = {
+        'status': 'success',
+        'hotel': rates['slug'],
+        'month': month.strftime('%Y-%m'),
+        'dates': [night.isoformat() for night in nights],
+        'room_types': [
+            {
+                'room_type': room_type['id'],
+                'name': room_type['name'],
+                'prices': [from_paise(price) for price in room_type['prices'][first:first + len(nights)]],
+            }
+            for room_type in rates['room_types']
+        ],
+    }
+    if stay:
+        check_in, check_out = stay
+        for result, room_type in zip(data['room_types'], rates['room_types']):
+            total = stay_total(rates, room_type, check_in, check_out)
+            result['stay_total'] = from_paise(total) if total is not None else None
+        data['stay'] = {
+            'check_in': check_in.isoformat(),
+            'check_out': check_out.isoformat(),
+            'nights': (check_out - check_in).days,
+        }
+    
+    response = HttpResponse(json.dumps(data), content_type='application/json')
+    patch_cache_control(response, public=True, max_age=API_CACHE_SECONDS)
     return response
 
+def is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+# Single purpose endpoints kept for older clients, /api/state/ does all of this in one request
+
+def state_write_response(request, operation, params, **extra):
+    """JSON response of one ClientState write, with its cookie changes"""
+    state = ClientState(request)
+    try:
+        result = operation(state, params)
+    except ValueError as exc:
+        return HttpResponse(
+            json.dumps({'status': 'error', 'message': str(exc)}),
+            content_type='application/json',
+            status=400
+        )
+    response = HttpResponse(
+        json.dumps({'status': 'success', **result, **extra}),
+        content_type='application/json'
+    )
+    return state.apply(response)
+
+def is_ajax(request, method):
+    return request.method == method and request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
 def set_preference(request):
     """API endpoint to set user preferences via AJAX"""
-    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        preference_type = request.POST.get('type')
-        preference_value = request.POST.get('value')
-        
-        response_data = {'status': 'success', 'type': preference_type, 'value': preference_value}
-        http_response = HttpResponse(
-            json.dumps(response_data),
-            content_type='application/json'
-        )
-        
-        # Set the cookie based on preference type
-        if preference_type == 'theme':
-            http_response.set_cookie(
-                'theme_preference',
-                preference_value,
-                max_age=365*24*60*60,
-                httponly=False,
-                samesite='Lax'
-            )
-        elif preference_type == 'language':
-            http_response.set_cookie(
-                'language_preference',
-                preference_value,
-                max_age=365*24*60*60,
-                httponly=False,
-                samesite='Lax'
-            )
-        elif preference_type == 'newsletter':
-            http_response.set_cookie(
-                'newsletter_subscribed',
-                'true' if preference_value == 'true' else 'false',
-                max_age=365*24*60*60,
-                httponly=True,
-                samesite='Lax'
-            )
-        
-        return http_response
+    if is_ajax(request, 'POST'):
+        return state_write_response(request, ClientState.set_preference, request.POST)
     
     return HttpResponse(json.dumps({'status': 'error', 'message': 'Invalid request'}), 
                        content_type='application/json', status=400)
 
 def clear_preferences(request):
     """Clear user preferences (for testing/development)"""
-    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        response = HttpResponse(json.dumps({'status': 'success'}), content_type='application/json')
-        
-        # Clear specific preference cookies
-        cookies_to_clear = [
-            'theme_preference',
-            'language_preference',
-            'recent_hotels',
-            'preferred_hotel_slug',
-            'newsletter_subscribed'
-        ]
-        
-        for cookie_name in cookies_to_clear:
-            response.delete_cookie(cookie_name)
-        
-        return response
+    if is_ajax(request, 'POST'):
+        return state_write_response(request, ClientState.clear_preferences, request.POST)
     
     return redirect('home_default')
 
 def get_user_data(request):
     """Get user data stored in cookies (for client-side use)"""
-    if request.method == 'GET' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        user_data = {
-            'preferred_hotel': request.COOKIES.get('preferred_hotel_slug'),
-            'current_hotel': request.COOKIES.get('current_hotel_slug'),
-            'theme': request.COOKIES.get('theme_preference', 'light'),
-            'language': request.COOKIES.get('language_preference', 'en'),
-            'first_visit': request.COOKIES.get('first_visit'),
-            'last_visit': request.COOKIES.get('last_visit'),
-            'visit_count': int(request.COOKIES.get('visit_count', 0)),
-            'newsletter_subscribed': request.COOKIES.get('newsletter_subscribed') == 'true',
-            'last_activity': request.COOKIES.get('last_activity'),
-        }
-        
-        # Get recent hotels
-        recent_hotels_json = request.COOKIES.get('recent_hotels', '[]')
-        try:
-            user_data['recent_hotels'] = json.loads(recent_hotels_json)
-        except (json.JSONDecodeError, TypeError):
-            user_data['recent_hotels'] = []
-        
+    if is_ajax(request, 'GET'):
         return HttpResponse(
-            json.dumps({'status': 'success', 'data': user_data}),
+            json.dumps({'status': 'success', 'data': ClientState(request).user_data()}),
             content_type='application/json'
         )
     
@@ -289,67 +679,8 @@ def get_user_data(request):
 
 def set_hotel_comparison(request):
     """API to add/remove hotels from comparison list"""
-    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        action = request.POST.get('action')
-        hotel_slug = request.POST.get('hotel_slug')
-        hotel_name = request.POST.get('hotel_name')
-        
-        # Get current comparison list from cookies
-        comparison_json = request.COOKIES.get('comparison_list', '[]')
-        try:
-            comparison_list = json.loads(comparison_json)
-            if not isinstance(comparison_list, list):
-                comparison_list = []
-        except (json.JSONDecodeError, TypeError):
-            comparison_list = []
-        
-        if action == 'add':
-            # Add hotel to comparison if not already there
-            if not any(h.get('slug') == hotel_slug for h in comparison_list):
-                comparison_list.append({
-                    'slug': hotel_slug,
-                    'name': hotel_name,
-                    'added_at': timezone.now().isoformat()
-                })
-                # Keep only last 3 hotels
-                comparison_list = comparison_list[-3:]
-                message = f'Added {hotel_name} to comparison list'
-        elif action == 'remove':
-            # Remove hotel from comparison
-            comparison_list = [h for h in comparison_list if h.get('slug') != hotel_slug]
-            message = f'Removed {hotel_name} from comparison list'
-        elif action == 'clear':
-            comparison_list = []
-            message = 'Cleared comparison list'
-        else:
-            return HttpResponse(
-                json.dumps({'status': 'error', 'message': 'Invalid action'}),
-                content_type='application/json',
-                status=400
-            )
-        
-        response_data = {
-            'status': 'success',
-            'action': action,
-            'comparison_list': comparison_list,
-            'message': message
-        }
-        
-        http_response = HttpResponse(
-            json.dumps(response_data),
-            content_type='application/json'
-        )
-        
-        # Update comparison list cookie
-        http_response.set_cookie(
-            'comparison_list',
-            json.dumps(comparison_list),
-            max_age=30*24*60*60,
-            httponly=False,  # Allow JS access
-            samesite='Lax'
-        )
-        
-        return http_response
+    if is_ajax(request, 'POST'):
+        return state_write_response(request, ClientState.update_comparison, request.POST)
     
     return HttpResponse(
         json.dumps({'status': 'error', 'message': 'Invalid request'}),
@@ -359,50 +690,16 @@ def set_hotel_comparison(request):
 
 def save_booking_data(request):
     """Save partial booking form data"""
-    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax(request, 'POST'):
         try:
             booking_data = json.loads(request.body)
-            
-            # Validate required fields
-            if not all(k in booking_data for k in ['check_in', 'check_out', 'guests']):
-                return HttpResponse(
-                    json.dumps({'status': 'error', 'message': 'Missing required fields'}),
-                    content_type='application/json',
-                    status=400
-                )
-            
-            # Add timestamp
-            booking_data['saved_at'] = timezone.now().isoformat()
-            booking_data['expires_at'] = (timezone.now() + timedelta(hours=24)).isoformat()
-            
-            response_data = {
-                'status': 'success',
-                'message': 'Booking data saved',
-                'expires_in': '24 hours'
-            }
-            
-            http_response = HttpResponse(
-                json.dumps(response_data),
-                content_type='application/json'
-            )
-            
-            # Save to cookie (24 hour expiry)
-            http_response.set_cookie(
-                'booking_form_data',
-                json.dumps(booking_data),
-                max_age=24*60*60,
-                httponly=False,  # Allow JS access
-                samesite='Lax'
-            )
-            
-            return http_response
-            
         except json.JSONDecodeError:
             return HttpResponse(
                 json.dumps({'status': 'error', 'message': 'Invalid JSON data'}),
                 content_type='application/json',
                 status=400
             )
+        return state_write_response(request, ClientState.save_booking, {'data': booking_data})
     
     return HttpResponse(
         json.dumps({'status': 'error', 'message': 'Invalid request method'}),
@@ -412,38 +709,14 @@ def save_booking_data(request):
 
 def get_booking_data(request):
     """Get saved booking form data"""
-    if request.method == 'GET' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        booking_json = request.COOKIES.get('booking_form_data')
-        
-        if booking_json:
-            try:
-                booking_data = json.loads(booking_json)
-                
-                # Check if data has expired
-                expires_at_str = booking_data.get('expires_at')
-                if expires_at_str:
-                    expires_at = datetime.fromisoformat(expires_at_str.replace('Z', '+00:00'))
-                    if timezone.now() > expires_at:
-                        # Data expired, clear it
-                        response_data = {'status': 'expired', 'data': None}
-                        http_response = HttpResponse(
-                            json.dumps(response_data),
-                            content_type='application/json'
-                        )
-                        http_response.delete_cookie('booking_form_data')
-                        return http_response
-                
-                return HttpResponse(
-                    json.dumps({'status': 'success', 'data': booking_data}),
-                    content_type='application/json'
-                )
-            except (json.JSONDecodeError, ValueError):
-                pass
-        
-        return HttpResponse(
-            json.dumps({'status': 'success', 'data': None}),
+    if is_ajax(request, 'GET'):
+        state = ClientState(request)
+        booking_data, expired = state.load_booking_draft()
+        response = HttpResponse(
+            json.dumps({'status': 'expired' if expired else 'success', 'data': booking_data}),
             content_type='application/json'
         )
+        return state.apply(response)
     
     return HttpResponse(
         json.dumps({'status': 'error', 'message': 'Invalid request'}),
@@ -453,60 +726,8 @@ def get_booking_data(request):
 
 def cookie_consent(request):
     """Handle cookie consent preferences"""
-    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        consent_type = request.POST.get('type', 'all')
-        granted = request.POST.get('granted', 'true') == 'true'
-        
-        response_data = {
-            'status': 'success',
-            'consent_type': consent_type,
-            'granted': granted
-        }
-        
-        http_response = HttpResponse(
-            json.dumps(response_data),
-            content_type='application/json'
-        )
-        
-        # Set consent cookie based on type
-        if consent_type == 'essential' or consent_type == 'all':
-            http_response.set_cookie(
-                'cookie_consent_essential',
-                'true' if granted else 'false',
-                max_age=365*24*60*60,
-                httponly=True,
-                samesite='Lax'
-            )
-        
-        if consent_type == 'analytics' or consent_type == 'all':
-            http_response.set_cookie(
-                'cookie_consent_analytics',
-                'true' if granted else 'false',
-                max_age=365*24*60*60,
-                httponly=True,
-                samesite='Lax'
-            )
-        
-        if consent_type == 'marketing' or consent_type == 'all':
-            http_response.set_cookie(
-                'cookie_consent_marketing',
-                'true' if granted else 'false',
-                max_age=365*24*60*60,
-                httponly=True,
-                samesite='Lax'
-            )
-        
-        # Set overall consent timestamp
-        if consent_type == 'all':
-            http_response.set_cookie(
-                'cookie_consent_given',
-                timezone.now().isoformat(),
-                max_age=365*24*60*60,
-                httponly=True,
-                samesite='Lax'
-            )
-        
-        return http_response
+    if is_ajax(request, 'POST'):
+        return state_write_response(request, ClientState.set_consent, request.POST)
     
     return HttpResponse(
         json.dumps({'status': 'error', 'message': 'Invalid request'}),
@@ -516,16 +737,9 @@ def cookie_consent(request):
 
 def check_consent(request):
     """Check user's cookie consent status"""
-    if request.method == 'GET' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        consent_data = {
-            'essential': request.COOKIES.get('cookie_consent_essential', 'false') == 'true',
-            'analytics': request.COOKIES.get('cookie_consent_analytics', 'false') == 'true',
-            'marketing': request.COOKIES.get('cookie_consent_marketing', 'false') == 'true',
-            'given_at': request.COOKIES.get('cookie_consent_given'),
-        }
-        
+    if is_ajax(request, 'GET'):
         return HttpResponse(
-            json.dumps({'status': 'success', 'consent': consent_data}),
+            json.dumps({'status': 'success', 'consent': ClientState(request).consent()}),
             content_type='application/json'
         )
     
@@ -533,4 +747,13 @@ def check_consent(request):
         json.dumps({'status': 'error', 'message': 'Invalid request'}),
         content_type='application/json',
         status=400
-    )
\ No newline at end of file
+    )
+
+def metrics(request):
+    """Request metrics of this process in Prometheus text format, see hotel/metrics.py"""
+    allowed = settings.HOTEL_METRICS_ALLOWED_IPS
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponse('Forbidden', content_type='text/plain', status=403)
+    response = HttpResponse(request_metrics.exposition(), content_type=METRICS_CONTENT_TYPE)
+    add_never_cache_headers(response)
+    return response
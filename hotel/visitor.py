@@ -0,0 +1,233 @@
+# hotel/visitor.py
+"""Visit tracking and display preferences of a browser, packed into one signed
+cookie (see hotel.middleware.visitor_middleware)
+
+Cookie value: base64url(packed fields) + ':' + signature. The packing is
+versioned by its first byte:
+
+    v1: B version, I first visit, I last visit, I last activity (unix seconds, 0 = none)
+        H visit count, then length prefixed UTF-8 strings: preferred hotel,
+        theme, language, and a count byte followed by the recent hotel slugs
+"""
+import base64
+import json
+import struct
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core import signing
+
+from .models import Hotel
+
+VISITOR_COOKIE = 'visitor'
+VISITOR_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+VISITOR_SALT = 'hotel.visitor'
+PACK_VERSION = 1
+HEADER = struct.Struct('>BIIIH')
+
+# The preferred and recent hotels are forgotten after 30 days without a visit
+HOTEL_MEMORY = 30 * 24 * 60 * 60
+# The hotel of the last visit counts as the current one for a day
+CURRENT_HOTEL_MEMORY = 24 * 60 * 60
+MAX_RECENT_HOTELS = 5
+# Theme and language values are cut to this many characters, hotel slugs are
+# stored whole or not at all: a cut slug would match no hotel
+MAX_STRING_LENGTH = 64
+MAX_SLUG_LENGTH = Hotel._meta.get_field('slug').max_length
+PREFERENCES = ('theme', 'language')
+
+# Separate cookies written before the visitor cookie, read once and deleted
+LEGACY_COOKIES = (
+    'preferred_hotel_slug', 'current_hotel_slug', 'recent_hotels', 'first_visit', 'last_visit',
+    'visit_count', 'last_activity', 'theme_preference', 'language_preference',
+)
+
+
+def _timestamp(value):
+    """Unix seconds of an ISO datetime string, or None"""
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc).isoformat() if timestamp else None
+
+
+def _valid_slug(value):
+    return isinstance(value, str) and 0 < len(value) <= MAX_SLUG_LENGTH
+
+
+def _pack_string(value):
+    data = (value or '').encode()
+    # Length prefixed with one byte, longer values are left out rather than cut
+    if len(data) > 0xFF:
+        data = b''
+    return bytes([len(data)]) + data
+
+
+class Visitor:
+    """Visitor state decoded from the request, see ``request.visitor``
+
+    Changing methods mark the visitor as changed, the middleware then writes
+    the cookie back once.
+    """
+
+    def __init__(self, preferred_hotel=None, recent_hotels=(), first_visit=None, last_visit=None,
+                 last_activity=None, visit_count=0, theme=None, language=None):
+        self.preferred_hotel = preferred_hotel
+        self.recent_hotels = list(recent_hotels)
+        self.first_visit = first_visit
+        self.last_visit = last_visit
+        self.last_activity = last_activity
+        self.visit_count = visit_count
+        self.theme = theme
+        self.language = language
+        self.changed = False
+        # Old cookies sent with the request, deleted from the response
+        self.legacy_cookies = ()
+
+    @classmethod
+    def from_request(cls, request):
+        cookies = request.COOKIES
+        visitor = None
+        if VISITOR_COOKIE in cookies:
+            try:
+                visitor = cls.unpack(signing.Signer(salt=VISITOR_SALT).unsign(cookies[VISITOR_COOKIE]))
+            except (signing.BadSignature, ValueError, IndexError, struct.error):
+                visitor = None
+
+        legacy_cookies = tuple(name for name in LEGACY_COOKIES if name in cookies)
+        if visitor is None:
+            visitor = cls.from_legacy_cookies(cookies) if legacy_cookies else cls()
+        visitor.legacy_cookies = legacy_cookies
+        visitor.forget_stale_hotels()
+        return visitor
+
+    @classmethod
+    def from_legacy_cookies(cls, cookies):
+        try:
+            recent_hotels = json.loads(cookies.get('recent_hotels', '[]'))
+        except json.JSONDecodeError:
+            recent_hotels = []
+        if not isinstance(recent_hotels, list):
+            recent_hotels = []
+        try:
+            visit_count = int(cookies.get('visit_count', 0))
+        except ValueError:
+            visit_count = 0
+
+        visitor = cls(
+            preferred_hotel=cookies.get('preferred_hotel_slug') if _valid_slug(cookies.get('preferred_hotel_slug')) else None,
+            recent_hotels=[slug for slug in recent_hotels if _valid_slug(slug)][:MAX_RECENT_HOTELS],
+            first_visit=_timestamp(cookies.get('first_visit')),
+            # Keep the remembered hotels alive, their old cookies lasted 30 days
+            last_visit=_timestamp(cookies.get('last_visit')) or int(time.time()),
+            last_activity=_timestamp(cookies.get('last_activity')),
+            visit_count=visit_count,
+            theme=cookies.get('theme_preference'),
+            language=cookies.get('language_preference'),
+        )
+        visitor.changed = True
+        return visitor
+
+    @classmethod
+    def unpack(cls, value):
+        data = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+        version, first_visit, last_visit, last_activity, visit_count = HEADER.unpack_from(data)
+        if version != PACK_VERSION:
+            raise ValueError(f'Unknown visitor cookie version {version}')
+
+        offset = HEADER.size
+        strings = []
+        for _ in range(3):
+            length = data[offset]
+            strings.append(data[offset + 1:offset + 1 + length].decode() or None)
+            offset += 1 + length
+        recent_hotels = []
+        for _ in range(data[offset]):
+            offset += 1
+            length = data[offset]
+            recent_hotels.append(data[offset + 1:offset + 1 + length].decode())
+            offset += length
+
+        preferred_hotel, theme, language = strings
+        return cls(preferred_hotel, recent_hotels, first_visit or None, last_visit or None,
+                   last_activity or None, visit_count, theme, language)
+
+    def pack(self):
+        data = HEADER.pack(
+            PACK_VERSION, self.first_visit or 0, self.last_visit or 0, self.last_activity or 0,
+            min(self.visit_count, 0xFFFF),
+        )
+        data += b''.join(_pack_string(value) for value in (self.preferred_hotel, self.theme, self.language))
+        recent_hotels = self.recent_hotels[:MAX_RECENT_HOTELS]
+        data += bytes([len(recent_hotels)]) + b''.join(_pack_string(slug) for slug in recent_hotels)
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    def save(self, response):
+        """Write the cookie to ``response`` when the visitor changed"""
+        if self.changed:
+            response.set_cookie(
+                VISITOR_COOKIE,
+                signing.Signer(salt=VISITOR_SALT).sign(self.pack()),
+                max_age=VISITOR_COOKIE_MAX_AGE,
+                httponly=True,
+                samesite='Lax',
+            )
+        for name in self.legacy_cookies:
+            response.delete_cookie(name, samesite='Lax')
+
+    def forget_stale_hotels(self):
+        if self.last_visit and time.time() - self.last_visit > HOTEL_MEMORY and (self.preferred_hotel or self.recent_hotels):
+            self.preferred_hotel = None
+            self.recent_hotels = []
+            self.changed = True
+
+    @property
+    def current_hotel(self):
+        if self.last_visit and time.time() - self.last_visit <= CURRENT_HOTEL_MEMORY:
+            return self.preferred_hotel
+        return None
+
+    def record_visit(self, slug, recent=True):
+        """Track a hotel page view, ``recent`` adds the hotel to the recent ones"""
+        now = int(time.time())
+        self.preferred_hotel = slug
+        if recent and slug not in self.recent_hotels:
+            self.recent_hotels = [slug, *self.recent_hotels][:MAX_RECENT_HOTELS]
+        self.first_visit = self.first_visit or now
+        self.last_visit = now
+        self.visit_count += 1
+        self.changed = True
+
+    def record_activity(self):
+        self.last_activity = int(time.time())
+        self.changed = True
+
+    def set_preference(self, name, value):
+        if name not in PREFERENCES:
+            raise ValueError('Invalid preference type')
+        setattr(self, name, str(value)[:MAX_STRING_LENGTH] if value else None)
+        self.changed = True
+
+    def clear_preferences(self):
+        self.preferred_hotel = None
+        self.recent_hotels = []
+        self.theme = None
+        self.language = None
+        self.changed = True
+
+    def as_dict(self):
+        return {
+            'preferred_hotel': self.preferred_hotel,
+            'current_hotel': self.current_hotel,
+            'theme': self.theme or 'light',
+            'language': self.language or 'en',
+            'first_visit': _isoformat(self.first_visit),
+            'last_visit': _isoformat(self.last_visit),
+            'visit_count': self.visit_count,
+            'last_activity': _isoformat(self.last_activity),
+            'recent_hotels': list(self.recent_hotels),
+        }
@@ -5,6 +5,18 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Served through ASGI, the home and hotel list pages use the async views of
+hotel/async_views.py, which load page content with concurrent queries
+(set HOTEL_ASYNC_VIEWS=0 to keep the sync views). Deployment with uvicorn:
+
+    python manage.py build_static
+    uvicorn orchid_hotel.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+One event loop per worker serves many requests at a time. Every worker also
+keeps its own thread pool for the concurrent queries (hotel.loaders.ASYNC_DB_THREADS).
+Use a shared cache backend when running several workers (see CACHES in settings.py).
+Behind nginx, add --proxy-headers and --forwarded-allow-ips.
 """
 
 import os
@@ -12,5 +24,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'orchid_hotel.settings')
+os.environ.setdefault('HOTEL_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -27,6 +27,13 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Route the home and hotel list pages to their async variants
+# (hotel/async_views.py). Set by orchid_hotel/asgi.py, see there.
+HOTEL_ASYNC_VIEWS = os.environ.get('HOTEL_ASYNC_VIEWS') == '1'
+
+# Addresses allowed to scrape /metrics (hotel/metrics.py), None for any
+HOTEL_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
 
 # Application definition
 
@@ -43,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it times and counts the queries of everything below
+    'hotel.middleware.metrics_middleware',
+    'hotel.middleware.replica_reads_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hotel.middleware.visitor_middleware',
 ]
 
 ROOT_URLCONF = 'orchid_hotel.urls'
@@ -82,6 +93,45 @@ DATABASES = {
     }
 }
 
+# Production database profile (hotel/db.py), HOTEL_DB_PRODUCTION=1: WAL
+# journaling and tuning pragmas on every SQLite connection, and connections
+# kept open across requests. Writers take the lock when a transaction begins
+# rather than failing to upgrade a read lock while readers are active.
+HOTEL_DB_PRODUCTION = os.environ.get('HOTEL_DB_PRODUCTION') == '1'
+if HOTEL_DB_PRODUCTION:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+    })
+
+# Read replicas of the hotel tables: HOTEL_DB_REPLICAS lists SQLite copies of
+# the primary, comma separated, kept fresh by `manage.py refresh_replicas` run
+# every minute or so. Other databases (a streaming replica) can be added to
+# DATABASES and HOTEL_DB_REPLICAS by alias. Public GET requests read a replica
+# whose data is newer than the last admin write and at most
+# HOTEL_REPLICA_MAX_LAG seconds old, the primary otherwise. With several
+# processes, the last write is only seen by all of them through a shared cache.
+for number, path in enumerate(filter(None, os.environ.get('HOTEL_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+HOTEL_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+HOTEL_REPLICA_MAX_LAG = 300
+DATABASE_ROUTERS = ['hotel.db.ReplicaRouter'] if HOTEL_DB_REPLICAS else []
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Rendered hotel pages are cached here and invalidated by model signals. Use a
+# shared backend (Redis, Memcached) when running several worker processes so an
+# admin edit invalidates the page in every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'orchid-hotel',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,6 +185,16 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# `manage.py build_static` collects static files minified, with content hashes
+# in their names and with .gz/.br siblings. Serve STATIC_ROOT with a far-future
+# expiry and the precompressed files (nginx: gzip_static on; brotli_static on;).
+# With DEBUG off, templates need the manifest written by that command.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'hotel.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Create media and static directories
 os.makedirs(os.path.join(BASE_DIR, 'media'), exist_ok=True)
@@ -0,0 +1,78 @@
+// static/js/hotel_list.js
+// Load the remaining hotels page by page as the visitor scrolls
+document.addEventListener("DOMContentLoaded", function () {
+    const cards = document.getElementById("hotel-cards");
+    const sentinel = document.getElementById("hotel-cards-sentinel");
+    if (!sentinel || !("IntersectionObserver" in window)) return;
+
+    const hotelUrl = document.body.dataset.hotelUrl;
+
+    // Same output as Django's truncatewords filter
+    function truncateWords(text, count) {
+        const words = (text || "").trim().split(/\s+/);
+        return words.length > count ? words.slice(0, count).join(" ") + "…" : words.join(" ");
+    }
+
+    function element(tag, className, text) {
+        const el = document.createElement(tag);
+        el.className = className;
+        if (text !== undefined) el.textContent = text;
+        return el;
+    }
+
+    function hotelCard(hotel) {
+        const column = element("div", "col-md-4 mb-4");
+        const card = element("div", "card h-100");
+        const body = element("div", "card-body");
+
+        const address = element("p", "card-text");
+        address.append(element("i", "fas fa-map-marker-alt me-2"), truncateWords(hotel.address, 15));
+        const phone = element("p", "card-text");
+        phone.append(element("i", "fas fa-phone me-2"), truncateWords(hotel.phone, 3));
+
+        const link = element("a", "btn btn-primary mt-3", `Visit ${hotel.name} `);
+        link.href = hotelUrl.replace("SLUG_PLACEHOLDER", hotel.slug);
+        link.append(element("i", "fas fa-arrow-right ms-2"));
+
+        body.append(
+            element("h3", "card-title", hotel.name),
+            element("h6", "card-subtitle mb-2 text-muted", hotel.tagline),
+            address,
+            phone,
+            link
+        );
+        card.append(body);
+        column.append(card);
+        return column;
+    }
+
+    let loading = false;
+    const observer = new IntersectionObserver((entries) => {
+        if (!entries[0].isIntersecting || loading) return;
+        loading = true;
+
+        const params = new URLSearchParams({
+            cursor: sentinel.dataset.nextCursor,
+            fields: sentinel.dataset.fields,
+        });
+        fetch(`${document.body.dataset.hotelDirectoryApi}?${params}`)
+            .then((response) => response.json())
+            .then((data) => {
+                data.results.forEach((hotel) => cards.append(hotelCard(hotel)));
+                if (data.next_cursor) {
+                    sentinel.dataset.nextCursor = data.next_cursor;
+                    // Re-observe so a still visible sentinel loads the next page
+                    observer.unobserve(sentinel);
+                    observer.observe(sentinel);
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            })
+            .catch((error) => console.error("Error loading hotels:", error))
+            .finally(() => {
+                loading = false;
+            });
+    }, { rootMargin: "300px 0px" });
+    observer.observe(sentinel);
+});
@@ -0,0 +1,137 @@
+// static/js/luxury_dining.js
+// Restaurant switcher of hotel/sections/luxury_dining.html, set up once the
+// section is in the page, at load or when static/js/sections.js inserts it
+function initLuxuryDining() {
+    const reserveButton = document.querySelector('.reserve-now-btn');
+    if (!reserveButton || reserveButton.dataset.initialized) return;
+    reserveButton.dataset.initialized = 'true';
+
+    const restaurantLinks = document.querySelectorAll('.restaurant-link');
+    const restaurantName = document.getElementById('restaurant-name');
+    const restaurantTagline = document.getElementById('restaurant-tagline');
+    const restaurantDescription = document.getElementById('restaurant-description');
+    //const restaurantDetails = document.getElementById('restaurant-details');
+    const restaurantImage = document.getElementById('restaurant-image');
+    const mobileDropdown = document.getElementById('mobile-restaurant-dropdown');
+
+    // Restaurant data (in real implementation, fetch from JSON file)
+    const restaurants = {
+        1: {
+            name: "Boulevard",
+            tagline: "Rooftop Fine Dining with Panoramic Views",
+            description: "Indulge at The Gourmet Shop at Orchid Hotel Vile Parle, a bakery and café in Mumbai offering fresh breads, pastries, cakes, desserts and quick bites near the airport.",
+            //details: "Azure Sky Lounge offers contemporary Indian cuisine with international influences. Our chefs use locally-sourced ingredients to create innovative dishes. The venue features both indoor and outdoor seating, a dedicated bar area, and private dining pods for intimate gatherings."
+        },
+        2: {
+            name: "Merlin's 99",
+            tagline: "Authentic Royal Indian Cuisine",
+            description: "Unwind at Merlin's 99 at Orchid Hotel Vile Parle, a stylish bar and lounge in Mumbai offering cocktails, premium spirits, live music and a vibrant ambiance.",
+            //details: "The Royal Mahal specializes in Awadhi and Mughlai cuisine. Our signature dishes include Dum Pukht biryanis, kebabs, and rich curries prepared in traditional copper vessels. The restaurant features opulent interiors with handcrafted furniture and live classical music performances."
+        },
+        3: {
+            name: "Mostly Grills",
+            tagline: "Coastal Seafood Excellence",
+            description: "Dine at Mostly Grills at Orchid Hotel Vile Parle, one of the best rooftop restaurants in Mumbai with open-air ambiance, airport views and sizzling grilled delights.",
+            //details: "Sea Pearl offers the freshest catch of the day with both traditional and contemporary preparations. Our specialties include Goan fish curry, Malvani seafood platters, and grilled lobster. The restaurant features nautical-themed decor with aquarium walls and sea-facing dining."
+        },
+        4: {
+            name: "South of Vindhyas",
+            tagline: "Mediterranean & Italian Delights",
+            description: "Savor authentic South Indian cuisine at South of Vindhyas, Orchid Hotel Vile Parle. Relish flavorful meals from breakfast to dinner, served in a premium setting.",
+            //details: "La Bella Vista features wood-fired pizzas, handmade pastas, and Mediterranean mezzes. Our wine cellar houses over 200 labels from around the world. The restaurant offers both indoor dining with Tuscan-inspired decor and an alfresco terrace with olive trees and vineyard ambiance."
+        },
+        5: {
+            name: "The Gourmet Shop",
+            tagline: "Pan-Asian Culinary Journey",
+            description: "Indulge at The Gourmet Shop at Orchid Hotel Vile Parle, a bakery and café in Mumbai offering fresh breads, pastries, cakes, desserts and quick bites near the airport.",
+            //details: "Spice Route features separate live kitchens for sushi, dim sum, Thai curries, and Korean barbecue. Our teppanyaki counters offer interactive dining experiences. The restaurant incorporates Zen garden elements with traditional Asian art and silk drapes."
+        }
+    };
+
+    // Image URLs are rendered into the desktop links by the template
+    function restaurantLink(restaurantId) {
+        return document.querySelector(`.restaurant-link[data-restaurant-id="${restaurantId}"]`);
+    }
+
+    // Function to update restaurant details
+    function updateRestaurantDetails(restaurantId, source = 'desktop') {
+        const restaurant = restaurants[restaurantId];
+        
+        if (restaurant) {
+            // Update text content with fade animation
+            restaurantName.textContent = restaurant.name;
+            restaurantTagline.textContent = restaurant.tagline;
+            restaurantDescription.textContent = restaurant.description;
+            //restaurantDetails.textContent = restaurant.details;
+            
+            // Update image with fade animation
+            restaurantImage.style.opacity = '0';
+            setTimeout(() => {
+                restaurantImage.src = restaurantLink(restaurantId).dataset.restaurantImage;
+                restaurantImage.alt = restaurant.name;
+                restaurantImage.style.opacity = '1';
+            }, 300);
+            
+            // Update reserve button text
+            reserveButton.textContent = `Reserve Table at ${restaurant.name}`;
+            
+            // Update active state - only for desktop links
+            if (source === 'desktop') {
+                restaurantLinks.forEach(link => {
+                    link.classList.remove('active');
+                });
+                const activeLink = document.querySelector(`.restaurant-link[data-restaurant-id="${restaurantId}"]`);
+                if (activeLink) {
+                    activeLink.classList.add('active');
+                }
+                
+                // Update mobile dropdown
+                if (mobileDropdown) {
+                    mobileDropdown.value = restaurantId;
+                }
+            }
+            
+            // Update desktop links when mobile dropdown is used
+            if (source === 'mobile') {
+                restaurantLinks.forEach(link => {
+                    link.classList.remove('active');
+                    if (link.getAttribute('data-restaurant-id') === restaurantId) {
+                        link.classList.add('active');
+                    }
+                });
+            }
+        }
+    }
+
+    // Add click event listeners to desktop links
+    restaurantLinks.forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            const restaurantId = this.getAttribute('data-restaurant-id');
+            updateRestaurantDetails(restaurantId, 'desktop');
+        });
+    });
+
+    // Add event listener for mobile dropdown
+    if (mobileDropdown) {
+        mobileDropdown.addEventListener('change', function(e) {
+            const restaurantId = this.value;
+            updateRestaurantDetails(restaurantId, 'mobile');
+        });
+    }
+
+    // Add click event to reserve button
+    reserveButton.addEventListener('click', function() {
+        const activeRestaurant = document.querySelector('.restaurant-link.active');
+        const restaurantName = activeRestaurant ? activeRestaurant.textContent : 'Restaurant';
+        alert(`Reservation requested for ${restaurantName}. Our team will contact you shortly.`);
+    });
+
+    // Initialize with first restaurant
+    updateRestaurantDetails(1, 'desktop');
+}
+
+document.addEventListener('DOMContentLoaded', initLuxuryDining);
+document.addEventListener('hotel:section-loaded', function(e) {
+    if (e.detail.section === 'luxury_dining') initLuxuryDining();
+});
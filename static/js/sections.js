@@ -0,0 +1,76 @@
+// static/js/sections.js
+// Load the home page sections left out of the first response (the
+// {% lazy_section %} placeholders of hotel/index.html) as they near the
+// viewport. "hotel:section-loaded" is dispatched on document after each one,
+// with the section name in event.detail.section.
+(function () {
+    const pending = new Set(document.querySelectorAll(".lazy-section[data-section-url]"));
+    const loads = new Map();
+    let observer = null;
+
+    function insert(placeholder, html) {
+        const section = placeholder.dataset.section;
+        const fragment = document.createRange().createContextualFragment(html);
+        // Carousels only start by themselves when present at page load
+        const carousels = fragment.querySelectorAll('[data-bs-ride="carousel"]');
+        placeholder.replaceWith(fragment);
+        pending.delete(placeholder);
+        if (window.bootstrap) {
+            carousels.forEach((carousel) => window.bootstrap.Carousel.getOrCreateInstance(carousel).cycle());
+        }
+        document.dispatchEvent(new CustomEvent("hotel:section-loaded", { detail: { section } }));
+    }
+
+    function load(placeholder) {
+        if (!loads.has(placeholder)) {
+            const request = fetch(placeholder.dataset.sectionUrl, { credentials: "same-origin" })
+                .then((response) => {
+                    if (!response.ok) throw new Error(`Section ${placeholder.dataset.section}: ${response.status}`);
+                    return response.text();
+                })
+                .then((html) => insert(placeholder, html))
+                .catch((error) => {
+                    // Tried again when it nears the viewport next
+                    console.error(error);
+                    loads.delete(placeholder);
+                    if (observer) observer.observe(placeholder);
+                });
+            loads.set(placeholder, request);
+        }
+        return loads.get(placeholder);
+    }
+
+    function loadAll() {
+        return Promise.all([...pending].map(load));
+    }
+
+    // For links to an anchor inside a section not loaded yet, see site.js
+    window.hotelSections = { loadAll };
+
+    if (!pending.size) return;
+    if (!("IntersectionObserver" in window)) {
+        loadAll();
+        return;
+    }
+
+    observer = new IntersectionObserver(
+        (entries) => {
+            entries.forEach((entry) => {
+                if (!entry.isIntersecting) return;
+                observer.unobserve(entry.target);
+                load(entry.target);
+            });
+        },
+        { rootMargin: "600px 0px" }
+    );
+    pending.forEach((placeholder) => observer.observe(placeholder));
+
+    // Pages opened at an anchor of a lazy section, e.g. search results
+    const anchor = decodeURIComponent(window.location.hash.slice(1));
+    if (anchor && !document.getElementById(anchor)) {
+        loadAll().then(() => {
+            const target = document.getElementById(anchor);
+            if (target) target.scrollIntoView();
+        });
+    }
+})();
@@ -10,8 +10,12 @@ class HotelStorageManager {
             NEWSLETTER_SUBSCRIBED: 'newsletter_subscribed',
             BOOKING_FORM_DATA: 'booking_form_data',
             COMPARISON_LIST: 'hotel_comparison_list',
-            LAST_VISIT: 'last_visit_date'
+            LAST_VISIT: 'last_visit_date',
+            FIRST_VISIT: 'first_visit_date'
         };
+        this.stateUrl = (document.body && document.body.dataset.stateApi) || '/api/state/';
+        this.compareUrl = (document.body && document.body.dataset.compareApi) || '/api/compare/';
+        this.stateQueue = [];
     }
 
     // ========== COOKIE METHODS ==========
@@ -72,8 +76,9 @@ class HotelStorageManager {
 
     // ========== SPECIFIC HOTEL-RELATED METHODS ==========
     savePreferredHotel(hotelSlug) {
-        // Save to cookie for server-side access
-        this.setCookie(this.storageKeys.PREFERRED_HOTEL, hotelSlug);
+        // The server remembers the preferred hotel of each page view in its
+        // visitor cookie, this copy is for client-side access
+        this.setLocal(this.storageKeys.PREFERRED_HOTEL, hotelSlug);
         
         // Save to localStorage for client-side access
         const recentHotels = this.getRecentHotels();
@@ -88,7 +93,7 @@ class HotelStorageManager {
     }
 
     getPreferredHotel() {
-        return this.getCookie(this.storageKeys.PREFERRED_HOTEL);
+        return this.getLocal(this.storageKeys.PREFERRED_HOTEL);
     }
 
     getRecentHotels() {
@@ -178,14 +183,12 @@ class HotelStorageManager {
     }
 
     setLanguagePreference(lang) {
-        this.setCookie(this.storageKeys.LANGUAGE, lang);
         this.setLocal(this.storageKeys.LANGUAGE, lang);
+        return this.savePreference('language', lang);
     }
 
     getLanguagePreference() {
-        return this.getLocal(this.storageKeys.LANGUAGE) || 
-               this.getCookie(this.storageKeys.LANGUAGE) || 
-               'en';
+        return this.getLocal(this.storageKeys.LANGUAGE) || 'en';
     }
 
     // ========== ANALYTICS & TRACKING ==========
@@ -193,17 +196,16 @@ class HotelStorageManager {
         const lastVisit = this.getLocal(this.storageKeys.LAST_VISIT);
         const currentVisit = new Date().toISOString();
         
-        // Set cookie for first visit detection
-        if (!this.getCookie('first_visit')) {
-            this.setCookie('first_visit', currentVisit, 365);
+        // Server-side visits are tracked in the visitor cookie, see fetchUserData()
+        if (!this.getLocal(this.storageKeys.FIRST_VISIT)) {
+            this.setLocal(this.storageKeys.FIRST_VISIT, currentVisit);
         }
         
         // Update last visit
         this.setLocal(this.storageKeys.LAST_VISIT, currentVisit);
-        this.setCookie('last_visit', currentVisit, 30);
         
         return {
-            firstVisit: this.getCookie('first_visit'),
+            firstVisit: this.getLocal(this.storageKeys.FIRST_VISIT),
             lastVisit: lastVisit,
             currentVisit: currentVisit
         };
@@ -220,6 +222,129 @@ class HotelStorageManager {
         return cookieValue === 'true';
     }
 
+    // ========== SERVER STATE ==========
+    // Reads and writes of the cookie state kept by the server. Calls made in
+    // the same tick are sent together as one /api/state/ request; each returns
+    // a promise of its own part of the response.
+    loadState(keys = ['user', 'consent', 'booking', 'comparison']) {
+        return Promise.all(keys.map((key) => this.readState(key)))
+            .then((values) => Object.fromEntries(keys.map((key, i) => [key, values[i]])));
+    }
+
+    fetchUserData() {
+        return this.readState('user');
+    }
+
+    fetchConsent() {
+        return this.readState('consent');
+    }
+
+    fetchBookingDraft() {
+        return this.readState('booking');
+    }
+
+    fetchComparisonList() {
+        return this.readState('comparison');
+    }
+
+    // Details of the hotels in the comparison list, in one request
+    async fetchComparisonDetails() {
+        const list = await this.fetchComparisonList();
+        const slugs = (list || []).map((hotel) => hotel.slug).filter(Boolean);
+        if (!slugs.length) {
+            return [];
+        }
+        const response = await fetch(`${this.compareUrl}?slugs=${slugs.map(encodeURIComponent).join(',')}`);
+        const data = await response.json();
+        return data.status === 'success' ? data.hotels : [];
+    }
+
+    savePreference(type, value) {
+        return this.writeState('set_preference', { type, value });
+    }
+
+    clearPreferences() {
+        return this.writeState('clear_preferences');
+    }
+
+    updateComparison(action, hotelSlug, hotelName) {
+        return this.writeState('comparison', { action, hotel_slug: hotelSlug, hotel_name: hotelName });
+    }
+
+    saveBookingDraft(data) {
+        return this.writeState('save_booking', { data });
+    }
+
+    saveConsent(type, granted) {
+        return this.writeState('consent', { type, granted });
+    }
+
+    readState(key) {
+        return this.queueState({ read: key });
+    }
+
+    writeState(op, params = {}) {
+        return this.queueState({ write: { ...params, op } });
+    }
+
+    queueState(call) {
+        return new Promise((resolve, reject) => {
+            this.stateQueue.push({ ...call, resolve, reject });
+            if (this.stateQueue.length === 1) {
+                setTimeout(() => this.flushState(), 0);
+            }
+        });
+    }
+
+    async flushState() {
+        const calls = this.stateQueue;
+        this.stateQueue = [];
+        const reads = [...new Set(calls.filter((call) => call.read).map((call) => call.read))];
+        const writes = calls.filter((call) => call.write).map((call) => call.write);
+
+        try {
+            let response;
+            if (writes.length) {
+                // Writes need the CSRF cookie, handed out by any GET of the endpoint
+                if (!this.getCookie('csrftoken')) {
+                    await fetch(`${this.stateUrl}?read=consent`, { credentials: 'same-origin' });
+                }
+                response = await fetch(this.stateUrl, {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': this.getCookie('csrftoken') || ''
+                    },
+                    body: JSON.stringify({ read: reads, write: writes })
+                });
+            } else {
+                response = await fetch(`${this.stateUrl}?read=${reads.join(',')}`, { credentials: 'same-origin' });
+            }
+            if (!response.ok) {
+                throw new Error(`State request failed with ${response.status}`);
+            }
+            const data = await response.json();
+
+            let written = 0;
+            calls.forEach((call) => {
+                if (call.read) {
+                    call.resolve(data.state[call.read]);
+                    return;
+                }
+                const result = data.results[written++];
+                if (result.status === 'success') {
+                    call.resolve(result);
+                } else {
+                    call.reject(new Error(result.message));
+                }
+            });
+        } catch (e) {
+            console.error('Error syncing state:', e);
+            calls.forEach((call) => call.reject(e));
+        }
+    }
+
     // ========== UTILITY METHODS ==========
     isStorageAvailable() {
         try {
@@ -237,7 +362,7 @@ class HotelStorageManager {
         this.removeLocal(this.storageKeys.RECENT_HOTELS);
         this.removeLocal(this.storageKeys.COMPARISON_LIST);
         this.removeLocal(this.storageKeys.BOOKING_FORM_DATA);
-        this.deleteCookie(this.storageKeys.PREFERRED_HOTEL);
+        this.removeLocal(this.storageKeys.PREFERRED_HOTEL);
     }
 }
 